@@ -1,29 +1,329 @@
-from typing import Any, Dict
-from langchain_openai import ChatOpenAI
-
-SYSTEM = """You are an ADR writer.
-Write ADR-001 in a professional, audit-ready style.
-Include: Context, Decision (+ alternatives), Assumptions, Trade-offs, Risks & mitigations,
-Governance + HITL triggers, Evidence & tool calls used, Rollout plan, Consequences.
-Return markdown.
+from __future__ import annotations
+import json
+import re
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from aiv_de.agents.requirements_analyst import extract_requirements
+from aiv_de.llm import allm_slot, llm_slot
+from aiv_de.llm_cache import CacheView, cache_key, model_name_of
+from aiv_de.observability.trace import trace_to_dicts
+from aiv_de.types import ADR
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+SYSTEM = """You write the narrative part of ADR-001 for AIV-DE, audit-ready and short.
+The fact sections are already written from the pipeline state. Return markdown with exactly
+these sections: ## Trade-offs, ## Risks & mitigations, ## Rollout plan, ## Consequences.
+Do not restate the facts and do not invent numbers.
 """
 
+# ADR key -> markdown heading. Fact sections are rendered from state, narrative ones by the LLM.
+_HEADINGS = {
+    "context": "Context",
+    "decision": "Decision",
+    "alternatives": "Alternatives considered",
+    "assumptions": "Assumptions",
+    "governance": "Governance + HITL triggers",
+    "evidence": "Evidence & tool calls",
+    "tradeoffs": "Trade-offs",
+    "risks_and_mitigations": "Risks & mitigations",
+    "rollout_plan": "Rollout plan",
+    "consequences": "Consequences",
+}
+FACT_SECTIONS = ("context", "decision", "alternatives", "assumptions", "governance", "evidence")
+NARRATIVE_SECTIONS = ("tradeoffs", "risks_and_mitigations", "rollout_plan", "consequences")
 
-def write_adr(
-    llm: ChatOpenAI,
+# Trace fields the evidence lines leave out: per-run timing and cache counters, repair
+# accounting, or rendered in their own section.
+_EVIDENCE_SKIP = ("t", "duration_s", "cache", "repair", "evaluated", "checked_option")
+
+_NARRATIVE_HEADING = re.compile(r"^##\s+(.+?)\s*$", re.MULTILINE)
+
+
+def _compact(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _items(values: Any) -> str:
+    return ", ".join(f"`{v}`" for v in values) if values else "none"
+
+
+def _evaluated(trace: Any) -> List[Dict[str, Any]]:
+    """Per-option results of the last validate step."""
+    for t in reversed(trace_to_dicts(trace or [])):
+        if t.get("node") == "validate":
+            return t.get("evaluated") or []
+    return []
+
+
+# ---------------------------------------------------------------------------
+# Fact sections (rendered from state, exact)
+# ---------------------------------------------------------------------------
+
+def _context(site_profile: Dict[str, Any], rules: List[str]) -> str:
+    c, _, _ = extract_requirements(site_profile)
+    lines = [
+        f"Site `{site_profile.get('site_id')}`"
+        + (f" ({site_profile['country']})" if site_profile.get("country") else "")
+        + f", use case `{c.use_case}`{' (safety-critical)' if c.safety_critical else ''}.",
+        "",
+        f"- Latency budget: {c.latency_budget_ms} ms; power budget: {c.power_budget_w} W",
+        f"- Cameras: {c.camera_count} x {c.resolution_class}-res at {c.fps} fps",
+        f"- Data residency required: {'yes' if c.data_residency_required else 'no'}",
+    ]
+    if c.wan_reliability or c.offline_hours_per_week:
+        lines.append(f"- WAN: {c.wan_reliability or 'unknown'}, offline up to {c.offline_hours_per_week or 0} h/week")
+    if c.preferred_deployment or c.on_site_ml_staff is not None:
+        staff = "unknown" if c.on_site_ml_staff is None else ("yes" if c.on_site_ml_staff else "no")
+        lines.append(f"- Preferred deployment: {c.preferred_deployment or 'none'}; on-site ML staff: {staff}")
+    lines.extend(f"- Rule: {r}" for r in rules)
+    return "\n".join(lines)
+
+
+def _decision(option: Dict[str, Any], feasibility: Optional[Dict[str, Any]]) -> str:
+    placement = ", ".join(f"{k}={v}" for k, v in (option.get("placement") or {}).items())
+    lines = [
+        f"Adopt **{option.get('option_id')}**: {option.get('summary', '')}".rstrip(),
+        "",
+        f"- Placement: {placement or 'unspecified'}",
+        f"- Hardware: {_items(option.get('hardware'))}",
+        f"- Pipeline: {' -> '.join(option.get('pipeline') or []) or 'unspecified'}",
+    ]
+    if feasibility:
+        lines.append(f"- Feasibility margin: {feasibility.get('margin')}; "
+                     f"bottlenecks: {_items(feasibility.get('bottlenecks'))}")
+    return "\n".join(lines)
+
+
+def _alternatives(option: Dict[str, Any], evaluated: List[Dict[str, Any]]) -> str:
+    lines = []
+    for e in evaluated:
+        if e.get("option_id") == option.get("option_id"):
+            continue
+        status = f"vetoed ({_items(e['violated_rules'])})" if e.get("violated_rules") else "passed, ranked lower"
+        lines.append(f"- {e.get('option_id')} (score {e.get('score')}): {status}")
+    return "\n".join(lines) or "No other option was evaluated."
+
+
+def _assumptions(requirements: Dict[str, Any]) -> str:
+    lines = [f"- {a}" for a in requirements.get("assumptions", [])]
+    lines += [f"- Open: {m}" for m in requirements.get("missing_info", [])]
+    return "\n".join(lines) or "None recorded."
+
+
+def _governance(validation: Dict[str, Any]) -> str:
+    policy = validation.get("policy") or {}
+    triggers = ", ".join(f"`{t['id']}` -> {t['action']}" for t in validation.get("hitl_triggers") or [])
+    vetoes = "; ".join(f"{v['reason']}: {_items(v['violated_rules'])}" for v in validation.get("vetoes") or [])
+    lines = [
+        f"- EU AI Act risk tier: {validation.get('risk_tier') or 'not classified'}",
+        f"- Policy check: {'passed' if policy.get('passed') else 'failed'}; "
+        f"violated rules: {_items(policy.get('violated_rules'))}",
+        f"- Required controls: {_items(policy.get('required_controls'))}",
+        f"- HITL action: {policy.get('hitl_action') or 'none'}",
+        f"- HITL triggers: {triggers or 'none'}",
+        f"- Vetoes: {vetoes or 'none'}",
+    ]
+    return "\n".join(lines)
+
+
+def _evidence_line(event: Dict[str, Any]) -> str:
+    details = []
+    for k, v in event.items():
+        if k in ("node", "event") or k in _EVIDENCE_SKIP or v in (None, [], {}):
+            continue
+        if isinstance(v, list):
+            v = len(v) if any(isinstance(x, dict) for x in v) else ",".join(map(str, v))
+        elif isinstance(v, dict):
+            continue
+        details.append(f"{k}={v}")
+    return f"- `{event.get('node')}` {event.get('event')}" + (f": {', '.join(details)}" if details else "")
+
+
+def _evidence(validation: Dict[str, Any], trace: Any) -> str:
+    feas = validation.get("feasibility") or {}
+    policy = validation.get("policy") or {}
+    lines = [
+        f"- `validate_feasibility`: is_possible={feas.get('is_possible')}, margin={feas.get('margin')}, "
+        f"bottlenecks={_items(feas.get('bottlenecks'))}",
+        f"- `policy_check`: passed={policy.get('passed')}, violated_rules={_items(policy.get('violated_rules'))}",
+        "",
+        "Pipeline trace:",
+        "",
+    ]
+    lines += [_evidence_line(t) for t in trace_to_dicts(trace or [])]
+    return "\n".join(lines)
+
+
+def adr_sections(
     site_profile: Dict[str, Any],
     selected_option: Dict[str, Any],
     validation: Dict[str, Any],
     trace: Any,
+    requirements: Optional[Dict[str, Any]] = None,
+) -> ADR:
+    """The ADR with its fact sections filled in; narrative sections are left empty."""
+    requirements = requirements or {}
+    rules = requirements.get("rules")
+    if rules is None:
+        rules = extract_requirements(site_profile)[1]
+    inference = (selected_option.get("placement") or {}).get("inference", "edge")
+    adr: ADR = {key: "" for key in ADR.__annotations__}  # type: ignore[assignment]
+    adr.update(
+        adr_id="ADR-001",
+        title=f"{str(inference).capitalize()} inference for {site_profile.get('site_id')} "
+              f"({selected_option.get('option_id')})",
+        context=_context(site_profile, rules),
+        decision=_decision(selected_option, validation.get("feasibility")),
+        alternatives=_alternatives(selected_option, _evaluated(trace)),
+        assumptions=_assumptions(requirements),
+        governance=_governance(validation),
+        evidence=_evidence(validation, trace),
+    )
+    return adr
+
+
+def render_facts(adr: ADR) -> str:
+    """Title and fact sections as markdown; the narrative is appended after them."""
+    parts = [f"# {adr['adr_id']}: {adr['title']}\n"]
+    parts += [f"## {_HEADINGS[key]}\n\n{adr[key]}\n" for key in FACT_SECTIONS]
+    return "\n".join(parts) + "\n"
+
+
+def narrative_sections(text: str) -> Dict[str, str]:
+    """Split the LLM's markdown back into ADR keys by heading (unknown headings are ignored)."""
+    by_heading = {h.lower(): key for key, h in _HEADINGS.items() if key in NARRATIVE_SECTIONS}
+    marks = list(_NARRATIVE_HEADING.finditer(text))
+    out: Dict[str, str] = {}
+    for i, m in enumerate(marks):
+        key = by_heading.get(m.group(1).lower())
+        if key:
+            end = marks[i + 1].start() if i + 1 < len(marks) else len(text)
+            out[key] = text[m.end():end].strip()
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Narrative (LLM)
+# ---------------------------------------------------------------------------
+
+def _summary(
+    site_profile: Dict[str, Any],
+    selected_option: Dict[str, Any],
+    validation: Dict[str, Any],
+    trace: Any,
+    requirements: Dict[str, Any],
 ) -> str:
-    msg = f"""Site:\n{site_profile}
+    c, rules, _ = extract_requirements(site_profile)
+    policy = validation.get("policy") or {}
+    return _compact({
+        "site": c.model_dump(exclude_none=True),
+        "rules": requirements.get("rules", rules),
+        "decision": {k: selected_option.get(k) for k in ("option_id", "summary", "placement", "hardware",
+                                                         "pros", "cons", "risks", "mitigations")},
+        "margin": (validation.get("feasibility") or {}).get("margin"),
+        "risk_tier": validation.get("risk_tier"),
+        "controls": policy.get("required_controls", []),
+        "hitl": [t["id"] for t in validation.get("hitl_triggers") or []],
+        "rejected": [{"option_id": e.get("option_id"), "violated_rules": e.get("violated_rules")}
+                     for e in _evaluated(trace) if e.get("violated_rules")],
+    })
+
+
+def _build_msg(summary: str) -> str:
+    return f"Decision summary:\n{summary}\n\nWrite the narrative sections."
+
+
+def narrative_prompt(
+    site_profile: Dict[str, Any],
+    selected_option: Dict[str, Any],
+    validation: Dict[str, Any],
+    trace: Any,
+    requirements: Optional[Dict[str, Any]] = None,
+) -> List[Tuple[str, str]]:
+    """The messages the narrative call sends (the bench measures prompt size with it)."""
+    msg = _build_msg(_summary(site_profile, selected_option, validation, trace, requirements or {}))
+    return [("system", SYSTEM), ("user", msg)]
+
+
+def _prepare(
+    site_profile: Dict[str, Any],
+    selected_option: Dict[str, Any],
+    validation: Dict[str, Any],
+    trace: Any,
+    requirements: Optional[Dict[str, Any]],
+) -> Tuple[ADR, str, str]:
+    requirements = requirements or {}
+    adr = adr_sections(site_profile, selected_option, validation, trace, requirements)
+    msg = _build_msg(_summary(site_profile, selected_option, validation, trace, requirements))
+    return adr, render_facts(adr), msg
+
 
-Selected option:\n{selected_option}
+def _finish(adr: ADR, facts: str, narrative: str) -> Dict[str, Any]:
+    adr.update(narrative_sections(narrative))  # type: ignore[typeddict-item]
+    return {"adr": facts + narrative, "sections": adr, "narrative": narrative}
 
-Validation:\n{validation}
 
-Trace summary:\n{trace}
+def render_adr(
+    narrative: str,
+    site_profile: Dict[str, Any],
+    selected_option: Dict[str, Any],
+    validation: Dict[str, Any],
+    trace: Any,
+    requirements: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """An ADR around a narrative written earlier: the fact sections are rendered from the current
+    state (evidence, assumptions), no LLM call. Same result shape as write_adr."""
+    adr = adr_sections(site_profile, selected_option, validation, trace, requirements)
+    return _finish(adr, render_facts(adr), narrative)
+
+
+def write_adr(
+    llm: ChatOpenAI,
+    site_profile: Dict[str, Any],
+    selected_option: Dict[str, Any],
+    validation: Dict[str, Any],
+    trace: Any,
+    cache: Optional[CacheView] = None,
+    requirements: Optional[Dict[str, Any]] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """{"adr": markdown, "sections": ADR, "narrative": the LLM's text}. The fact sections go to
+    `on_text` before the narrative call, so a streaming caller can show them first."""
+    adr, facts, msg = _prepare(site_profile, selected_option, validation, trace, requirements)
+    if on_text:
+        on_text(facts)
+    key = cache_key(model_name_of(llm), SYSTEM, [msg])
+    narrative = cache.get(key) if cache else None
+    if narrative is None:
+        with llm_slot():
+            resp = llm.invoke([("system", SYSTEM), ("user", msg)])
+        narrative = resp.content
+        if cache:
+            cache.set(key, narrative)
+    return _finish(adr, facts, narrative)
 
-Write ADR-001."""
-    resp = llm.invoke([("system", SYSTEM), ("user", msg)])
-    return resp.content
+
+async def awrite_adr(
+    llm: ChatOpenAI,
+    site_profile: Dict[str, Any],
+    selected_option: Dict[str, Any],
+    validation: Dict[str, Any],
+    trace: Any,
+    cache: Optional[CacheView] = None,
+    requirements: Optional[Dict[str, Any]] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    adr, facts, msg = _prepare(site_profile, selected_option, validation, trace, requirements)
+    if on_text:
+        on_text(facts)
+    key = cache_key(model_name_of(llm), SYSTEM, [msg])
+    narrative = cache.get(key) if cache else None
+    if narrative is None:
+        async with allm_slot():
+            resp = await llm.ainvoke([("system", SYSTEM), ("user", msg)])
+        narrative = resp.content
+        if cache:
+            cache.set(key, narrative)
+    return _finish(adr, facts, narrative)
@@ -1,16 +1,20 @@
+from __future__ import annotations
 import json
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, Generator, List, Optional, Set, Tuple
 
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-from aiv_de.observability.llm_logger import SafeLLMLogger
+from aiv_de.observability.llm_logger import get_llm_logger
+from aiv_de.agents.requirements_analyst import extract_requirements, flat_facts, site_remainder
 from aiv_de.config import SETTINGS
+from aiv_de.llm import allm_slot, forced_tool, llm_slot
+from aiv_de.llm_cache import CacheView, cache_key, model_name_of
+from aiv_de.observability.tokens import count_tokens
+from aiv_de.tools.hardware_catalog import as_catalog
+from aiv_de.tools.prune_hardware import compact_hardware, prune_hardware
 
-llm_logger = SafeLLMLogger(
-    base_dir=SETTINGS.llm_log_dir,
-    enabled=SETTINGS.log_llm_io,
-)
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
 SYSTEM = """You are the Architect for AIV-DE.
 Propose 2-3 viable architectures that respect data residency.
@@ -19,6 +23,10 @@ option_id, summary, placement, pipeline, hardware, pros, cons, risks, mitigation
 No vendor-locked claims. No precise performance numbers.
 """
 
+REPAIR_SYSTEM = """You are the Architect for AIV-DE, fixing options you proposed earlier.
+Change only what the listed errors or violated rules require and keep each option_id.
+"""
+
 SCHEMA_HINT = """\
 Schema example:
 {
@@ -58,51 +66,191 @@ class ArchitectureOptionsResponse(BaseModel):
     options: List[ArchitectureOptionModel]
 
 
-def propose_options(
-    llm: ChatOpenAI,
+def _compact(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def hardware_table(site_profile: Dict[str, Any], hw_db: List[Dict[str, Any]]) -> str:
+    """The pruned top-K candidates as the compact table both prompts carry."""
+    catalog = as_catalog(hw_db)
+    candidates = prune_hardware(site_profile, catalog, SETTINGS.architect_hw_top_k)
+    if not candidates:
+        candidates = catalog.records[: SETTINGS.architect_hw_top_k]
+    return compact_hardware(candidates)
+
+
+# Not design inputs: the id only names the site, and attached documents are policy_check's
+# to scan (sending a poisoned one to the architect is the injection path itself).
+_NOT_FACTS = ("site_id", "poison_doc")
+
+
+def _requirements_block(site_profile: Dict[str, Any], requirements: Dict[str, Any]) -> str:
+    """Extracted constraints plus the profile fields they do not cover, the derived rules and the
+    analyst's notes. A draft (no requirements yet) gets the same facts from the extractor."""
+    constraints, rules = requirements.get("constraints"), requirements.get("rules")
+    if constraints is None:
+        extracted, rules, _ = extract_requirements(site_profile)
+        constraints = extracted.model_dump(exclude_none=True)
+    rest = {k: v for k, v in site_remainder(site_profile).items() if k not in _NOT_FACTS}
+    lines = [f"Site facts: {flat_facts({**constraints, **rest})}"]
+    for label, items in (("Rules", rules), ("Open", requirements.get("missing_info")),
+                         ("Assumptions", requirements.get("assumptions"))):
+        if items:
+            lines.append(f"{label}: {'; '.join(items)}")
+    return "\n".join(lines)
+
+
+def _build_msg(
     site_profile: Dict[str, Any],
     requirements: Dict[str, Any],
     hw_db: List[Dict[str, Any]],
     vetoes: Optional[List[Dict[str, Any]]],
-    run_id: str,
-) -> Dict[str, Any]:
-    hw_ids = [h.get("hw_id") for h in hw_db if h.get("hw_id")]
-    veto_summary = vetoes or []
-
-    msg = (
-        f"Site:\n{site_profile}\n\n"
-        f"Requirements:\n{requirements}\n\n"
-        f"Vetoes from last validation (if any):\n{veto_summary}\n\n"
-        f"Available hardware IDs (choose 1+ per option):\n{hw_ids}\n\n"
+) -> str:
+    veto_block = f"Vetoes from last validation:\n{_compact(vetoes)}\n\n" if vetoes else ""
+    return (
+        f"{_requirements_block(site_profile, requirements)}\n\n"
+        f"{veto_block}"
+        "Hardware that fits this site (id|class|accel|mem|power|cost), choose 1+ per option:\n"
+        f"{hardware_table(site_profile, hw_db)}\n\n"
         f"{SCHEMA_HINT}"
         "Return structured options only."
     )
 
-    structured_llm = llm.with_structured_output(
-        ArchitectureOptionsResponse, method="function_calling"
+
+def propose_prompt(
+    site_profile: Dict[str, Any],
+    requirements: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    vetoes: Optional[List[Dict[str, Any]]],
+) -> List[Tuple[str, str]]:
+    """The messages a proposal sends (the bench measures prompt size with it)."""
+    return [("system", SYSTEM), ("user", _build_msg(site_profile, requirements, hw_db, vetoes))]
+
+
+def _retry_note(error: str) -> str:
+    return f"Previous output failed validation. Fix and return only the schema-conformant tool output. Error: {error}"
+
+
+# ---------------------------------------------------------------------------
+# Targeted repair: resend only the options that failed, never the whole context
+# ---------------------------------------------------------------------------
+
+# (options as last returned, indices of the ones being repaired)
+_Broken = Tuple[List[Any], Set[int]]
+
+def _schema_repair(args: Any, exc: ValidationError) -> Optional[Tuple[_Broken, str]]:
+    """(broken options, repair prompt) for a tool call whose options failed the schema.
+
+    The prompt carries only the broken options and one line per error. None when the errors
+    are not inside individual options (e.g. no `options` list at all), which needs the full
+    prompt again."""
+    options = args.get("options") if isinstance(args, dict) else None
+    if not isinstance(options, list):
+        return None
+    errors: Dict[int, List[str]] = {}
+    for err in exc.errors():
+        loc = err["loc"]
+        if len(loc) < 2 or loc[0] != "options" or not isinstance(loc[1], int) or loc[1] >= len(options):
+            return None
+        errors.setdefault(loc[1], []).append(f"{'.'.join(map(str, loc[2:])) or '<option>'}: {err['msg']}")
+    if not errors:
+        return None
+
+    broken = [opt for i, opt in enumerate(options) if i in errors]
+    lines = "".join(
+        f"- {options[i].get('option_id', f'#{i}') if isinstance(options[i], dict) else f'#{i}'} {line}\n"
+        for i, errs in sorted(errors.items()) for line in errs
     )
+    msg = (
+        f"Options that failed schema validation:\n{_compact(broken)}\n\n"
+        f"Errors:\n{lines}\n"
+        "Return the fixed options only."
+    )
+    return (options, set(errors)), msg
+
+
+def _veto_repair_msg(
+    site_profile: Dict[str, Any],
+    options: List[Dict[str, Any]],
+    vetoes: List[Dict[str, Any]],
+    hw_db: List[Dict[str, Any]],
+    attempt: int = 0,
+) -> Tuple[_Broken, str]:
+    """(broken options, repair prompt) for a graph retry: only the vetoed options and the rules
+    each one broke, plus the hardware table to pick replacements from.
+
+    `attempt` counts the earlier repairs in this run. It goes into the prompt, so a repair that
+    came back unchanged is not answered again from the cache (or by a prompt-seeded model)."""
+    rules: Dict[str, List[str]] = {}
+    for v in vetoes:
+        if v.get("option_id"):
+            rules.setdefault(v["option_id"], []).extend(v.get("violated_rules", []))
+    vetoed = [{"option": opt, "violated_rules": rules[opt["option_id"]]}
+              for opt in options if opt.get("option_id") in rules]
+    again = (f"Repair attempt {attempt + 1}: the earlier fixes were vetoed again, so change the "
+             "placement or hardware instead of repeating them.\n\n") if attempt else ""
+    msg = (
+        f"Vetoed options and the rules they broke:\n{_compact(vetoed)}\n\n"
+        f"{again}"
+        "Hardware that fits this site (id|class|accel|mem|power|cost):\n"
+        f"{hardware_table(site_profile, hw_db)}\n\n"
+        "Return the fixed options only."
+    )
+    return (options, {i for i, opt in enumerate(options) if opt.get("option_id") in rules}), msg
+
+
+def _merge(broken: _Broken, fixed: ArchitectureOptionsResponse) -> ArchitectureOptionsResponse:
+    """Fixed options take the place of the option with their option_id, and fixed ones with new
+    ids go last. A broken option the model did not return stays as it was: a vetoed one is
+    validated (and vetoed) again, a schema-invalid one fails the merge."""
+    options, _ = broken
+    by_id = {opt.option_id: opt.model_dump() for opt in fixed.options}
+    merged: List[Any] = []
+    for opt in options:
+        oid = opt.get("option_id") if isinstance(opt, dict) else None
+        merged.append(by_id.pop(oid) if oid is not None and oid in by_id else opt)
+    merged.extend(by_id.values())
+    return ArchitectureOptionsResponse.model_validate({"options": merged})
 
-    last_error: Optional[str] = None
-    resp: Optional[ArchitectureOptionsResponse] = None
-
-    for _ in range(2):
-        messages = [("system", SYSTEM), ("user", msg)]
-        if last_error:
-            messages.append((
-                "user",
-                "Previous output failed validation. Fix and return only the "
-                f"schema-conformant tool output. Error: {last_error}",
-            ))
-        try:
-            resp = structured_llm.invoke(messages)
-            break
-        except ValidationError as exc:
-            last_error = str(exc)
 
+def _repair_cost(mode: str, msg: str, broken: _Broken) -> Dict[str, Any]:
+    options, bad = broken
+    return {
+        "mode": mode,
+        "prompt_tokens": count_tokens(REPAIR_SYSTEM) + count_tokens(msg),
+        "repaired": len(bad),
+        "kept": len(options) - len(bad),
+    }
+
+
+_Parsed = Tuple[Optional[ArchitectureOptionsResponse], Any, Optional[BaseException]]
+
+
+def _parsed(msg: Any) -> _Parsed:
+    """(response, raw tool-call args, error) from a forced tool call."""
+    calls = getattr(msg, "tool_calls", None) or []
+    if not calls:
+        return None, None, ValueError("no tool call in the response")
+    args = calls[0]["args"]
+    try:
+        return ArchitectureOptionsResponse.model_validate(args), args, None
+    except ValidationError as exc:
+        return None, args, exc
+
+
+def _finish(
+    resp: Optional[ArchitectureOptionsResponse],
+    last_error: Optional[str],
+    msg: str,
+    site_profile: Dict[str, Any],
+    run_id: str,
+    repair: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    extra = {"repair": repair} if repair else {}
     if resp is None:
-        return {"options": [], "error": last_error or "validation_failed"}
+        return {"options": [], "error": last_error or "validation_failed", **extra}
 
-    llm_logger.log(
+    get_llm_logger().log(
         run_id=run_id,
         agent="architect",
         phase="json_list",
@@ -111,4 +259,161 @@ def propose_options(
         meta={"site_id": site_profile.get("site_id")},
     )
 
-    return {"options": [opt.model_dump() for opt in resp.options]}
+    return {"options": [opt.model_dump() for opt in resp.options], **extra}
+
+
+# ---------------------------------------------------------------------------
+# Calls: the steps below are shared by the sync and async entry points. Each one yields the
+# messages to send and gets the parsed reply back; `_run` / `_arun` only do the invoking.
+# ---------------------------------------------------------------------------
+
+_Steps = Generator[List[Any], _Parsed, Dict[str, Any]]
+_Outcome = Tuple[Optional[ArchitectureOptionsResponse], Optional[str], Optional[Dict[str, Any]]]
+
+
+def _run(llm: ChatOpenAI, steps: _Steps) -> Dict[str, Any]:
+    try:
+        messages = next(steps)
+        while True:
+            with llm_slot():
+                reply = forced_tool(llm, ArchitectureOptionsResponse).invoke(messages)
+            messages = steps.send(_parsed(reply))
+    except StopIteration as done:
+        return done.value
+
+
+async def _arun(llm: ChatOpenAI, steps: _Steps) -> Dict[str, Any]:
+    try:
+        messages = next(steps)
+        while True:
+            async with allm_slot():
+                reply = await forced_tool(llm, ArchitectureOptionsResponse).ainvoke(messages)
+            messages = steps.send(_parsed(reply))
+    except StopIteration as done:
+        return done.value
+
+
+def _call_with_repair(system: str, msg: str) -> Generator[List[Any], _Parsed, _Outcome]:
+    """One call; if its options fail the schema, one targeted repair call (or, when the
+    failure is not inside an option, the old full-prompt retry). Returns (resp, error, repair)."""
+    resp, args, err = yield [("system", system), ("user", msg)]
+    if resp is not None:
+        return resp, None, None
+    plan = _schema_repair(args, err) if isinstance(err, ValidationError) else None
+    full_retry = [("system", system), ("user", msg), ("user", _retry_note(str(err)))]
+    if plan is None:
+        resp, _, err2 = yield full_retry
+        repair = {"mode": "full", "prompt_tokens": sum(count_tokens(m[1]) for m in full_retry)}
+        return resp, None if resp else str(err2), repair
+    broken, repair_msg = plan
+    fixed, _, err2 = yield [("system", REPAIR_SYSTEM), ("user", repair_msg)]
+    repair = _repair_cost("schema", repair_msg, broken)
+    if fixed is None:
+        return None, str(err2), repair
+    try:
+        return _merge(broken, fixed), None, repair
+    except ValidationError as exc:
+        return None, str(exc), repair
+
+
+def _cached_call(
+    llm: ChatOpenAI, system: str, msg: str, cache: Optional[CacheView],
+) -> Generator[List[Any], _Parsed, _Outcome]:
+    """`_call_with_repair` behind the response cache (only valid responses are stored)."""
+    key = cache_key(model_name_of(llm), system, [msg])
+    cached = cache.get(key) if cache else None
+    if cached:
+        return ArchitectureOptionsResponse.model_validate_json(cached), None, None
+    resp, last_error, repair = yield from _call_with_repair(system, msg)
+    if resp is not None and cache:
+        cache.set(key, resp.model_dump_json())
+    return resp, last_error, repair
+
+
+def _propose(
+    llm: ChatOpenAI,
+    site_profile: Dict[str, Any],
+    requirements: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    vetoes: Optional[List[Dict[str, Any]]],
+    run_id: str,
+    cache: Optional[CacheView],
+) -> _Steps:
+    msg = _build_msg(site_profile, requirements, hw_db, vetoes)
+    resp, last_error, repair = yield from _cached_call(llm, SYSTEM, msg, cache)
+    return _finish(resp, last_error, msg, site_profile, run_id, repair)
+
+
+def _repair(
+    llm: ChatOpenAI,
+    site_profile: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    vetoes: List[Dict[str, Any]],
+    options: List[Dict[str, Any]],
+    run_id: str,
+    attempt: int,
+    cache: Optional[CacheView],
+) -> _Steps:
+    broken, msg = _veto_repair_msg(site_profile, options, vetoes, hw_db, attempt)
+    fixed, last_error, schema_repair = yield from _cached_call(llm, REPAIR_SYSTEM, msg, cache)
+    repair = _repair_cost("veto", msg, broken)
+    if schema_repair:
+        repair["schema_repair"] = schema_repair
+    resp = None
+    if fixed is not None:
+        try:
+            resp = _merge(broken, fixed)
+        except ValidationError as exc:
+            last_error = str(exc)
+    return _finish(resp, last_error, msg, site_profile, run_id, repair)
+
+
+def propose_options(
+    llm: ChatOpenAI,
+    site_profile: Dict[str, Any],
+    requirements: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    vetoes: Optional[List[Dict[str, Any]]],
+    run_id: str,
+    cache: Optional[CacheView] = None,
+) -> Dict[str, Any]:
+    return _run(llm, _propose(llm, site_profile, requirements, hw_db, vetoes, run_id, cache))
+
+
+async def apropose_options(
+    llm: ChatOpenAI,
+    site_profile: Dict[str, Any],
+    requirements: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    vetoes: Optional[List[Dict[str, Any]]],
+    run_id: str,
+    cache: Optional[CacheView] = None,
+) -> Dict[str, Any]:
+    return await _arun(llm, _propose(llm, site_profile, requirements, hw_db, vetoes, run_id, cache))
+
+
+def repair_options(
+    llm: ChatOpenAI,
+    site_profile: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    vetoes: List[Dict[str, Any]],
+    options: List[Dict[str, Any]],
+    run_id: str,
+    attempt: int = 0,
+    cache: Optional[CacheView] = None,
+) -> Dict[str, Any]:
+    """Graph retry after vetoes: fix only the vetoed options and merge them back."""
+    return _run(llm, _repair(llm, site_profile, hw_db, vetoes, options, run_id, attempt, cache))
+
+
+async def arepair_options(
+    llm: ChatOpenAI,
+    site_profile: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    vetoes: List[Dict[str, Any]],
+    options: List[Dict[str, Any]],
+    run_id: str,
+    attempt: int = 0,
+    cache: Optional[CacheView] = None,
+) -> Dict[str, Any]:
+    return await _arun(llm, _repair(llm, site_profile, hw_db, vetoes, options, run_id, attempt, cache))
@@ -1,35 +1,233 @@
 from __future__ import annotations
-from typing import Any, Dict
-from langchain_openai import ChatOpenAI
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from aiv_de.observability.llm_logger import SafeLLMLogger
-from aiv_de.config import SETTINGS
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-llm_logger = SafeLLMLogger(
-    base_dir=SETTINGS.llm_log_dir,
-    enabled=SETTINGS.log_llm_io,
-)
+from aiv_de.observability.llm_logger import get_llm_logger
+from aiv_de.llm import allm_slot, llm_slot, structured_output
+from aiv_de.llm_cache import CacheView, cache_key, model_name_of
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
 
 SYSTEM = """You are the Requirements Analyst for AIV-DE.
-Extract constraints, categorize safety vs quality, and list assumptions.
-Be concise, structured JSON only.
+The site's standard constraints are already extracted. Given the fields that could not be
+resolved and the facts left over, list missing information and your assumptions. Short items.
 """
 
-def run_requirements(llm: ChatOpenAI, site_profile: Dict[str, Any], run_id: str) -> Dict[str, Any]:
-    msg = f"Site profile:\n{site_profile}\n\nReturn JSON with keys: constraints, missing_info, assumptions."
-    resp = llm.invoke([("system", SYSTEM), ("user", msg)])
-    # Keep skeleton simple: store raw text; parse later if desired
+class SiteConstraints(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    use_case: str
+    safety_critical: bool
+    latency_budget_ms: int
+    power_budget_w: int
+    data_residency_required: bool
+    camera_count: int
+    fps: int
+    resolution_class: str
+    wan_reliability: Optional[str] = None
+    offline_hours_per_week: Optional[float] = None
+    preferred_deployment: Optional[str] = None
+    on_site_ml_staff: Optional[bool] = None
+
+
+class RequirementsNotes(BaseModel):
+    """What the LLM still contributes: gaps and assumptions only."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    missing_info: List[str] = Field(default_factory=list)
+    assumptions: List[str] = Field(default_factory=list)
+
+
+class Requirements(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    constraints: SiteConstraints
+    rules: List[str]
+    missing_info: List[str] = Field(default_factory=list)
+    assumptions: List[str] = Field(default_factory=list)
+
+
+# (section, field) read by the extractor; None = top level. Missing ones become missing_info.
+_KNOWN_FIELDS: Tuple[Tuple[Optional[str], str], ...] = (
+    (None, "use_case"),
+    (None, "latency_budget_ms"),
+    (None, "power_budget_w"),
+    (None, "data_residency_required"),
+    ("line_profile", "camera_count"),
+    ("line_profile", "fps"),
+    ("line_profile", "resolution_class"),
+    ("wan_connectivity", "reliability"),
+    ("wan_connectivity", "offline_hours_per_week"),
+    ("ops_constraints", "preferred_deployment"),
+    ("ops_constraints", "on_site_ml_staff"),
+)
+
+
+def _compact(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
 
-    llm_logger.log(
+def extract_requirements(site_profile: Dict[str, Any]) -> Tuple[SiteConstraints, List[str], List[str]]:
+    """Deterministic part: (constraints, derived rules, missing known fields). Defaults
+    match validate_feasibility's, so both read a sparse profile the same way."""
+    line = site_profile.get("line_profile", {})
+    wan = site_profile.get("wan_connectivity", {})
+    ops = site_profile.get("ops_constraints", {})
+    use_case = site_profile.get("use_case", "quality_inspection")
+    latency = int(site_profile.get("latency_budget_ms", 120))
+    c = SiteConstraints(
+        use_case=use_case,
+        safety_critical=use_case == "safety_line",
+        latency_budget_ms=latency,
+        power_budget_w=int(site_profile.get("power_budget_w", 50)),
+        data_residency_required=bool(site_profile.get("data_residency_required", False)),
+        camera_count=int(line.get("camera_count", 1)),
+        fps=int(line.get("fps", 15)),
+        resolution_class=line.get("resolution_class", "medium"),
+        wan_reliability=wan.get("reliability"),
+        offline_hours_per_week=wan.get("offline_hours_per_week"),
+        preferred_deployment=ops.get("preferred_deployment"),
+        on_site_ml_staff=ops.get("on_site_ml_staff"),
+    )
+
+    rules: List[str] = []
+    if c.safety_critical and latency <= 50:
+        rules.append("inference on edge/on-prem, no WAN dependency (safety line)")
+    if c.data_residency_required:
+        rules.append("no raw data to cloud (data residency)")
+    if c.wan_reliability in ("intermittent", "poor") or (c.offline_hours_per_week or 0) > 0:
+        rules.append(f"operate offline up to {c.offline_hours_per_week or 0} h/week")
+    if c.camera_count >= 10 and c.resolution_class == "high":
+        rules.append(f"{c.camera_count} high-res cameras at {c.fps} fps: ROI/tiling needed")
+    if c.on_site_ml_staff is False:
+        rules.append("remote operation: no on-site ML staff")
+    if line.get("distribution_shift_risk") == "high":
+        rules.append("drift monitoring and retraining path required")
+
+    missing = [
+        f"{section}.{name}" if section else name
+        for section, name in _KNOWN_FIELDS
+        if name not in (site_profile.get(section, {}) if section else site_profile)
+    ]
+    return c, rules, missing
+
+
+def site_remainder(site_profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Profile fields the extractor did not consume (prompts send these next to the constraints)."""
+    known = {(s, n) for s, n in _KNOWN_FIELDS}
+    out: Dict[str, Any] = {}
+    for key, value in site_profile.items():
+        if isinstance(value, dict):
+            rest = {k: v for k, v in value.items() if (key, k) not in known}
+            if rest:
+                out[key] = rest
+        elif (None, key) not in known:
+            out[key] = value
+    return out
+
+
+def flat_facts(obj: Dict[str, Any]) -> str:
+    """`key=value;section(key=value);...` with lists comma-joined: fewer tokens than JSON."""
+    parts = []
+    for key, value in obj.items():
+        if isinstance(value, dict):
+            parts.append(f"{key}({flat_facts(value)})")
+        elif isinstance(value, list):
+            parts.append(f"{key}={','.join(map(str, value))}")
+        else:
+            parts.append(f"{key}={json.dumps(value) if isinstance(value, bool) else value}")
+    return ";".join(p for p in parts if p)
+
+
+def _build_msg(missing: List[str], site_profile: Dict[str, Any]) -> str:
+    # Extracted constraints and rules are settled; the call only sees what the extractor left.
+    return f"Unresolved fields: {','.join(missing) or 'none'}\nOther site facts: {flat_facts(site_remainder(site_profile))}"
+
+
+def notes_prompt(site_profile: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """The messages the notes call sends (the bench measures prompt size with it)."""
+    return [("system", SYSTEM), ("user", _build_msg(extract_requirements(site_profile)[2], site_profile))]
+
+
+def _finish(
+    site_profile: Dict[str, Any],
+    run_id: str,
+    msg: str,
+    extracted: Tuple[SiteConstraints, List[str], List[str]],
+    notes: Optional[RequirementsNotes],
+    error: Optional[str],
+) -> Dict[str, Any]:
+    constraints, rules, missing = extracted
+    notes = notes or RequirementsNotes()
+    req = Requirements(
+        constraints=constraints,
+        rules=rules,
+        missing_info=list(dict.fromkeys(missing + notes.missing_info)),
+        assumptions=notes.assumptions,
+    )
+    get_llm_logger().log(
         run_id=run_id,
         agent="requirements_analyst",
-        phase="extract_constraints",
-        prompt=msg,                     # <-- use msg
-        response=resp.content,
+        phase="notes",
+        prompt=msg,
+        response=notes.model_dump_json(),
         meta={"site_id": site_profile.get("site_id")},
     )
+    out = {"requirements": req.model_dump(exclude_none=True)}
+    if error:
+        out["error"] = error
+    return out
+
+
+def run_requirements(
+    llm: ChatOpenAI,
+    site_profile: Dict[str, Any],
+    run_id: str,
+    cache: Optional[CacheView] = None,
+) -> Dict[str, Any]:
+    extracted = extract_requirements(site_profile)
+    msg = _build_msg(extracted[2], site_profile)
+    key = cache_key(model_name_of(llm), SYSTEM, [msg])
+    cached = cache.get(key) if cache else None
+    notes = RequirementsNotes.model_validate_json(cached) if cached else None
+    error: Optional[str] = None
+    if notes is None:
+        structured_llm = structured_output(llm, RequirementsNotes)
+        try:
+            with llm_slot():
+                notes = structured_llm.invoke([("system", SYSTEM), ("user", msg)])
+        except ValidationError as exc:
+            # The extracted constraints stand on their own; only the notes are lost.
+            error = str(exc)
+        if notes is not None and cache:
+            cache.set(key, notes.model_dump_json())
+    return _finish(site_profile, run_id, msg, extracted, notes, error)
 
-    
-    return {"raw": resp.content}
 
+async def arun_requirements(
+    llm: ChatOpenAI,
+    site_profile: Dict[str, Any],
+    run_id: str,
+    cache: Optional[CacheView] = None,
+) -> Dict[str, Any]:
+    extracted = extract_requirements(site_profile)
+    msg = _build_msg(extracted[2], site_profile)
+    key = cache_key(model_name_of(llm), SYSTEM, [msg])
+    cached = cache.get(key) if cache else None
+    notes = RequirementsNotes.model_validate_json(cached) if cached else None
+    error: Optional[str] = None
+    if notes is None:
+        structured_llm = structured_output(llm, RequirementsNotes)
+        try:
+            async with allm_slot():
+                notes = await structured_llm.ainvoke([("system", SYSTEM), ("user", msg)])
+        except ValidationError as exc:
+            error = str(exc)
+        if notes is not None and cache:
+            cache.set(key, notes.model_dump_json())
+    return _finish(site_profile, run_id, msg, extracted, notes, error)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 from typing import Any, Dict, List
 
+from aiv_de.policy_store import compiled_policies
 from aiv_de.tools.validate_feasibility import validate_feasibility
 from aiv_de.tools.policy_check import policy_check
+from aiv_de.tools.hardware_catalog import as_catalog
 
 def validate_and_veto(
     site_profile: Dict[str, Any],
@@ -11,7 +13,7 @@ def validate_and_veto(
     policy_store: Dict[str, Any]
 ) -> Dict[str, Any]:
     feasibility = validate_feasibility(site_profile, selected_option, hw_db)
-    policy = policy_check(site_profile, selected_option, policy_store)
+    policy = policy_check(site_profile, selected_option, policy_store, compiled_policies(policy_store).injection)
 
     vetoes: List[Dict[str, Any]] = []
     if not feasibility["is_possible"]:
@@ -20,3 +22,48 @@ def validate_and_veto(
         vetoes.append({"reason": "Policy failed", "violated_rules": policy["violated_rules"]})
 
     return {"feasibility": feasibility, "policy": policy, "vetoes": vetoes}
+
+
+_MARGIN_SCORE = {"high": 1.0, "medium": 0.6, "low": 0.2}
+_DETAIL_FIELDS = ("pros", "cons", "risks", "mitigations")
+
+
+def score_option(
+    option: Dict[str, Any],
+    result: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    weights: Dict[str, float],
+) -> float:
+    """Weighted score from scoring_weights.yaml; only criteria observable before the ADR count."""
+    known = as_catalog(hw_db).by_id
+    hw_ids = option.get("hardware", [])
+    grounded = sum(1 for h in hw_ids if h in known) / len(hw_ids) if hw_ids else 0.0
+    detail = sum(1 for f in _DETAIL_FIELDS if option.get(f)) / len(_DETAIL_FIELDS)
+    criteria = {
+        "constraint_satisfaction": _MARGIN_SCORE.get(result["feasibility"]["margin"], 0.0),
+        "adr_completeness": detail,
+        "evidence_grounding": grounded,
+        "veto_efficiency": 0.0 if result["vetoes"] else 1.0,
+        "injection_resistance": 0.0 if "prompt_injection_detected" in result["policy"]["violated_rules"] else 1.0,
+    }
+    return round(sum(float(weights.get(k, 0.0)) * v for k, v in criteria.items()), 4)
+
+
+def validate_options(
+    site_profile: Dict[str, Any],
+    options: List[Dict[str, Any]],
+    hw_db: List[Dict[str, Any]],
+    policy_store: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """Validate every option in one pass; returns results best-first (passing options lead)."""
+    weights = (policy_store.get("scoring_weights") or {}).get("weights", {})
+    hw_db = as_catalog(hw_db)
+    results: List[Dict[str, Any]] = []
+    for option in options:
+        out = validate_and_veto(site_profile, option, hw_db, policy_store)
+        out["option"] = option
+        out["score"] = score_option(option, out, hw_db, weights)
+        results.append(out)
+    # Stable sort: ties keep the architect's order.
+    results.sort(key=lambda r: (bool(r["vetoes"]), -r["score"]))
+    return results
@@ -0,0 +1,400 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.base.id import uuid6
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from aiv_de import legacy_prompts
+from aiv_de.agents import adr_writer, architect, requirements_analyst
+from aiv_de.config import SETTINGS
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.graph import (
+    CHECKPOINT_BACKENDS,
+    CHECKPOINT_MODES,
+    acompile_graph,
+    aclose_graph,
+    adr_validation,
+    amake_checkpointer,
+    make_checkpointer,
+    run_options,
+)
+from aiv_de.llm import USAGE_HANDLER, set_llm
+from aiv_de.llm_cache import set_response_cache
+from aiv_de.observability.metrics import NodeMetrics, add_listener, remove_listener
+from aiv_de.observability.redaction import redact
+from aiv_de.observability.tokens import count_tokens
+from aiv_de.policy_store import compiled_policies
+from aiv_de.run_one import build_inputs, load_reference_data
+from aiv_de.tools.feasibility_sweep import PLACEMENT_TEMPLATES, FeasibilitySweep
+from aiv_de.tools.hardware_catalog import as_catalog
+from aiv_de.tools.policy_check import policy_check
+from aiv_de.tools.validate_feasibility import validate_feasibility
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="bench", description="Offline throughput/latency benchmark of the graph.")
+    p.add_argument("--sites", default="all", help="'all' or a comma-separated list of site IDs")
+    p.add_argument("--iterations", type=int, default=5, help="runs per site")
+    p.add_argument("--workers", type=int, default=SETTINGS.fleet_workers)
+    p.add_argument("--latency", type=float, default=0.05, help="fake LLM latency per call (s)")
+    p.add_argument("--failure-rate", dest="failure_rate", type=float, default=0.0)
+    p.add_argument("--veto-rate", dest="veto_rate", type=float, default=0.2)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--checkpoint", choices=CHECKPOINT_MODES, default=SETTINGS.checkpoint_mode,
+                   help="every super-step, terminal state only, or off")
+    p.add_argument("--backend", choices=CHECKPOINT_BACKENDS, default=SETTINGS.checkpoint_backend)
+    p.add_argument("--checkpoint-writes", dest="checkpoint_writes", type=int, default=0,
+                   help="instead of graph runs, time N raw checkpoint writes per backend")
+    p.add_argument("--redaction-kb", dest="redaction_kb", type=int, default=0,
+                   help="instead of graph runs, time redaction of ~N KB prompts (realistic and adversarial)")
+    p.add_argument("--sweep", default="",
+                   help="time the feasibility sweep on synthetic SITESxSKUS, e.g. 2000x2000")
+    p.add_argument("--requirements", action="store_true",
+                   help="compare free-text vs structured requirements: prompt tokens, and stage time at --latency")
+    p.add_argument("--speculative", action="store_true",
+                   help="draft the architect in parallel with requirements (see graph.build_graph)")
+    p.add_argument("--cache", action="store_true", help="keep the LLM response cache enabled")
+    p.add_argument("--out-dir", dest="out_dir", default="out")
+    return p.parse_args(argv)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def latency_table(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        name: {
+            "n": len(vals),
+            "p50_ms": round(percentile(vals, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(vals, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(vals, 0.99) * 1000, 3),
+        }
+        for name, vals in sorted(samples.items())
+    }
+
+
+async def run_bench(args: argparse.Namespace) -> Dict[str, Any]:
+    set_llm(FakeChatModel(
+        latency_s=args.latency,
+        failure_rate=args.failure_rate,
+        veto_rate=args.veto_rate,
+        seed=args.seed,
+        callbacks=[USAGE_HANDLER],
+    ))
+    if not args.cache:
+        set_response_cache(None)
+
+    sites, hw_db, policies = load_reference_data()
+    if args.sites != "all":
+        wanted = set(args.sites.split(","))
+        sites = [s for s in sites if s["site_id"] in wanted]
+
+    app = await acompile_graph(args.checkpoint, args.backend, args.speculative)
+
+    node_samples: Dict[str, List[float]] = {}
+
+    def collect(m: NodeMetrics) -> None:
+        node_samples.setdefault(m.node, []).append(m.wall_s)
+
+    add_listener(collect)
+    sem = asyncio.Semaphore(max(1, args.workers))
+    run_samples: List[float] = []
+    outcomes: Dict[str, int] = {}
+    # Prompt tokens spent on retries (schema repair + veto repair) vs resending the full prompt.
+    retry_tokens = {"calls": 0, "repair": 0, "full": 0}
+    # ADR call: whole-ADR prompt vs narrative-only prompt, and fact-section tokens rendered in code.
+    adr_tokens = {"calls": 0, "full_prompt": 0, "narrative_prompt": 0, "rendered": 0}
+
+    async def one(site: Dict[str, Any], i: int) -> None:
+        inputs = build_inputs(site, hw_db, policies, f"bench-{site['site_id']}-{i}")
+        config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+        async with sem:
+            t0 = time.perf_counter()
+            out = await app.ainvoke(inputs, config, **run_options(app))
+            run_samples.append(time.perf_counter() - t0)
+        outcome = "hitl" if any(t.get("node") == "hitl" for t in out.get("trace", [])) else "adr"
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        if out.get("adr_narrative") is not None:
+            before, after, rendered = _adr_prompt_tokens(out)
+            adr_tokens["calls"] += 1
+            adr_tokens["full_prompt"] += before
+            adr_tokens["narrative_prompt"] += after
+            adr_tokens["rendered"] += rendered
+        for repair, full in _retry_prompt_tokens(out, hw_db):
+            retry_tokens["calls"] += 1
+            retry_tokens["repair"] += repair
+            retry_tokens["full"] += full
+
+    t0 = time.perf_counter()
+    try:
+        await asyncio.gather(*[one(s, i) for s in sites for i in range(args.iterations)])
+    finally:
+        remove_listener(collect)
+        await aclose_graph(app)
+    wall = time.perf_counter() - t0
+
+    return {
+        "runs": len(run_samples),
+        "wall_s": round(wall, 3),
+        "throughput_runs_per_s": round(len(run_samples) / wall, 3) if wall else 0.0,
+        "outcomes": outcomes,
+        "retry_prompt_tokens": retry_tokens,
+        "adr_tokens": adr_tokens,
+        "run_latency": latency_table({"end_to_end": run_samples})["end_to_end"],
+        "node_latency": latency_table(node_samples),
+        "config": vars(args),
+    }
+
+
+def _sample_checkpoint(site: Dict[str, Any], step: int) -> Dict[str, Any]:
+    cp = empty_checkpoint()
+    cp["id"] = str(uuid6())
+    cp["channel_values"] = {"site_profile": site, "retries": step, "trace": [{"node": "bench", "step": i} for i in range(8)]}
+    cp["channel_versions"] = {"site_profile": 1, "retries": step + 1, "trace": step + 1}
+    return cp
+
+
+async def checkpoint_write_bench(n: int, site: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """writes/s of saver.put()/aput() for: untuned sqlite, tuned sqlite, async sqlite, memory."""
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        def timed_sync(name: str, saver: Any) -> None:
+            config = {"configurable": {"thread_id": name, "checkpoint_ns": ""}}
+            t0 = time.perf_counter()
+            for i in range(n):
+                cp = _sample_checkpoint(site, i)
+                saver.put(config, cp, {"step": i}, cp["channel_versions"])
+            wall = time.perf_counter() - t0
+            results[name] = {"writes": n, "wall_s": round(wall, 3), "writes_per_s": round(n / wall, 1)}
+
+        plain = sqlite3.connect(os.path.join(tmp, "plain.sqlite"), check_same_thread=False)
+        timed_sync("sqlite_default", SqliteSaver(plain))
+        plain.close()
+
+        saver, conn = make_checkpointer("sqlite", os.path.join(tmp, "tuned.sqlite"))
+        timed_sync("sqlite_tuned", saver)
+        conn.close()
+
+        asaver, aconn = await amake_checkpointer("sqlite", os.path.join(tmp, "async.sqlite"))
+        config = {"configurable": {"thread_id": "sqlite_async", "checkpoint_ns": ""}}
+        t0 = time.perf_counter()
+        for i in range(n):
+            cp = _sample_checkpoint(site, i)
+            await asaver.aput(config, cp, {"step": i}, cp["channel_versions"])
+        wall = time.perf_counter() - t0
+        results["sqlite_async"] = {"writes": n, "wall_s": round(wall, 3), "writes_per_s": round(n / wall, 1)}
+        await aconn.close()
+
+        timed_sync("memory", make_checkpointer("memory")[0])
+    return results
+
+
+def redaction_bench(size_kb: int, sites: List[Dict[str, Any]], hw_db: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Seconds and MB/s to redact ~size_kb of each payload; the adversarial ones used to
+    backtrack quadratically under the old per-pattern regexes."""
+    n = size_kb * 1024
+    realistic = f"Site profile:\n{sites}\n\nHardware:\n{hw_db}\ncontact ops@example.com +49 89 1234 5678\n"
+    payloads = {
+        "site_and_hardware_repr": realistic,
+        "long_alnum_token": "a",
+        "long_digit_run": "1",
+        "digits_and_separators": "1 2.3-4 ",
+        "email_like": "a.b@",
+    }
+    results: Dict[str, Dict[str, float]] = {}
+    for name, unit in payloads.items():
+        text = (unit * (n // len(unit) + 1))[:n]
+        t0 = time.perf_counter()
+        redact(text)
+        wall = time.perf_counter() - t0
+        results[name] = {"kb": size_kb, "wall_s": round(wall, 4), "mb_per_s": round(n / 1e6 / wall, 2) if wall else 0.0}
+    return results
+
+
+def sweep_bench(scale: str, sites: List[Dict[str, Any]], hw_db: List[Dict[str, Any]],
+                policies: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Sweep synthetic copies of the real sites/SKUs (varied power budgets and ratings).
+    The per-cell reference (validate_feasibility + policy_check) is timed on a sample and
+    extrapolated to the full grid."""
+    n_sites, n_skus = (int(x) for x in scale.lower().split("x"))
+    big_sites = [
+        {**sites[i % len(sites)], "site_id": f"S{i:06d}", "power_budget_w": 10 + i % 120}
+        for i in range(n_sites)
+    ]
+    big_hw = [
+        {**hw_db[j % len(hw_db)], "hw_id": f"HW{j:06d}", "power_class_w": f"5-{8 + j % 100}"}
+        for j in range(n_skus)
+    ]
+    cells = n_sites * n_skus * len(PLACEMENT_TEMPLATES)
+    results: Dict[str, Dict[str, float]] = {}
+
+    t0 = time.perf_counter()
+    sweep = FeasibilitySweep(big_sites, big_hw, policies)
+    n = sum(1 for _ in sweep.summary())
+    wall = time.perf_counter() - t0
+    results["summary"] = {"rows": n, "wall_s": round(wall, 4), "cells_per_s": round(cells / wall) if wall else 0}
+
+    t0 = time.perf_counter()
+    n = sum(1 for _ in sweep.rows())
+    wall = time.perf_counter() - t0
+    results["rows"] = {"rows": n, "wall_s": round(wall, 4), "cells_per_s": round(cells / wall) if wall else 0}
+
+    catalog = as_catalog(big_hw)
+    injection = compiled_policies(policies).injection
+    sample = big_sites[: max(1, 20_000 // max(1, n_skus * len(PLACEMENT_TEMPLATES)))]
+    t0 = time.perf_counter()
+    n = 0
+    for site in sample:
+        for hw in big_hw:
+            for placement in PLACEMENT_TEMPLATES.values():
+                option = {"hardware": [hw["hw_id"]], "placement": placement}
+                validate_feasibility(site, option, catalog)
+                policy_check(site, option, policies, injection)
+                n += 1
+    wall = (time.perf_counter() - t0) * cells / n
+    results["per_cell_reference"] = {"rows": cells, "wall_s": round(wall, 4), "cells_per_s": round(cells / wall) if wall else 0}
+    return results
+
+
+def _prompt_tokens(messages: List[Tuple[str, str]]) -> int:
+    return sum(count_tokens(text) for _, text in messages)
+
+
+def _adr_prompt_tokens(out: Dict[str, Any]) -> Tuple[int, int, int]:
+    """(whole-ADR prompt, narrative-only prompt, rendered fact sections) for a finished run,
+    from the state the ADR node saw (the trace up to it)."""
+    site, option, requirements = out["site_profile"], out["selected_option"], out.get("requirements") or {}
+    validation = adr_validation(out)
+    trace = [t for t in out.get("trace", []) if t.get("node") != "adr"]
+    before = _prompt_tokens(legacy_prompts.adr_prompt(site, option, validation, trace))
+    after = _prompt_tokens(adr_writer.narrative_prompt(site, option, validation, trace, requirements))
+    facts = adr_writer.render_facts(adr_writer.adr_sections(site, option, validation, trace, requirements))
+    return before, after, count_tokens(facts)
+
+
+def _retry_prompt_tokens(out: Dict[str, Any], hw_db: List[Dict[str, Any]]) -> List[Tuple[int, int]]:
+    """(repair prompt, full-prompt resend) per retry in the trace. The resend is the architect
+    prompt with the vetoes known at that point, which is what a retry used to cost."""
+    site, vetoes, pairs = out["site_profile"], [], []
+    for t in out.get("trace", []):
+        if t.get("node") in ("validate", "reconcile"):
+            vetoes = t.get("vetoes") or []
+        repair = t.get("repair")
+        if not repair:
+            continue
+        requirements = {} if t.get("node") == "draft" else out.get("requirements") or {}
+        full = _prompt_tokens(architect.propose_prompt(site, requirements, hw_db, vetoes))
+        pairs += [(r["prompt_tokens"], full) for r in (repair, repair.get("schema_repair")) if r]
+    return pairs
+
+
+def requirements_bench(sites: List[Dict[str, Any]], hw_db: List[Dict[str, Any]],
+                       latency: float = 0.0) -> Dict[str, Dict[str, float]]:
+    """Tokens of the requirements call and of the architect prompt it feeds, before (whole
+    profile in, free text out) and after (extracted constraints, narrow notes call), and the
+    stage's wall time per site for both paths on the same fake-LLM latency."""
+    llm = FakeChatModel(latency_s=latency)
+    requirements_analyst.run_requirements(llm, sites[0], "bench")  # build the tool binding untimed
+    totals = {"requirements_prompt": [0, 0], "requirements_completion": [0, 0], "architect_prompt": [0, 0]}
+    wall = [0.0, 0.0]
+    for site in sites:
+        t0 = time.perf_counter()
+        llm.invoke(legacy_prompts.requirements_prompt(site))
+        wall[0] += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        out = requirements_analyst.run_requirements(llm, site, "bench")
+        wall[1] += time.perf_counter() - t0
+
+        totals["requirements_prompt"][0] += _prompt_tokens(legacy_prompts.requirements_prompt(site))
+        totals["requirements_prompt"][1] += _prompt_tokens(requirements_analyst.notes_prompt(site))
+        notes = {k: out["requirements"][k] for k in ("missing_info", "assumptions")}
+        totals["requirements_completion"][0] += count_tokens(legacy_prompts.REQUIREMENTS_ANSWER)
+        totals["requirements_completion"][1] += count_tokens(json.dumps(notes))
+        legacy = legacy_prompts.architect_prompt(site, architect.hardware_table(site, hw_db))
+        totals["architect_prompt"][0] += _prompt_tokens(legacy)
+        totals["architect_prompt"][1] += _prompt_tokens(architect.propose_prompt(site, out["requirements"], hw_db, []))
+    totals["stage_ms_per_site"] = [round(1e3 * w / len(sites), 2) for w in wall]
+    return {
+        name: {"before": before, "after": after, "saved_pct": round(100 * (1 - after / before), 1) if before else 0.0}
+        for name, (before, after) in totals.items()
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    if "requirements" in report:
+        print(f"  {'all sites (tokens)':<24}{'before':>10}{'after':>10}{'saved %':>10}")
+        for name, r in report["requirements"].items():
+            print(f"  {name:<24}{r['before']:>10}{r['after']:>10}{r['saved_pct']:>10}")
+        return
+    if "sweep" in report:
+        print(f"  {'engine':<20}{'rows':>12}{'wall s':>12}{'cells/s':>14}")
+        for name, r in report["sweep"].items():
+            print(f"  {name:<20}{r['rows']:>12}{r['wall_s']:>12}{r['cells_per_s']:>14}")
+        return
+    if "redaction" in report:
+        print(f"  {'payload':<26}{'kb':>8}{'wall s':>10}{'MB/s':>10}")
+        for name, r in report["redaction"].items():
+            print(f"  {name:<26}{r['kb']:>8}{r['wall_s']:>10}{r['mb_per_s']:>10}")
+        return
+    if "checkpoint_writes" in report:
+        print(f"  {'backend':<16}{'writes':>8}{'wall s':>10}{'writes/s':>12}")
+        for name, r in report["checkpoint_writes"].items():
+            print(f"  {name:<16}{r['writes']:>8}{r['wall_s']:>10}{r['writes_per_s']:>12}")
+        return
+
+    print(f"{report['runs']} runs in {report['wall_s']}s -> {report['throughput_runs_per_s']} runs/s  {report['outcomes']}")
+    print(f"  {'node':<14}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = {**report["node_latency"], "END_TO_END": report["run_latency"]}
+    for name, r in rows.items():
+        print(f"  {name:<14}{r['n']:>6}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+    adr = report["adr_tokens"]
+    if adr["calls"]:
+        print(f"  adr prompt tokens: {adr['narrative_prompt']} narrative-only vs {adr['full_prompt']} whole-ADR "
+              f"over {adr['calls']} calls; {adr['rendered']} tokens rendered without the LLM")
+    retry = report["retry_prompt_tokens"]
+    if retry["calls"]:
+        print(f"  retry prompt tokens: {retry['repair']} over {retry['calls']} calls "
+              f"(full-prompt retries: {retry['full']})")
+
+
+def main(argv: list[str]) -> None:
+    args = parse_args(argv)
+    if args.requirements:
+        sites, hw_db, _ = load_reference_data()
+        report = {"requirements": requirements_bench(sites, hw_db, args.latency)}
+    elif args.sweep:
+        sites, hw_db, policies = load_reference_data()
+        report = {"sweep": sweep_bench(args.sweep, sites, hw_db, policies)}
+    elif args.redaction_kb:
+        sites, hw_db, _ = load_reference_data()
+        report = {"redaction": redaction_bench(args.redaction_kb, sites, hw_db)}
+    elif args.checkpoint_writes:
+        sites, _, _ = load_reference_data()
+        report = {"checkpoint_writes": asyncio.run(checkpoint_write_bench(args.checkpoint_writes, sites[0]))}
+    else:
+        report = asyncio.run(run_bench(args))
+    print_report(report)
+    os.makedirs(args.out_dir, exist_ok=True)
+    path = os.path.join(args.out_dir, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
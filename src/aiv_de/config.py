@@ -9,12 +9,35 @@ load_dotenv()
 class Settings:
     data_dir: str = os.getenv("AIVDE_DATA_DIR", "./data")
     policy_dir: str = os.getenv("AIVDE_POLICY_DIR", "./policy_store")
+    sites_path: str = os.getenv("AIVDE_SITES_PATH", "")  # .json array or .jsonl; default <data_dir>/sites.json
     sqlite_path: str = os.getenv("AIVDE_SQLITE_PATH", "./aivde_memory.sqlite")
+    checkpoint_mode: str = os.getenv("AIVDE_CHECKPOINT_MODE", "every")  # every | terminal | off
+    checkpoint_backend: str = os.getenv("AIVDE_CHECKPOINT_BACKEND", "sqlite")  # sqlite | memory
+    checkpoint_retention_s: float = float(os.getenv("AIVDE_CHECKPOINT_RETENTION_S", str(7 * 24 * 3600)))
     model_name: str = os.getenv("AIVDE_MODEL_NAME", "gpt-4o-mini")  # safe default
+    llm_provider: str = os.getenv("AIVDE_LLM_PROVIDER", "openai")  # openai | fake
+    fake_llm_latency_s: float = float(os.getenv("AIVDE_FAKE_LLM_LATENCY_S", "0"))
+    fake_llm_failure_rate: float = float(os.getenv("AIVDE_FAKE_LLM_FAILURE_RATE", "0"))
+    fake_llm_veto_rate: float = float(os.getenv("AIVDE_FAKE_LLM_VETO_RATE", "0"))
+    fake_llm_seed: int = int(os.getenv("AIVDE_FAKE_LLM_SEED", "0"))
+    llm_pool_size: int = int(os.getenv("AIVDE_LLM_POOL_SIZE", "20"))
+    llm_max_concurrency: int = int(os.getenv("AIVDE_LLM_MAX_CONCURRENCY", "8"))
     max_retries: int = int(os.getenv("AIVDE_MAX_RETRIES", "2"))
+    llm_cache_enabled: bool = os.getenv("AIVDE_LLM_CACHE", "1") == "1"
+    llm_cache_bypass: bool = os.getenv("AIVDE_LLM_CACHE_BYPASS", "0") == "1"
+    llm_cache_path: str = os.getenv("AIVDE_LLM_CACHE_PATH", "./aivde_llm_cache.sqlite")
+    llm_cache_ttl_s: float = float(os.getenv("AIVDE_LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+    llm_cache_max_entries: int = int(os.getenv("AIVDE_LLM_CACHE_MAX_ENTRIES", "512"))
+    llm_cache_max_bytes: int = int(os.getenv("AIVDE_LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    speculative: bool = os.getenv("AIVDE_SPECULATIVE", "0") == "1"  # draft architect alongside requirements
+    architect_hw_top_k: int = int(os.getenv("AIVDE_ARCHITECT_HW_TOP_K", "5"))
+    fleet_workers: int = int(os.getenv("AIVDE_FLEET_WORKERS", "4"))
     # for debugging llm prompt exchanges - AB
     log_llm_io = os.getenv("AIVDE_LOG_LLM_IO", "0") == "1"
     llm_log_dir = os.getenv("AIVDE_LLM_LOG_DIR", "./out/debug_llm")
+    llm_log_segment_bytes: int = int(os.getenv("AIVDE_LLM_LOG_SEGMENT_BYTES", str(8 * 1024 * 1024)))
+    llm_log_segment_s: float = float(os.getenv("AIVDE_LLM_LOG_SEGMENT_S", "3600"))
+    redact_artifacts: bool = os.getenv("AIVDE_REDACT_ARTIFACTS", "1") == "1"
 
 
 SETTINGS = Settings()
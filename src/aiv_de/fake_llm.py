@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from aiv_de.observability.tokens import count_tokens
+
+_HW_LINE = re.compile(r"^([A-Z0-9_]+)\|(\w+)\|", re.MULTILINE)
+_HW_IDS = re.compile(r"'([A-Z][A-Z0-9_]+)'")
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic offline stand-in for ChatOpenAI.
+
+    Answers the three AIV-DE agents: RequirementsNotes and schema-valid
+    ArchitectureOptionsResponse tool calls (by tool name), and the ADR narrative sections otherwise. Randomness is
+    seeded from the prompt, so the same input always gets the same answer."""
+
+    model_name: str = "fake-aivde"
+    latency_s: float = 0.0
+    failure_rate: float = 0.0
+    veto_rate: float = 0.0
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "aivde-fake"
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[str] = None, **kwargs: Any) -> Any:
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _rng(self, messages: List[BaseMessage]) -> random.Random:
+        digest = hashlib.sha256(
+            (str(self.seed) + "".join(str(m.content) for m in messages)).encode("utf-8")
+        ).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> AIMessage:
+        user = "\n".join(str(m.content) for m in messages[1:])
+        rng = self._rng(messages)
+
+        if tools:
+            name = tools[0]["function"]["name"]
+            args = self._requirements(user) if name == "RequirementsNotes" else self._options(user, rng)
+            msg = AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": "call_fake_0"}])
+        else:
+            msg = AIMessage(content=self._adr(user))
+
+        prompt_tokens = sum(count_tokens(str(m.content)) for m in messages)
+        completion_tokens = count_tokens(msg.content or json.dumps([tc["args"] for tc in msg.tool_calls]))
+        msg.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return msg
+
+    def _requirements(self, user: str) -> Dict[str, Any]:
+        return {
+            "missing_info": ["exact camera model"],
+            "assumptions": ["site network is segmented"],
+        }
+
+    def _options(self, user: str, rng: random.Random) -> Dict[str, Any]:
+        hw = [m.group(1) for m in _HW_LINE.finditer(user)] or _HW_IDS.findall(user) or ["EDGE_GPU_25W_16GB"]
+
+        if rng.random() < self.failure_rate:
+            # Schema-invalid on purpose: exercises the architect's repair loop.
+            return {"options": [{"option_id": "OPT-1", "summary": "bad", "placement": "edge", "pipeline": []}]}
+
+        options = []
+        for i in range(min(3, max(1, len(hw)))):
+            cloud = rng.random() < self.veto_rate
+            options.append({
+                "option_id": f"OPT-{i + 1}",
+                "summary": "Cloud-assisted inference." if cloud else "Edge-local inference with on-prem storage.",
+                "placement": {"inference": "cloud" if cloud else "edge", "storage": "onprem"},
+                "pipeline": ["roi_detection", "local_inference", "telemetry_only"],
+                "hardware": [hw[i]],
+                "pros": ["Low latency"],
+                "cons": ["Ops overhead"],
+                "risks": ["Drift across sites"],
+                "mitigations": ["Canary rollout"],
+            })
+        return {"options": options}
+
+    def _adr(self, user: str) -> str:
+        return (
+            "## Trade-offs\nGenerated offline by the fake LLM.\n\n"
+            "## Risks & mitigations\nSee the selected option.\n\n"
+            "## Rollout plan\nCanary site first.\n\n"
+            "## Consequences\nNone (benchmark output).\n"
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        msg = self._respond(messages, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        msg = self._respond(messages, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        # Used when the caller streams (e.g. stream_mode="messages"): text goes out a line at a
+        # time, tool calls as one chunk; usage rides on the last chunk like OpenAI's stream_usage.
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        msg = self._respond(messages, kwargs.get("tools"))
+        if msg.tool_calls:
+            tc = msg.tool_calls[0]
+            pieces = [AIMessageChunk(content="", tool_call_chunks=[
+                {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": 0}
+            ])]
+        else:
+            pieces = [AIMessageChunk(content=line) for line in msg.content.splitlines(keepends=True)]
+        pieces[-1].usage_metadata = msg.usage_metadata
+        for piece in pieces:
+            chunk = ChatGenerationChunk(message=piece)
+            if run_manager:
+                run_manager.on_llm_new_token(str(piece.content), chunk=chunk)
+            yield chunk
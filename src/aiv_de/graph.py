@@ -1,161 +1,405 @@
-import json
-import os
+import asyncio
 import sqlite3
 import time
-from typing import Any, Dict, List
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
 
-import yaml
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.config import get_stream_writer
 
 from aiv_de.config import SETTINGS
-from aiv_de.types import AIVDEState
-from aiv_de.agents.requirements_analyst import run_requirements
-from aiv_de.agents.architect import propose_options
-from aiv_de.agents.validator_governance import validate_and_veto
-from aiv_de.agents.adr_writer import write_adr
+from aiv_de.policy_store import compiled_policies, load_policy_store  # noqa: F401  (re-exported for callers)
+from aiv_de.types import DEFAULT_OPTION, AIVDEState
+from aiv_de.llm import get_llm
+from aiv_de.llm_cache import CacheView, cache_view, model_name_of
+from aiv_de.observability.metrics import record_cache, timed_node
+from aiv_de.observability.trace import TraceEvent, trace_event
+from aiv_de.refdata import content_ref, hardware_of, policies_of
+from aiv_de.agents.requirements_analyst import arun_requirements, run_requirements
+from aiv_de.agents.architect import apropose_options, arepair_options, propose_options, repair_options
+from aiv_de.agents.validator_governance import validate_options
+from aiv_de.tools.preflight import preflight_check
+from aiv_de.tools.rule_eval import rule_context
+from aiv_de.agents.adr_writer import awrite_adr, render_adr, write_adr
 
 
-def _load_json(path: str) -> Any:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+# ---------------------------------------------------------------------------
+# Graph nodes
+# ---------------------------------------------------------------------------
 
+def _governance(
+    state: AIVDEState,
+    feasibility: Dict[str, Any],
+    policy: Dict[str, Any],
+    vetoes: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """(HITL triggers, risk tier) for an outcome, from the rules compiled in the policy store.
+
+    The retry budget only counts as exhausted when something was vetoed (as for
+    `hitl_required`): a decision that passes on its last retry is not escalated for it."""
+    ctx = rule_context({**state, "feasibility": feasibility, "policy": policy, "vetoes": vetoes})
+    if not vetoes:
+        ctx["retries"] = 0
+    store = compiled_policies(policies_of(state))
+    tiers = store.risk_tiers.evaluate(ctx)
+    return store.hitl_rules.evaluate(ctx), tiers[0]["id"] if tiers else None
+
+
+@timed_node("preflight")
+def n_preflight(state: AIVDEState) -> Dict[str, Any]:
+    """Option-independent checks before any LLM call; a site no option can pass goes to HITL."""
+    site = state["site_profile"]
+    policies = policies_of(state)
+    pf = preflight_check(site, hardware_of(state), policies)
+    if pf["passed"]:
+        trace = trace_event("preflight", "passed", viable_options=pf["viable_options"])
+        return {"preflight": {"passed": True, "viable_options": pf["viable_options"]}, "trace": trace}
+
+    vetoes = [{**v, "reason": f"{v['reason']} (preflight)"} for v in pf["vetoes"]]
+    hitl_triggers, risk_tier = _governance(state, pf["feasibility"], pf["policy"], vetoes)
+    trace = trace_event("preflight", "blocked", viable_options=0, vetoes=vetoes,
+                        checked_option=pf["option"], hitl_triggers=hitl_triggers, risk_tier=risk_tier)
+    return {
+        "preflight": {"passed": False, "viable_options": 0},
+        "selected_option": pf["option"],
+        "feasibility": pf["feasibility"],
+        "policy": pf["policy"],
+        "vetoes": vetoes,
+        "hitl_triggers": hitl_triggers,
+        "risk_tier": risk_tier,
+        "hitl_required": True,
+        "trace": trace,
+    }
 
-def _load_yaml(path: str) -> Any:
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
 
+def _node_cache(state: AIVDEState) -> CacheView:
+    return cache_view(state.get("cache_bypass"))
 
-def load_policy_store(policy_dir: str) -> Dict[str, Any]:
-    return {
-        "eu_ai_act_policy": _load_yaml(os.path.join(policy_dir, "eu_ai_act_policy.yaml")),
-        "data_residency_policy": _load_yaml(os.path.join(policy_dir, "data_residency_policy.yaml")),
-        "hitl_policy": _load_yaml(os.path.join(policy_dir, "hitl_policy.yaml")),
-        "security_policy": _load_yaml(os.path.join(policy_dir, "security_policy.yaml")),
-        "scoring_weights": _load_yaml(os.path.join(policy_dir, "scoring_weights.yaml")),
-    }
 
+def _requirements_update(state: AIVDEState, req: Dict[str, Any], t0: float, cache: CacheView) -> Dict[str, Any]:
+    record_cache(cache.counters())
+    extra = {"notes_error": req["error"]} if req.get("error") else {}
+    trace = trace_event("requirements", "done", duration_s=round(time.time() - t0, 2), cache=cache.counters(), **extra)
+    return {"requirements": req["requirements"], "trace": trace}
 
-# ---------------------------------------------------------------------------
-# Graph nodes
-# ---------------------------------------------------------------------------
 
+@timed_node("requirements")
 def n_requirements(state: AIVDEState) -> Dict[str, Any]:
     t0 = time.time()
-    llm = ChatOpenAI(model=SETTINGS.model_name)
     run_id = state.get("run_id", "no_run_id")
-    req = run_requirements(llm, state["site_profile"], run_id)
-    trace = state.get("trace", [])
-    trace.append({"node": "requirements", "event": "done", "duration_s": round(time.time() - t0, 2)})
-    return {"requirements": req, "trace": trace}
+    cache = _node_cache(state)
+    req = run_requirements(get_llm(), state["site_profile"], run_id, cache=cache)
+    return _requirements_update(state, req, t0, cache)
 
 
-def n_architect(state: AIVDEState) -> Dict[str, Any]:
+@timed_node("requirements")
+async def an_requirements(state: AIVDEState) -> Dict[str, Any]:
     t0 = time.time()
-    llm = ChatOpenAI(model=SETTINGS.model_name)
-    opts = propose_options(
-        llm,
+    run_id = state.get("run_id", "no_run_id")
+    cache = _node_cache(state)
+    req = await arun_requirements(get_llm(), state["site_profile"], run_id, cache=cache)
+    return _requirements_update(state, req, t0, cache)
+
+
+def _architect_args(state: AIVDEState) -> tuple:
+    return (
         state["site_profile"],
         state.get("requirements", {}),
-        state.get("hw_db", []),
+        hardware_of(state),
         state.get("vetoes", []),
         state.get("run_id", "no_run_id"),
     )
 
-    trace = state.get("trace", [])
+
+def _repair_args(state: AIVDEState) -> Optional[tuple]:
+    """Arguments for repair_options when this is a retry after per-option vetoes, else None."""
+    vetoes = state.get("vetoes", [])
+    if not state.get("options") or not any(v.get("option_id") for v in vetoes):
+        return None
+    repairs = sum(1 for t in state.get("trace", []) if t["node"] == "architect" and t["event"] == "repaired")
+    return (state["site_profile"], hardware_of(state), vetoes, state["options"],
+            state.get("run_id", "no_run_id"), repairs)
+
+
+def _architect_update(state: AIVDEState, opts: Dict[str, Any], t0: float, cache: CacheView,
+                      node: str = "architect") -> Dict[str, Any]:
+    record_cache(cache.counters())
+    extra = {"repair": opts["repair"]} if opts.get("repair") else {}
     if opts.get("error"):
-        trace.append({"node": "architect", "event": "validation_failed",
-                       "error": opts.get("error"), "duration_s": round(time.time() - t0, 2)})
+        trace = trace_event(node, "validation_failed",
+                            error=opts.get("error"), duration_s=round(time.time() - t0, 2),
+                            cache=cache.counters(), **extra)
     else:
-        trace.append({"node": "architect", "event": "proposed_structured",
-                       "duration_s": round(time.time() - t0, 2)})
+        event = "repaired" if extra.get("repair", {}).get("mode") == "veto" else "proposed_structured"
+        trace = trace_event(node, event,
+                            duration_s=round(time.time() - t0, 2), cache=cache.counters(), **extra)
     return {"options": opts.get("options", []), "trace": trace}
 
 
-def n_select(state: AIVDEState) -> Dict[str, Any]:
-    options = state.get("options", [])
-    selected = options[0] if options else {
-        "option_id": "DEFAULT_EDGE",
-        "summary": "Default edge-local inference with telemetry-only.",
-        "placement": {"inference": "edge", "storage": "onprem"},
-        "pipeline": ["roi_detection", "tiling_or_downsample", "local_inference", "telemetry_only"],
-        "hardware": ["EDGE_GPU_25W_16GB"],
-        "pros": ["Low latency", "Residency-compliant"],
-        "cons": ["More edge ops overhead"],
-        "risks": ["Drift across sites"],
-        "mitigations": ["Canary rollout + drift monitoring + HITL gates"],
-    }
+@timed_node("architect")
+def n_architect(state: AIVDEState) -> Dict[str, Any]:
+    t0 = time.time()
+    cache = _node_cache(state)
+    repair = _repair_args(state)
+    if repair:
+        opts = repair_options(get_llm(), *repair, cache=cache)
+    else:
+        opts = propose_options(get_llm(), *_architect_args(state), cache=cache)
+    return _architect_update(state, opts, t0, cache)
 
-    hw_db = state.get("hw_db", [])
-    if not selected.get("hardware") and hw_db:
-        selected = {**selected, "hardware": [hw_db[0].get("hw_id")]}
 
-    trace = state.get("trace", [])
-    trace.append({"node": "select", "event": "selected", "option_id": selected.get("option_id")})
-    return {"selected_option": selected, "trace": trace}
+@timed_node("architect")
+async def an_architect(state: AIVDEState) -> Dict[str, Any]:
+    t0 = time.time()
+    cache = _node_cache(state)
+    repair = _repair_args(state)
+    if repair:
+        opts = await arepair_options(get_llm(), *repair, cache=cache)
+    else:
+        opts = await apropose_options(get_llm(), *_architect_args(state), cache=cache)
+    return _architect_update(state, opts, t0, cache)
+
+
+def _fallback(state: AIVDEState) -> Dict[str, Any]:
+    """Trace field for nodes that validate DEFAULT_OPTION because the architect returned nothing."""
+    return {} if state.get("options") else {"fallback": "default_option"}
+
+
+def _candidates(state: AIVDEState) -> List[Dict[str, Any]]:
+    """Proposed options (or the default one, see `_fallback`), each with at least one hw_id."""
+    options = state.get("options") or [dict(DEFAULT_OPTION)]
+    hw_db = hardware_of(state)
+    if hw_db:
+        options = [
+            opt if opt.get("hardware") else {**opt, "hardware": [hw_db[0].get("hw_id")]}
+            for opt in options
+        ]
+    return options
+
 
+def _option_vetoes(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Every validation result's vetoes, tagged with the option they belong to."""
+    vetoes = []
+    for r in results:
+        oid = r["option"].get("option_id")
+        vetoes.extend({**v, "reason": f"{v['reason']} ({oid})", "option_id": oid} for v in r["vetoes"])
+    return vetoes
+
+
+@timed_node("draft")
+def n_draft(state: AIVDEState) -> Dict[str, Any]:
+    """Speculative architect run from the site profile alone, in parallel with requirements."""
+    t0 = time.time()
+    cache = _node_cache(state)
+    opts = propose_options(get_llm(), *_architect_args(state), cache=cache)
+    return _architect_update(state, opts, t0, cache, node="draft")
+
+
+@timed_node("draft")
+async def an_draft(state: AIVDEState) -> Dict[str, Any]:
+    t0 = time.time()
+    cache = _node_cache(state)
+    opts = await apropose_options(get_llm(), *_architect_args(state), cache=cache)
+    return _architect_update(state, opts, t0, cache, node="draft")
 
+
+@timed_node("reconcile")
+def n_reconcile(state: AIVDEState) -> Dict[str, Any]:
+    """Keep the draft unless the validator vetoes every option in it.
+
+    The requirements' constraints are read from the same site profile the validator checks,
+    so a draft with a passing option cannot contradict them. An all-vetoed draft goes to the
+    architect with its per-option vetoes, which repairs only the vetoed options."""
+    results = validate_options(
+        site_profile=state["site_profile"],
+        options=_candidates(state),
+        hw_db=hardware_of(state),
+        policy_store=policies_of(state),
+    )
+    best = results[0]
+    violated = [x for v in best["vetoes"] for x in v["violated_rules"]]
+    event = "redraft" if best["vetoes"] else "accepted"
+    vetoes = _option_vetoes(results) if best["vetoes"] else []
+    trace = trace_event("reconcile", event, option_id=best["option"].get("option_id"), violated_rules=violated,
+                        vetoes=vetoes, **_fallback(state))
+    update = {"speculation": {"accepted": not best["vetoes"], "violated_rules": violated}, "trace": trace}
+    if vetoes:
+        # Per-option vetoes send the architect down the targeted repair path, not a full re-proposal.
+        update.update(options=[r["option"] for r in results], vetoes=vetoes)
+    return update
+
+
+@timed_node("select")
+def n_select(state: AIVDEState) -> Dict[str, Any]:
+    options = _candidates(state)
+    selected = options[0]
+
+    trace = trace_event("select", "selected", option_id=selected.get("option_id"), candidates=len(options),
+                        **_fallback(state))
+    return {"options": options, "selected_option": selected, "trace": trace}
+
+
+@timed_node("validate")
 def n_validate(state: AIVDEState) -> Dict[str, Any]:
     t0 = time.time()
-    out = validate_and_veto(
+    candidates = state.get("options") or [state["selected_option"]]
+    results = validate_options(
         site_profile=state["site_profile"],
-        selected_option=state["selected_option"],
-        hw_db=state["hw_db"],
-        policy_store=state["policies"],
+        options=candidates,
+        hw_db=hardware_of(state),
+        policy_store=policies_of(state),
     )
-    trace = state.get("trace", [])
-    trace.append({"node": "validate", "event": "validated", "vetoes": out["vetoes"],
-                   "duration_s": round(time.time() - t0, 2)})
+    best = results[0]
+
+    # Every option failed: hand the architect the reasons for all of them.
+    vetoes = _option_vetoes(results) if best["vetoes"] else []
+
+    hitl_triggers, risk_tier = _governance(state, best["feasibility"], best["policy"], vetoes)
+
+    trace = trace_event("validate", "validated", vetoes=vetoes,
+                        selected_option_id=best["option"].get("option_id"),
+                        hitl_triggers=hitl_triggers, risk_tier=risk_tier,
+                        evaluated=[{"option_id": r["option"].get("option_id"), "score": r["score"],
+                                    "violated_rules": [x for v in r["vetoes"] for x in v["violated_rules"]]}
+                                   for r in results],
+                        duration_s=round(time.time() - t0, 2))
 
     hitl_required = (
-        len(out["vetoes"]) > 0
+        len(vetoes) > 0
         and state.get("retries", 0) >= state.get("max_retries", SETTINGS.max_retries)
     )
-    return {**out, "trace": trace, "hitl_required": hitl_required}
+    return {
+        "selected_option": best["option"],
+        "feasibility": best["feasibility"],
+        "policy": best["policy"],
+        "vetoes": vetoes,
+        "hitl_triggers": hitl_triggers,
+        "risk_tier": risk_tier,
+        "trace": trace,
+        "hitl_required": hitl_required,
+    }
 
 
+@timed_node("revise")
 def n_revise(state: AIVDEState) -> Dict[str, Any]:
     retries = int(state.get("retries", 0)) + 1
     vetoes = state.get("vetoes", [])
-    trace = state.get("trace", [])
     # Log what veto feedback the architect will receive on the next attempt
-    trace.append({
-        "node": "revise",
-        "event": "retry",
-        "retries": retries,
-        "veto_feedback": [v.get("reason") for v in vetoes],
-    })
-    return {"retries": retries, "trace": trace}
+    trace = trace_event("revise", "retry", retries=retries, veto_feedback=[v.get("reason") for v in vetoes])
+    return {"retries": retries, "trace": trace, "metrics": {"retries": 1}}
 
 
-def n_adr(state: AIVDEState) -> Dict[str, Any]:
-    t0 = time.time()
-    llm = ChatOpenAI(model=SETTINGS.model_name)
-    validation = {
+def adr_validation(state: AIVDEState) -> Dict[str, Any]:
+    """The validation results the ADR records."""
+    return {
         "feasibility": state.get("feasibility"),
         "policy": state.get("policy"),
         "vetoes": state.get("vetoes", []),
+        "hitl_triggers": state.get("hitl_triggers", []),
+        "risk_tier": state.get("risk_tier"),
     }
-    adr_md = write_adr(llm, state["site_profile"], state["selected_option"], validation, state.get("trace", []))
-    trace = state.get("trace", [])
-    trace.append({"node": "adr", "event": "written", "duration_s": round(time.time() - t0, 2)})
-    return {"adr": adr_md, "trace": trace}
 
 
+def _adr_inputs(state: AIVDEState) -> str:
+    """Digest of the decision the ADR's narrative is written from (the trace and requirements
+    only feed the fact sections, which are re-rendered on every run)."""
+    return content_ref("adr", [model_name_of(get_llm()), state["site_profile"],
+                               state["selected_option"], adr_validation(state)])
+
+
+def _adr_args(state: AIVDEState) -> tuple:
+    return (state["site_profile"], state["selected_option"], adr_validation(state), state.get("trace", []))
+
+
+def _adr_reused(state: AIVDEState, digest: str) -> Optional[Dict[str, Any]]:
+    # A revalidated run whose decision did not change keeps its narrative; evidence and
+    # assumptions are rendered again from the current trace and requirements.
+    narrative = state.get("adr_narrative")
+    if narrative is None or state.get("adr_inputs") != digest:
+        return None
+    adr = render_adr(narrative, *_adr_args(state), requirements=state.get("requirements"))
+    return {"adr": adr["adr"], "trace": trace_event("adr", "reused", adr_inputs=digest)}
+
+
+def _adr_text_writer() -> Any:
+    # Streaming callers (stream_mode "custom") get the rendered fact sections before the
+    # narrative tokens; outside a stream the writer is a no-op.
+    writer = get_stream_writer()
+    return lambda text: writer({"adr_text": text})
+
+
+def _adr_update(state: AIVDEState, adr: Dict[str, Any], t0: float, cache: CacheView, digest: str) -> Dict[str, Any]:
+    record_cache(cache.counters())
+    trace = trace_event("adr", "written", duration_s=round(time.time() - t0, 2), cache=cache.counters())
+    return {"adr": adr["adr"], "adr_inputs": digest, "adr_narrative": adr["narrative"], "trace": trace}
+
+
+@timed_node("adr")
+def n_adr(state: AIVDEState) -> Dict[str, Any]:
+    t0 = time.time()
+    digest = _adr_inputs(state)
+    reused = _adr_reused(state, digest)
+    if reused:
+        return reused
+    cache = _node_cache(state)
+    adr = write_adr(get_llm(), *_adr_args(state), cache=cache,
+                    requirements=state.get("requirements"), on_text=_adr_text_writer())
+    return _adr_update(state, adr, t0, cache, digest)
+
+
+@timed_node("adr")
+async def an_adr(state: AIVDEState) -> Dict[str, Any]:
+    t0 = time.time()
+    digest = _adr_inputs(state)
+    reused = _adr_reused(state, digest)
+    if reused:
+        return reused
+    cache = _node_cache(state)
+    adr = await awrite_adr(get_llm(), *_adr_args(state), cache=cache,
+                           requirements=state.get("requirements"), on_text=_adr_text_writer())
+    return _adr_update(state, adr, t0, cache, digest)
+
+
+@timed_node("hitl")
 def n_hitl(state: AIVDEState) -> Dict[str, Any]:
-    trace = state.get("trace", [])
-    trace.append({"node": "hitl", "event": "escalated"})
-    return {
-        "adr": "# ADR-001\n\n**ESCALATED TO HUMAN**: constraints/policies could not be satisfied within retry budget.\n",
-        "trace": trace,
-    }
+    triggers = state.get("hitl_triggers", [])
+    trace = trace_event("hitl", "escalated", hitl_triggers=triggers)
+    lines = "".join(f"- `{t['id']}` -> {t['action']}\n" for t in triggers)
+    if (state.get("preflight") or {}).get("passed") is False:
+        reason = "no option can satisfy the site's constraints/policies (pre-flight check, no design attempted)"
+    else:
+        reason = "constraints/policies could not be satisfied within retry budget"
+    adr = f"# ADR-001\n\n**ESCALATED TO HUMAN**: {reason}.\n"
+    vetoes = state.get("vetoes", [])
+    if vetoes:
+        adr += "\nVetoes:\n\n" + "".join(f"- {v['reason']}: {', '.join(v['violated_rules'])}\n" for v in vetoes)
+    if lines:
+        adr += f"\nTriggered HITL rules:\n\n{lines}"
+    return {"adr": adr, "adr_inputs": None, "adr_narrative": None, "trace": trace}
 
 
 # ---------------------------------------------------------------------------
 # Routing
 # ---------------------------------------------------------------------------
 
+def route_after_preflight(state: AIVDEState) -> str:
+    return "requirements" if (state.get("preflight") or {}).get("passed", True) else "hitl"
+
+
+def route_after_preflight_speculative(state: AIVDEState):
+    if route_after_preflight(state) == "hitl":
+        return "hitl"
+    return ["requirements", "draft"]
+
+
+def route_after_reconcile(state: AIVDEState) -> str:
+    return "select" if (state.get("speculation") or {}).get("accepted") else "architect"
+
+
 def route_after_validate(state: AIVDEState) -> str:
     vetoes = state.get("vetoes", [])
     if not vetoes:
@@ -169,18 +413,39 @@ def route_after_validate(state: AIVDEState) -> str:
 # Build & compile
 # ---------------------------------------------------------------------------
 
-def build_graph() -> StateGraph:
+def build_graph(speculative: Optional[bool] = None) -> StateGraph:
+    """speculative: run requirements and an architect draft in parallel after preflight, then
+    `reconcile` keeps the draft or sends it back to the architect (default SETTINGS.speculative)."""
+    if speculative is None:
+        speculative = SETTINGS.speculative
     g = StateGraph(AIVDEState)
-    g.add_node("requirements", n_requirements)
-    g.add_node("architect", n_architect)
+    # LLM nodes carry both variants: invoke() runs the sync one, ainvoke() the async one.
+    g.add_node("preflight", n_preflight)
+    g.add_node("requirements", RunnableLambda(n_requirements, afunc=an_requirements, name="requirements"))
+    g.add_node("architect", RunnableLambda(n_architect, afunc=an_architect, name="architect"))
     g.add_node("select", n_select)
     g.add_node("validate", n_validate)
     g.add_node("revise", n_revise)
-    g.add_node("adr", n_adr)
+    g.add_node("adr", RunnableLambda(n_adr, afunc=an_adr, name="adr"))
     g.add_node("hitl", n_hitl)
 
-    g.add_edge(START, "requirements")
-    g.add_edge("requirements", "architect")
+    g.add_edge(START, "preflight")
+    if speculative:
+        g.add_node("draft", RunnableLambda(n_draft, afunc=an_draft, name="draft"))
+        g.add_node("reconcile", n_reconcile)
+        g.add_conditional_edges("preflight", route_after_preflight_speculative, ["requirements", "draft", "hitl"])
+        # reconcile waits for both branches.
+        g.add_edge(["requirements", "draft"], "reconcile")
+        g.add_conditional_edges("reconcile", route_after_reconcile, {
+            "select": "select",
+            "architect": "architect",
+        })
+    else:
+        g.add_conditional_edges("preflight", route_after_preflight, {
+            "requirements": "requirements",
+            "hitl": "hitl",
+        })
+        g.add_edge("requirements", "architect")
     g.add_edge("architect", "select")
     g.add_edge("select", "validate")
 
@@ -196,16 +461,138 @@ def build_graph() -> StateGraph:
     return g
 
 
-def compile_graph():
-    graph = build_graph()
-
-    # Keep connection open for the lifetime of the compiled app
-    conn = sqlite3.connect(SETTINGS.sqlite_path, check_same_thread=False)
-    checkpointer = SqliteSaver(conn)
-
-    app = graph.compile(checkpointer=checkpointer)
-
+CHECKPOINT_MODES = ("every", "terminal", "off")
+CHECKPOINT_BACKENDS = ("sqlite", "memory")
+
+# WAL lets readers and the writer overlap across fleet workers; synchronous=NORMAL drops the
+# per-commit fsync (still durable across process crashes, WAL replays on open).
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def _checkpoint_serde() -> JsonPlusSerializer:
+    # TraceEvent is the only custom type in the state; allow it explicitly for msgpack.
+    return JsonPlusSerializer(allowed_msgpack_modules=[TraceEvent])
+
+
+def open_checkpoint_db(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _checkpoint_id_at(ts: float) -> str:
+    """Smallest uuid6 checkpoint_id for unix time `ts`; LangGraph's ids sort by creation time."""
+    ticks = int(ts * 1e7) + 0x01B21DD213814000  # 100 ns intervals since 1582-10-15
+    value = ((ticks >> 28) << 96) | (((ticks >> 12) & 0xFFFF) << 80) | (6 << 76) | ((ticks & 0xFFF) << 64)
+    return str(uuid.UUID(int=value))
+
+
+def prune_checkpoints(conn: sqlite3.Connection, retention_s: float) -> int:
+    """Delete threads whose latest checkpoint is older than `retention_s`; returns threads removed."""
+    cutoff = _checkpoint_id_at(time.time() - retention_s)
+    stale = [r[0] for r in conn.execute(
+        "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(checkpoint_id) < ?", (cutoff,)
+    )]
+    for i in range(0, len(stale), 500):
+        chunk = stale[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        conn.execute(f"DELETE FROM writes WHERE thread_id IN ({marks})", chunk)
+        conn.execute(f"DELETE FROM checkpoints WHERE thread_id IN ({marks})", chunk)
+    conn.commit()
+    return len(stale)
+
+
+def make_checkpointer(backend: Optional[str] = None, path: Optional[str] = None) -> Tuple[Any, Optional[sqlite3.Connection]]:
+    """(saver, connection) for a sync run; old threads are pruned once when the saver opens."""
+    backend = backend or SETTINGS.checkpoint_backend
+    if backend not in CHECKPOINT_BACKENDS:
+        raise ValueError(f"checkpoint backend must be one of {CHECKPOINT_BACKENDS}, got {backend!r}")
+    if backend == "memory":
+        return MemorySaver(serde=_checkpoint_serde()), None
+
+    conn = open_checkpoint_db(path or SETTINGS.sqlite_path)
+    saver = SqliteSaver(conn, serde=_checkpoint_serde())
+    if SETTINGS.checkpoint_retention_s > 0:
+        saver.setup()
+        prune_checkpoints(conn, SETTINGS.checkpoint_retention_s)
+    return saver, conn
+
+
+async def amake_checkpointer(backend: Optional[str] = None, path: Optional[str] = None) -> Tuple[Any, Any]:
+    """Async counterpart for ainvoke()/astream(): AsyncSqliteSaver on an aiosqlite connection."""
+    backend = backend or SETTINGS.checkpoint_backend
+    if backend != "sqlite":
+        return make_checkpointer(backend, path)
+
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    path = path or SETTINGS.sqlite_path
+    if SETTINGS.checkpoint_retention_s > 0:
+        # Prune with a short-lived sync connection; it is a one-off at startup.
+        _, conn = make_checkpointer("sqlite", path)
+        conn.close()
+    aconn = await aiosqlite.connect(path)
+    for pragma in SQLITE_PRAGMAS:
+        await aconn.execute(pragma)
+    return AsyncSqliteSaver(aconn, serde=_checkpoint_serde()), aconn
+
+
+def _compile(checkpoint_mode: Optional[str], checkpointer: Any, conn: Any, speculative: Optional[bool] = None):
+    app = build_graph(speculative).compile(checkpointer=checkpointer)
     # Store references so they don't get garbage-collected
     app._aivde_sqlite_conn = conn
     app._aivde_checkpointer = checkpointer
+    app._aivde_checkpoint_mode = checkpoint_mode
     return app
+
+
+def _checkpoint_mode(checkpoint_mode: Optional[str]) -> str:
+    mode = checkpoint_mode or SETTINGS.checkpoint_mode
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f"checkpoint_mode must be one of {CHECKPOINT_MODES}, got {mode!r}")
+    return mode
+
+
+def compile_graph(checkpoint_mode: Optional[str] = None, backend: Optional[str] = None,
+                  speculative: Optional[bool] = None):
+    """every = checkpoint each super-step (resumable); terminal = one write when the run
+    ends; off = no checkpointer at all (batch runs that never resume).
+    backend = sqlite (SETTINGS.sqlite_path) or memory. speculative: see build_graph()."""
+    mode = _checkpoint_mode(checkpoint_mode)
+    if mode == "off":
+        return _compile(mode, None, None, speculative)
+    # Keep connection open for the lifetime of the compiled app
+    return _compile(mode, *make_checkpointer(backend), speculative)
+
+
+async def acompile_graph(checkpoint_mode: Optional[str] = None, backend: Optional[str] = None,
+                         speculative: Optional[bool] = None):
+    """compile_graph() for ainvoke()/astream(); close with `await aclose_graph(app)`."""
+    mode = _checkpoint_mode(checkpoint_mode)
+    if mode == "off":
+        return _compile(mode, None, None, speculative)
+    return _compile(mode, *(await amake_checkpointer(backend)), speculative)
+
+
+async def aclose_graph(app: Any) -> None:
+    conn = getattr(app, "_aivde_sqlite_conn", None)
+    if conn is None:
+        return
+    result = conn.close()
+    if asyncio.iscoroutine(result):
+        await result
+
+
+def run_options(app: Any) -> Dict[str, Any]:
+    """Extra invoke()/stream() kwargs that apply the app's checkpoint mode."""
+    if getattr(app, "_aivde_checkpoint_mode", "every") == "terminal":
+        return {"durability": "exit"}
+    return {}
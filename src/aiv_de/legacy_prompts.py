@@ -0,0 +1,91 @@
+"""Frozen baseline for `bench`: the agent prompts as they were before the token work.
+
+Everything here is a fixed copy and must not be edited to follow the agents; it only exists
+so `python -m aiv_de.bench` can report before/after prompt sizes. Each builder returns the
+messages the old agent sent, in the same shape as the agents' `*_prompt` hooks. Data that was
+already shared then (the pruned hardware table) is passed in by the caller."""
+
+import json
+from typing import Any, Dict, List, Tuple
+
+from aiv_de.observability.trace import trace_to_dicts
+
+Messages = List[Tuple[str, str]]
+
+# The free-text answer the requirements node handed the architect (the fake model's old
+# reply; a real model's prose is longer, so this understates the saving).
+REQUIREMENTS_ANSWER = json.dumps({
+    "constraints": ["respect latency budget", "respect power budget", "data residency"],
+    "missing_info": ["exact camera model"],
+    "assumptions": ["site network is segmented"],
+})
+
+_REQUIREMENTS_SYSTEM = """You are the Requirements Analyst for AIV-DE.
+Extract constraints, categorize safety vs quality, and list assumptions.
+Be concise, structured JSON only.
+"""
+
+_ARCHITECT_SYSTEM = """You are the Architect for AIV-DE.
+Propose 2-3 viable architectures that respect data residency.
+Return JSON list of options with keys:
+option_id, summary, placement, pipeline, hardware, pros, cons, risks, mitigations.
+No vendor-locked claims. No precise performance numbers.
+"""
+
+_SCHEMA_HINT = """\
+Schema example:
+{
+  "options": [
+    {
+      "option_id": "OPT-1",
+      "summary": "Short summary",
+      "placement": {"inference": "edge", "storage": "onprem"},
+      "pipeline": ["roi_detection", "local_inference"],
+      "hardware": ["EDGE_GPU_25W_16GB"],
+      "pros": ["Low latency"],
+      "cons": ["Higher ops overhead"],
+      "risks": ["Drift across sites"],
+      "mitigations": ["Canary rollout"]
+    }
+  ]
+}
+"""
+
+_ADR_SYSTEM = """You are an ADR writer.
+Write ADR-001 in a professional, audit-ready style.
+Include: Context, Decision (+ alternatives), Assumptions, Trade-offs, Risks & mitigations,
+Governance + HITL triggers, Evidence & tool calls used, Rollout plan, Consequences.
+Return markdown.
+"""
+
+
+def _compact(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def requirements_prompt(site: Dict[str, Any]) -> Messages:
+    """Whole profile in, free-text JSON out."""
+    return [("system", _REQUIREMENTS_SYSTEM),
+            ("user", f"Site profile:\n{site}\n\nReturn JSON with keys: constraints, missing_info, assumptions.")]
+
+
+def architect_prompt(site: Dict[str, Any], hardware_table: str) -> Messages:
+    """Whole profile plus the free-text requirements answer."""
+    return [("system", _ARCHITECT_SYSTEM), ("user", (
+        f"Site:\n{_compact(site)}\n\n"
+        f"Requirements:\n{_compact({'raw': REQUIREMENTS_ANSWER})}\n\n"
+        "Vetoes from last validation (if any):\n[]\n\n"
+        "Hardware that fits this site (id|class|accel|mem|power|cost), choose 1+ per option:\n"
+        f"{hardware_table}\n\n"
+        f"{_SCHEMA_HINT}"
+        "Return structured options only."
+    ))]
+
+
+def adr_prompt(site: Dict[str, Any], option: Dict[str, Any], validation: Dict[str, Any], trace: Any) -> Messages:
+    """The LLM wrote the whole ADR from the raw state and trace."""
+    stable = [{k: v for k, v in t.items() if k not in ("t", "duration_s", "cache")} for t in trace_to_dicts(trace)]
+    return [("system", _ADR_SYSTEM), ("user", (
+        f"Site:\n{site}\n\nSelected option:\n{option}\n\nValidation:\n{validation}\n\n"
+        f"Trace summary:\n{stable}\n\nWrite ADR-001."
+    ))]
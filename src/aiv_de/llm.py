@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import LLMResult
+
+from aiv_de.config import SETTINGS
+from aiv_de.observability.metrics import current_metrics
+
+_build_lock = threading.Lock()
+_llm: Optional[BaseChatModel] = None
+
+# (id(llm), kind, schema) -> (llm, runnable). Holding the client keeps its id from being reused.
+_structured: Dict[Tuple[int, str, Any], Tuple[BaseChatModel, Any]] = {}
+_STRUCTURED_MAX = 32
+
+_sync_slots = threading.BoundedSemaphore(max(1, SETTINGS.llm_max_concurrency))
+_async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class UsageHandler(BaseCallbackHandler):
+    """Attributes LLM latency and token usage to the graph node that made the call."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized: Any, prompts: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        t0 = self._started.pop(run_id, None)
+        m = current_metrics()
+        if m is None or t0 is None:
+            return
+        prompt_tokens = completion_tokens = 0
+        for gens in response.generations:
+            for gen in gens:
+                usage = getattr(getattr(gen, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+        m.add_llm_call(time.perf_counter() - t0, prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        t0 = self._started.pop(run_id, None)
+        m = current_metrics()
+        if m is not None and t0 is not None:
+            m.add_llm_call(time.perf_counter() - t0, 0, 0)
+
+
+USAGE_HANDLER = UsageHandler()
+
+
+def _build_llm() -> BaseChatModel:
+    if SETTINGS.llm_provider == "fake":
+        from aiv_de.fake_llm import FakeChatModel
+
+        return FakeChatModel(
+            latency_s=SETTINGS.fake_llm_latency_s,
+            failure_rate=SETTINGS.fake_llm_failure_rate,
+            veto_rate=SETTINGS.fake_llm_veto_rate,
+            seed=SETTINGS.fake_llm_seed,
+            callbacks=[USAGE_HANDLER],
+        )
+    if SETTINGS.llm_provider != "openai":
+        raise ValueError(f"Unknown AIVDE_LLM_PROVIDER '{SETTINGS.llm_provider}' (expected openai or fake)")
+
+    # Imported here so the fake provider and offline CLI paths never load the OpenAI SDK.
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+    limits = httpx.Limits(
+        max_connections=SETTINGS.llm_pool_size,
+        max_keepalive_connections=SETTINGS.llm_pool_size,
+    )
+    return ChatOpenAI(
+        model=SETTINGS.model_name,
+        http_client=httpx.Client(limits=limits),
+        http_async_client=httpx.AsyncClient(limits=limits),
+        callbacks=[USAGE_HANDLER],
+        stream_usage=True,  # keep usage_metadata when stream_mode="messages" makes calls stream
+    )
+
+
+def get_llm() -> BaseChatModel:
+    """Process-wide chat client; built once so nodes reuse its connection pool."""
+    global _llm
+    if _llm is None:
+        with _build_lock:
+            if _llm is None:
+                _llm = _build_llm()
+    return _llm
+
+
+def set_llm(llm: BaseChatModel) -> None:
+    """Install a specific client (e.g. a configured FakeChatModel for benchmarks)."""
+    global _llm
+    with _build_lock:
+        _llm = llm
+        _structured.clear()
+
+
+def reset_llm() -> None:
+    global _llm
+    with _build_lock:
+        _llm = None
+        _structured.clear()
+
+
+def _bound(llm: BaseChatModel, kind: str, schema: Any, build: Any) -> Any:
+    key = (id(llm), kind, schema)
+    hit = _structured.get(key)
+    if hit is not None and hit[0] is llm:
+        return hit[1]
+    runnable = build()
+    with _build_lock:
+        if len(_structured) >= _STRUCTURED_MAX:
+            _structured.clear()
+        _structured[key] = (llm, runnable)
+    return runnable
+
+
+def structured_output(llm: BaseChatModel, schema: Any) -> Any:
+    """`llm.with_structured_output(schema, method="function_calling")`, built once per client
+    and schema rather than on every agent call."""
+    return _bound(llm, "structured", schema,
+                  lambda: llm.with_structured_output(schema, method="function_calling"))
+
+
+def forced_tool(llm: BaseChatModel, schema: Any) -> Any:
+    """`llm` bound to `schema` as its only tool, which it must call; returns the raw AIMessage.
+    For callers that validate the tool-call args themselves (and repair what fails)."""
+    return _bound(llm, "tool", schema,
+                  lambda: llm.bind_tools([schema], tool_choice=schema.__name__, parallel_tool_calls=False))
+
+
+@contextmanager
+def llm_slot() -> Iterator[None]:
+    with _sync_slots:
+        yield
+
+
+@asynccontextmanager
+async def allm_slot() -> AsyncIterator[None]:
+    # asyncio.Semaphore binds to the loop it first waits on, so keep one per loop.
+    loop = asyncio.get_running_loop()
+    sem = _async_slots.get(loop)
+    if sem is None:
+        sem = _async_slots[loop] = asyncio.Semaphore(max(1, SETTINGS.llm_max_concurrency))
+    async with sem:
+        yield
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+from aiv_de.config import SETTINGS
+
+
+def cache_key(model_name: str, system: str, user_messages: List[str]) -> str:
+    payload = json.dumps([model_name, system, user_messages], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def model_name_of(llm: Any) -> str:
+    return getattr(llm, "model_name", None) or type(llm).__name__
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+
+class MemoryLRUCache:
+    """In-process tier: bounded by entry count, oldest-used evicted first."""
+
+    def __init__(self, max_entries: int, ttl_s: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            created, value = item
+            if self.ttl_s and time.time() - created > self.ttl_s:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SqliteCache:
+    """Persistent tier: bounded by total stored bytes, least recently used evicted first."""
+
+    def __init__(self, path: str, max_bytes: int, ttl_s: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_access REAL NOT NULL, nbytes INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl_s and now - created > self.ttl_s:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        nbytes = len(value.encode("utf-8", errors="ignore"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access, nbytes)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, now, now, nbytes),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        if self.ttl_s:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_s,))
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM llm_cache").fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        doomed: List[str] = []
+        for key, nbytes in self._conn.execute("SELECT key, nbytes FROM llm_cache ORDER BY last_access"):
+            doomed.append(key)
+            freed += nbytes
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", [(k,) for k in doomed])
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class TieredCache:
+    """Memory tier in front of a persistent tier; persistent hits are promoted."""
+
+    def __init__(self, *tiers: CacheBackend) -> None:
+        self.tiers = tiers
+
+    def get(self, key: str) -> Optional[str]:
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for upper in self.tiers[:i]:
+                    upper.set(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+
+class CacheView:
+    """Per-node handle on the shared cache: carries the bypass flag and hit/miss counters."""
+
+    def __init__(self, backend: Optional[CacheBackend], bypass: bool = False) -> None:
+        self.backend = backend
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        if self.backend is None:
+            return None
+        value = None if self.bypass else self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    def counters(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "bypass": self.bypass}
+
+
+_cache_lock = threading.Lock()
+_cache: Optional[CacheBackend] = None
+_cache_built = False
+
+
+def get_response_cache() -> Optional[CacheBackend]:
+    global _cache, _cache_built
+    if not _cache_built:
+        with _cache_lock:
+            if not _cache_built:
+                if SETTINGS.llm_cache_enabled:
+                    _cache = TieredCache(
+                        MemoryLRUCache(SETTINGS.llm_cache_max_entries, SETTINGS.llm_cache_ttl_s),
+                        SqliteCache(SETTINGS.llm_cache_path, SETTINGS.llm_cache_max_bytes, SETTINGS.llm_cache_ttl_s),
+                    )
+                _cache_built = True
+    return _cache
+
+
+def set_response_cache(backend: Optional[CacheBackend]) -> None:
+    """Swap in a different backend (or None to disable caching)."""
+    global _cache, _cache_built
+    with _cache_lock:
+        _cache = backend
+        _cache_built = True
+
+
+def cache_view(bypass: Optional[bool] = None) -> CacheView:
+    return CacheView(get_response_cache(), SETTINGS.llm_cache_bypass if bypass is None else bypass)
@@ -1,39 +1,152 @@
+import atexit
 import hashlib
 import json
 import os
-import re
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-REDACTION_PATTERNS = [
-    (re.compile(r"sk-[A-Za-z0-9]{20,}"), "[REDACTED_API_KEY]"),
-    (re.compile(r"(?i)openai[_-]?api[_-]?key\s*[:=]\s*\S+"), "OPENAI_API_KEY=[REDACTED]"),
-    (re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"), "[REDACTED_EMAIL]"),
-    (re.compile(r"\+?\d[\d\s().-]{8,}\d"), "[REDACTED_PHONE]"),
-    (re.compile(r"[A-Za-z]:\\(?:[^\\\r\n]+\\)*[^\\\r\n]*"), "[REDACTED_PATH]"),
-]
+from aiv_de.observability.redaction import redact as _redact
 
+# Redact a little past the preview cut so a secret straddling it is still matched whole.
+_REDACT_MARGIN = 256
 
-def _redact(text: str) -> str:
-    out = text
-    for pat, repl in REDACTION_PATTERNS:
-        out = pat.sub(repl, out)
-    return out
+
+def _preview(text: str, max_chars: int) -> str:
+    return _redact(text[: max_chars + _REDACT_MARGIN])[:max_chars]
 
 
 def _sha256(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
 
 
+_STOP = object()
+
+
+class _SegmentWriter:
+    """Background thread owning one open segment file per log directory.
+
+    Events are queued as dicts; the thread redacts, serializes and writes them in batches,
+    rotating to a new `llm-<time>-<pid>-<seq>.jsonl` segment by size or age."""
+
+    def __init__(self, base_dir: str, max_chars: int, segment_bytes: int, segment_s: float,
+                 batch_size: int = 256) -> None:
+        self.base_dir = base_dir
+        self.max_chars = max_chars
+        self.segment_bytes = segment_bytes
+        self.segment_s = segment_s
+        self.batch_size = batch_size
+        self.queue: "queue.Queue[Any]" = queue.Queue()
+        self.segments: List[str] = []
+        self._fh = None
+        self._opened_at = 0.0
+        self._seq = 0
+        os.makedirs(base_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="aivde-llm-log", daemon=True)
+        self._thread.start()
+
+    def _rotate(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+        self._seq += 1
+        name = f"llm-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._seq:04d}.jsonl"
+        path = os.path.join(self.base_dir, name)
+        self._fh = open(path, "a", encoding="utf-8")
+        self._opened_at = time.monotonic()
+        self.segments.append(path)
+
+    def _line(self, event: Dict[str, Any]) -> str:
+        event["prompt_preview"] = _preview(event["prompt_preview"], self.max_chars)
+        event["response_preview"] = _preview(event["response_preview"], self.max_chars)
+        return json.dumps(event, ensure_ascii=False) + "\n"
+
+    def _write(self, events: List[Dict[str, Any]]) -> None:
+        if (
+            self._fh is None
+            or self._fh.tell() >= self.segment_bytes
+            or time.monotonic() - self._opened_at >= self.segment_s
+        ):
+            self._rotate()
+        self._fh.write("".join(self._line(e) for e in events))
+        self._fh.flush()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            events = [e for e in batch if e is not _STOP]
+            try:
+                if events:
+                    self._write(events)
+            except OSError:
+                pass  # debug logging must never take a run down
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if len(events) != len(batch):
+                if self._fh is not None:
+                    self._fh.close()
+                    self._fh = None
+                return
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join()
+
+
+_writers_lock = threading.Lock()
+_writers: Dict[str, _SegmentWriter] = {}
+
+
+def _writer_for(base_dir: str, max_chars: int, segment_bytes: int, segment_s: float) -> _SegmentWriter:
+    key = os.path.abspath(base_dir)
+    with _writers_lock:
+        w = _writers.get(key)
+        if w is None or not w._thread.is_alive():
+            w = _writers[key] = _SegmentWriter(base_dir, max_chars, segment_bytes, segment_s)
+        return w
+
+
+@atexit.register
+def close_all() -> None:
+    """Drain every writer and close its segment (runs at interpreter exit)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for w in writers:
+        w.close()
+
+
 class SafeLLMLogger:
     """Opt-in JSONL logger for LLM prompts/responses.
-    Stores redacted previews + hashes, not full secrets."""
+    Stores redacted previews + hashes, not full secrets.
+
+    log() only hashes and slices on the caller's thread; redaction, serialization and file I/O
+    happen on a background writer shared by every logger with the same base_dir."""
 
-    def __init__(self, base_dir: str, enabled: bool = False, max_chars: int = 2000) -> None:
+    def __init__(
+        self,
+        base_dir: str,
+        enabled: bool = False,
+        max_chars: int = 2000,
+        segment_bytes: int = 8 * 1024 * 1024,
+        segment_s: float = 3600.0,
+    ) -> None:
         self.enabled = enabled
         self.base_dir = base_dir
         self.max_chars = max_chars
-        os.makedirs(self.base_dir, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.segment_s = segment_s
+
+    def _writer(self) -> _SegmentWriter:
+        return _writer_for(self.base_dir, self.max_chars, self.segment_bytes, self.segment_s)
 
     def log(
         self,
@@ -48,21 +161,39 @@ class SafeLLMLogger:
         if not self.enabled:
             return
 
-        prompt_red = _redact(prompt)
-        resp_red = _redact(response)
-
-        event = {
+        cut = self.max_chars + _REDACT_MARGIN
+        self._writer().queue.put({
             "ts": datetime.utcnow().isoformat(timespec="seconds") + "Z",
             "run_id": run_id,
             "agent": agent,
             "phase": phase,
             "prompt_sha256": _sha256(prompt),
             "response_sha256": _sha256(response),
-            "prompt_preview": prompt_red[: self.max_chars],
-            "response_preview": resp_red[: self.max_chars],
+            # Raw slices; the writer redacts them before anything touches disk.
+            "prompt_preview": prompt[:cut],
+            "response_preview": response[:cut],
             "meta": meta or {},
-        }
+        })
+
+    def flush(self) -> None:
+        """Block until every queued event is on disk."""
+        if self.enabled:
+            self._writer().queue.join()
+
+
+_shared: Optional[SafeLLMLogger] = None
+
+
+def get_llm_logger() -> SafeLLMLogger:
+    """Process-wide logger configured from SETTINGS, built on first use (nothing at import)."""
+    global _shared
+    if _shared is None:
+        from aiv_de.config import SETTINGS
 
-        path = os.path.join(self.base_dir, f"{run_id}.llm.jsonl")
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        _shared = SafeLLMLogger(
+            base_dir=SETTINGS.llm_log_dir,
+            enabled=SETTINGS.log_llm_io,
+            segment_bytes=SETTINGS.llm_log_segment_bytes,
+            segment_s=SETTINGS.llm_log_segment_s,
+        )
+    return _shared
@@ -0,0 +1,174 @@
+import asyncio
+import functools
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+_FIELDS = (
+    "calls",
+    "wall_s",
+    "llm_s",
+    "local_s",
+    "llm_calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "cache_hits",
+    "cache_misses",
+)
+
+
+class NodeMetrics:
+    __slots__ = _FIELDS + ("node",)
+
+    def __init__(self, node: str) -> None:
+        self.node = node
+        for f in _FIELDS:
+            setattr(self, f, 0)
+        self.calls = 1
+
+    def add_llm_call(self, seconds: float, prompt_tokens: int, completion_tokens: int) -> None:
+        self.llm_calls += 1
+        self.llm_s += seconds
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+    def as_dict(self) -> Dict[str, Any]:
+        out = {f: getattr(self, f) for f in _FIELDS}
+        for f in ("wall_s", "llm_s", "local_s"):
+            out[f] = round(out[f], 6)
+        return out
+
+
+_current: ContextVar[Optional[NodeMetrics]] = ContextVar("aivde_node_metrics", default=None)
+_listeners: List[Callable[[NodeMetrics], None]] = []
+
+
+def add_listener(fn: Callable[[NodeMetrics], None]) -> None:
+    """Called with every finished NodeMetrics (e.g. to collect per-call latency samples)."""
+    _listeners.append(fn)
+
+
+def remove_listener(fn: Callable[[NodeMetrics], None]) -> None:
+    if fn in _listeners:
+        _listeners.remove(fn)
+
+
+def current_metrics() -> Optional[NodeMetrics]:
+    return _current.get()
+
+
+def record_cache(counters: Dict[str, Any]) -> None:
+    m = _current.get()
+    if m is not None:
+        m.cache_hits += counters.get("hits", 0)
+        m.cache_misses += counters.get("misses", 0)
+
+
+@contextmanager
+def measure(node: str) -> Iterator[NodeMetrics]:
+    m = NodeMetrics(node)
+    token = _current.set(m)
+    t0 = time.perf_counter()
+    try:
+        yield m
+    finally:
+        m.wall_s = time.perf_counter() - t0
+        m.local_s = max(0.0, m.wall_s - m.llm_s)
+        _current.reset(token)
+        for fn in _listeners:
+            fn(m)
+
+
+def timed_node(name: str) -> Callable[[Callable], Callable]:
+    """Wrap a graph node so its update carries {"metrics": {"nodes": {name: ...}}}."""
+
+    def deco(fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+                with measure(name) as m:
+                    out = await fn(state)
+                return {**out, "metrics": merge_metrics(out.get("metrics"), {"nodes": {name: m.as_dict()}})}
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+            with measure(name) as m:
+                out = fn(state)
+            return {**out, "metrics": merge_metrics(out.get("metrics"), {"nodes": {name: m.as_dict()}})}
+        return wrapper
+
+    return deco
+
+
+def merge_metrics(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """State reducer: per-node counters add up across calls; other numeric keys add up too."""
+    out: Dict[str, Any] = {**(left or {})}
+    nodes = {k: dict(v) for k, v in (out.get("nodes") or {}).items()}
+    for key, value in (right or {}).items():
+        if key == "nodes":
+            for node, counters in value.items():
+                acc = nodes.setdefault(node, {f: 0 for f in _FIELDS})
+                for f in _FIELDS:
+                    acc[f] = acc.get(f, 0) + counters.get(f, 0)
+                    if isinstance(acc[f], float):
+                        acc[f] = round(acc[f], 6)
+        elif isinstance(value, (int, float)) and isinstance(out.get(key), (int, float)):
+            out[key] = out[key] + value
+        else:
+            out[key] = value
+    out["nodes"] = nodes
+    return out
+
+
+def run_totals(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    totals = {f: 0 for f in _FIELDS}
+    for counters in (metrics.get("nodes") or {}).values():
+        for f in _FIELDS:
+            totals[f] += counters.get(f, 0)
+    totals["retries"] = metrics.get("retries", 0)
+    return totals
+
+
+def metrics_to_json(metrics: Dict[str, Any], **labels: Any) -> str:
+    return json.dumps({**labels, **metrics, "totals": run_totals(metrics)}, indent=2)
+
+
+_PROM = {
+    "calls": ("aivde_node_calls_total", "counter", "Node executions"),
+    "wall_s": ("aivde_node_wall_seconds_total", "counter", "Wall time spent in the node"),
+    "llm_s": ("aivde_node_llm_seconds_total", "counter", "Time spent waiting on LLM calls"),
+    "local_s": ("aivde_node_local_seconds_total", "counter", "Wall time minus LLM time"),
+    "llm_calls": ("aivde_node_llm_calls_total", "counter", "LLM calls made by the node"),
+    "prompt_tokens": ("aivde_node_prompt_tokens_total", "counter", "Prompt tokens"),
+    "completion_tokens": ("aivde_node_completion_tokens_total", "counter", "Completion tokens"),
+    "cache_hits": ("aivde_node_cache_hits_total", "counter", "LLM response cache hits"),
+    "cache_misses": ("aivde_node_cache_misses_total", "counter", "LLM response cache misses"),
+}
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    def esc(v: Any) -> str:
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{k}="{esc(v)}"' for k, v in labels.items())
+
+
+def metrics_to_prometheus(runs: Iterable[Dict[str, Any]]) -> str:
+    """Text exposition format; each item is {"labels": {...}, "metrics": <state metrics>}."""
+    runs = list(runs)
+    lines = []
+    for field, (name, kind, help_text) in _PROM.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for run in runs:
+            for node, counters in sorted((run.get("metrics") or {}).get("nodes", {}).items()):
+                labels = _labels({**run.get("labels", {}), "node": node})
+                lines.append(f"{name}{{{labels}}} {counters.get(field, 0)}")
+    lines.append("# HELP aivde_run_retries_total Architect retries in the run")
+    lines.append("# TYPE aivde_run_retries_total counter")
+    for run in runs:
+        labels = _labels(run.get("labels", {}))
+        lines.append(f"aivde_run_retries_total{{{labels}}} {(run.get('metrics') or {}).get('retries', 0)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,92 @@
+import re
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+Replacement = Union[str, Callable[[str], Optional[str]]]
+
+
+class RedactionRule:
+    """`pattern` must not contain named groups or global inline flags (use `(?i:...)`)."""
+
+    __slots__ = ("name", "pattern", "replacement")
+
+    def __init__(self, name: str, pattern: str, replacement: Replacement) -> None:
+        self.name = name
+        self.pattern = pattern
+        self.replacement = replacement
+
+
+_DATE = re.compile(r"\d{4}([-./])\d{1,2}\1\d{1,2}|\d{1,2}([-./])\d{1,2}\2\d{4}")
+_VERSION = re.compile(r"\d{1,3}(?:\.\d{1,3}){2,}")
+_DECIMAL = re.compile(r"[1-9]\d*\.\d+")
+_RANGE = re.compile(r"([1-9]\d*) ?- ?([1-9]\d*)")
+
+
+def _phone(match: str) -> Optional[str]:
+    # Any run of 9+ digits with optional separators, however long; only dates, versions,
+    # decimals and equal-width ascending ranges are kept explicitly.
+    if sum(c.isdigit() for c in match) < 9:
+        return None
+    if match[0] not in "+(":
+        if _DATE.fullmatch(match) or _VERSION.fullmatch(match) or _DECIMAL.fullmatch(match):
+            return None
+        r = _RANGE.fullmatch(match)
+        if r and len(r[1]) == len(r[2]) and int(r[1]) < int(r[2]):
+            return None
+    return "[REDACTED_PHONE]"
+
+
+DEFAULT_RULES = (
+    RedactionRule("api_key", r"sk-[A-Za-z0-9]{20,}", "[REDACTED_API_KEY]"),
+    RedactionRule("openai_key", r"(?i:openai[_-]?api[_-]?key)\s*[:=]\s*\S+", "OPENAI_API_KEY=[REDACTED]"),
+    # Anchored to the start of a token, so long alphanumeric runs are not rescanned per offset.
+    RedactionRule("email", r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
+                  "[REDACTED_EMAIL]"),
+    # Bounded groups plus a possessive tail for longer digit runs (never backtracked into):
+    # linear on long numeric payloads. The lookahead drops runs with fewer than 9 digits
+    # before any group is tried.
+    RedactionRule("phone", r"(?<![\w+])(?=[+(]?(?:[ .()-]{0,2}\d){9})(?:\+\d{1,3}[ .-]?)?(?:\(\d{1,4}\)[ .-]?)?\d{2,5}(?:[ .-]?\d{2,5}){1,4}(?:[ .-]?\d)*+(?!\w)",
+                  _phone),
+    RedactionRule("path", r"[A-Za-z]:\\(?:[^\\\r\n]+\\)*[^\\\r\n]*", "[REDACTED_PATH]"),
+)
+
+
+class Redactor:
+    """All rules compiled into one named-group alternation: one scan, one dispatch per match.
+
+    At a given offset the first listed rule that matches wins. A callable replacement may
+    return None to keep the matched text."""
+
+    def __init__(self, rules: Iterable[RedactionRule] = DEFAULT_RULES) -> None:
+        self.rules: Dict[str, RedactionRule] = {r.name: r for r in rules}
+        self.regex = re.compile("|".join(f"(?P<{r.name}>{r.pattern})" for r in self.rules.values()))
+
+    def _dispatch(self, m: "re.Match[str]") -> str:
+        repl = self.rules[m.lastgroup].replacement
+        if callable(repl):
+            out = repl(m.group())
+            return m.group() if out is None else out
+        return repl
+
+    def redact(self, text: str) -> str:
+        return self.regex.sub(self._dispatch, text)
+
+    def redact_obj(self, obj: Any) -> Any:
+        """Redact every string inside nested dicts/lists (e.g. a trace before it is written)."""
+        if isinstance(obj, str):
+            return self.redact(obj)
+        if isinstance(obj, dict):
+            return {k: self.redact_obj(v) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [self.redact_obj(v) for v in obj]
+        return obj
+
+
+DEFAULT_REDACTOR = Redactor()
+
+
+def redact(text: str) -> str:
+    return DEFAULT_REDACTOR.redact(text)
+
+
+def redact_obj(obj: Any) -> Any:
+    return DEFAULT_REDACTOR.redact_obj(obj)
@@ -0,0 +1,20 @@
+from typing import Any, Optional
+
+_encoder: Optional[Any] = None
+_encoder_failed = False
+
+
+def count_tokens(text: str) -> int:
+    """cl100k token count when tiktoken and its encoding are available, else a ~4 chars/token estimate."""
+    global _encoder, _encoder_failed
+    if _encoder is None and not _encoder_failed:
+        try:
+            import tiktoken
+
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # Missing package or no network to fetch the BPE file: fall back for the rest of the process.
+            _encoder_failed = True
+    if _encoder is not None:
+        return len(_encoder.encode(text))
+    return (len(text) + 3) // 4
@@ -0,0 +1,46 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+
+@dataclass(slots=True)
+class TraceEvent:
+    """One trace entry. `t` is time.monotonic() at emission (ordering/latency within a run,
+    not wall-clock time); node-specific fields live in `data`."""
+
+    node: str
+    event: str
+    t: float
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    # Dict-style reads, so consumers can treat events and plain trace dicts alike.
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in ("node", "event", "t"):
+            return getattr(self, key)
+        return self.data.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in ("node", "event", "t"):
+            return getattr(self, key)
+        return self.data[key]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"node": self.node, "event": self.event, "t": self.t, **self.data}
+
+
+def trace_event(node: str, event: str, **data: Any) -> List[TraceEvent]:
+    """A node's trace update: a one-element list for the `append_trace` reducer."""
+    return [TraceEvent(node, event, round(time.monotonic(), 6), data)]
+
+
+def append_trace(left: Optional[List[Any]], right: Optional[List[Any]]) -> List[Any]:
+    """State reducer: nodes return only their new events; they are appended in order.
+
+    This keeps each node *update* (and its pending write) one event long. A checkpoint still
+    stores the accumulated channel, so what SqliteSaver persists per step grows with the
+    trace; `checkpoint_mode="terminal"` is what bounds that to one write per run."""
+    return [*(left or ()), *(right or ())]
+
+
+def trace_to_dicts(trace: Iterable[Any]) -> List[Dict[str, Any]]:
+    return [t.as_dict() if isinstance(t, TraceEvent) else t for t in trace or ()]
@@ -0,0 +1,81 @@
+import os
+import threading
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import yaml
+
+from aiv_de.tools.policy_check import PatternMatcher
+from aiv_de.tools.rule_eval import compile_hitl_rules, compile_risk_tiers
+
+POLICY_FILES = {
+    "eu_ai_act_policy": "eu_ai_act_policy.yaml",
+    "data_residency_policy": "data_residency_policy.yaml",
+    "hitl_policy": "hitl_policy.yaml",
+    "security_policy": "security_policy.yaml",
+    "scoring_weights": "scoring_weights.yaml",
+}
+
+
+def _load_yaml(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def load_policy_store(policy_dir: str) -> Dict[str, Any]:
+    return {key: _load_yaml(os.path.join(policy_dir, name)) for key, name in POLICY_FILES.items()}
+
+
+def policy_signature(policy_dir: str) -> Tuple[Tuple[str, int, int], ...]:
+    """Cheap change detector: (file, mtime_ns, size) for every policy file."""
+    sig = []
+    for name in POLICY_FILES.values():
+        st = os.stat(os.path.join(policy_dir, name))
+        sig.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+class CompiledPolicyStore:
+    """Parsed policy store plus matchers and rule predicates compiled once per policy version."""
+
+    def __init__(self, policies: Mapping[str, Any], signature: Tuple = ()) -> None:
+        self.policies = policies
+        self.signature = signature
+        patterns = (
+            (policies.get("security_policy") or {})
+            .get("prompt_injection", {})
+            .get("patterns", [])
+        )
+        self.injection = PatternMatcher(patterns)
+        self.hitl_rules = compile_hitl_rules(policies.get("hitl_policy") or {})
+        self.risk_tiers = compile_risk_tiers(policies.get("eu_ai_act_policy") or {})
+
+
+_lock = threading.Lock()
+_stores: Dict[str, CompiledPolicyStore] = {}
+_by_policies: Dict[int, Tuple[Mapping[str, Any], CompiledPolicyStore]] = {}  # id(policies) -> (policies, store)
+
+
+def get_compiled_policy_store(policy_dir: str) -> CompiledPolicyStore:
+    """Process-wide store per directory, rebuilt only when a policy file changes."""
+    key = os.path.abspath(policy_dir)
+    sig = policy_signature(policy_dir)
+    with _lock:
+        store: Optional[CompiledPolicyStore] = _stores.get(key)
+        if store is None or store.signature != sig:
+            if store is not None:
+                _by_policies.pop(id(store.policies), None)
+            store = _stores[key] = CompiledPolicyStore(load_policy_store(policy_dir), sig)
+            _by_policies[id(store.policies)] = (store.policies, store)
+        return store
+
+
+def compiled_policies(policies: Mapping[str, Any]) -> CompiledPolicyStore:
+    """The compiled store behind a parsed policy dict; inline dicts are compiled once each."""
+    with _lock:
+        hit = _by_policies.get(id(policies))
+        if hit is not None and hit[0] is policies:
+            return hit[1]
+    store = CompiledPolicyStore(policies)
+    with _lock:
+        _by_policies.setdefault(id(policies), (policies, store))
+    return store
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Mapping, Tuple
+
+from aiv_de.tools.hardware_catalog import HardwareCatalog, as_catalog
+
+# Static reference data (hardware catalog, policy store) lives here, once per process.
+# Graph state carries only a content-hash reference, so checkpoints never re-serialize it.
+
+_lock = threading.Lock()
+_store: Dict[str, Any] = {}
+_refs: Dict[int, Tuple[Any, str]] = {}  # id(obj) -> (obj, ref); holding obj keeps the id valid
+
+
+def content_ref(kind: str, obj: Any) -> str:
+    """'<kind>:<sha256 prefix>' of the canonical JSON form, e.g. 'hw:3f2a9c0d1e4b5a67'."""
+    blob = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{kind}:{hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]}"
+
+
+def register(kind: str, obj: Any) -> str:
+    """Store `obj` read-only under its content hash; hashing happens once per object."""
+    with _lock:
+        hit = _refs.get(id(obj))
+        if hit is not None and hit[0] is obj:
+            return hit[1]
+    ref = content_ref(kind, obj)
+    with _lock:
+        # Same content registered twice keeps the first object (and its warmed indexes).
+        _store.setdefault(ref, obj)
+        _refs[id(obj)] = (obj, ref)
+    return ref
+
+
+def resolve(ref: str) -> Any:
+    try:
+        return _store[ref]
+    except KeyError:
+        raise KeyError(f"reference data {ref!r} is not registered in this process") from None
+
+
+def register_hardware(hw_db: Any) -> str:
+    return register("hw", as_catalog(hw_db))
+
+
+def register_policies(policies: Mapping[str, Any]) -> str:
+    return register("policy", policies)
+
+
+def hardware_of(state: Mapping[str, Any]) -> HardwareCatalog:
+    """The state's hardware catalog: inline `hw_db` if given, else the registered `hw_ref`."""
+    if "hw_db" in state:
+        return as_catalog(state["hw_db"])
+    if state.get("hw_ref"):
+        return resolve(state["hw_ref"])
+    return as_catalog([])
+
+
+def policies_of(state: Mapping[str, Any]) -> Dict[str, Any]:
+    """The state's policy store: inline `policies` if given, else the registered `policy_ref`."""
+    if "policies" in state:
+        return state["policies"]
+    if state.get("policy_ref"):
+        return resolve(state["policy_ref"])
+    return {}
@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from aiv_de.config import SETTINGS
+from aiv_de.graph import CHECKPOINT_BACKENDS, CHECKPOINT_MODES, acompile_graph, aclose_graph, run_options
+from aiv_de.observability.metrics import metrics_to_prometheus, run_totals
+from aiv_de.run_one import build_inputs, load_catalogs, site_repository, site_thread_id, write_artifacts
+from aiv_de.tools.hardware_catalog import as_catalog
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="run_fleet", description="Run many sites through one compiled graph.")
+    p.add_argument("--sites", default="all", help="'all' or a comma-separated list of site IDs")
+    p.add_argument("--from-file", dest="from_file", default=None, help="file with one site ID per line")
+    p.add_argument("--workers", type=int, default=SETTINGS.fleet_workers, help="max sites in flight")
+    p.add_argument("--out-dir", dest="out_dir", default="out")
+    p.add_argument("--regenerate", action="store_true", help="bypass the LLM response cache")
+    p.add_argument("--checkpoint", choices=CHECKPOINT_MODES, default=SETTINGS.checkpoint_mode,
+                   help="every super-step (resumable), terminal state only, or off")
+    p.add_argument("--backend", choices=CHECKPOINT_BACKENDS, default=SETTINGS.checkpoint_backend)
+    return p.parse_args(argv)
+
+
+def resolve_site_ids(sites_arg: str, from_file: Optional[str], known_ids: List[str]) -> List[str]:
+    if from_file:
+        with open(from_file, "r", encoding="utf-8") as f:
+            requested = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    elif sites_arg == "all":
+        requested = list(known_ids)
+    else:
+        requested = [s.strip() for s in sites_arg.split(",") if s.strip()]
+
+    known = set(known_ids)
+    unknown = [s for s in requested if s not in known]
+    if unknown:
+        raise ValueError(f"Unknown site IDs: {unknown}. Valid site IDs: {sorted(known_ids)}")
+    return requested
+
+
+def classify_outcome(out: Dict[str, Any]) -> str:
+    """passed = clean first attempt, vetoed = recovered after retries, escalated = HITL."""
+    trace = out.get("trace", [])
+    if any(t.get("node") == "hitl" for t in trace):
+        return "escalated"
+    if out.get("retries", 0) > 0:
+        return "vetoed"
+    return "passed"
+
+
+async def _run_site(
+    app: Any,
+    site: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    policies: Dict[str, Any],
+    fleet_id: str,
+    out_dir: str,
+    regenerate: bool,
+) -> Dict[str, Any]:
+    site_id = site["site_id"]
+    run_id = f"{fleet_id}-{site_id}"
+    # The same thread run_one uses for this profile, started fresh as a plain run_one does, so
+    # `run_one --resume/--revalidate` can pick up a fleet run.
+    config = {"configurable": {"thread_id": site_thread_id(site)}}
+    inputs = build_inputs(site, hw_db, policies, run_id, cache_bypass=regenerate or SETTINGS.llm_cache_bypass)
+
+    t0 = time.perf_counter()
+    try:
+        if app.checkpointer is not None:
+            await app.checkpointer.adelete_thread(config["configurable"]["thread_id"])
+        out = await app.ainvoke(inputs, config, **run_options(app))
+        wall_s = round(time.perf_counter() - t0, 3)
+        # A disk error here is this site's failure, not the fleet's.
+        write_artifacts(site_id, out, out_dir)
+    except Exception as exc:
+        return {
+            "site_id": site_id,
+            "outcome": "error",
+            "error": f"{type(exc).__name__}: {exc}",
+            "wall_s": round(time.perf_counter() - t0, 3),
+        }
+    return {
+        "site_id": site_id,
+        "outcome": classify_outcome(out),
+        "retries": out.get("retries", 0),
+        "vetoes": [r for v in out.get("vetoes", []) for r in v.get("violated_rules", [])],
+        "wall_s": wall_s,
+        "totals": run_totals(out.get("metrics") or {}),
+        "metrics": out.get("metrics") or {},
+    }
+
+
+def summarize(results: List[Dict[str, Any]], total_wall_s: float) -> Dict[str, Any]:
+    counts: Dict[str, int] = {"passed": 0, "vetoed": 0, "escalated": 0, "error": 0}
+    for r in results:
+        counts[r["outcome"]] = counts.get(r["outcome"], 0) + 1
+    return {
+        "sites": len(results),
+        "counts": counts,
+        "total_wall_s": round(total_wall_s, 3),
+        "per_site": results,
+    }
+
+
+async def run_fleet(
+    sites: Iterable[Dict[str, Any]],
+    hw_db: List[Dict[str, Any]],
+    policies: Dict[str, Any],
+    workers: int,
+    out_dir: str = "out",
+    regenerate: bool = False,
+    checkpoint_mode: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """`sites` is consumed lazily: `workers` tasks pull from a bounded queue, so at most about
+    2 x workers profiles are held at once (a repository iterator never lands in a list)."""
+    # One async app (AsyncSqliteSaver) shared by every site; LLM nodes run their async variants.
+    app = await acompile_graph(checkpoint_mode, backend)
+    hw_db = as_catalog(hw_db)
+
+    fleet_id = uuid.uuid4().hex[:12]
+    n_workers = max(1, workers)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=n_workers)
+    indexed: List[Tuple[int, Dict[str, Any]]] = []
+
+    async def feed() -> None:
+        for i, site in enumerate(sites):
+            await queue.put((i, site))
+        for _ in range(n_workers):
+            await queue.put(None)
+
+    async def work() -> None:
+        while (item := await queue.get()) is not None:
+            i, site = item
+            indexed.append((i, await _run_site(app, site, hw_db, policies, fleet_id, out_dir, regenerate)))
+
+    t0 = time.perf_counter()
+    tasks = [asyncio.create_task(feed())] + [asyncio.create_task(work()) for _ in range(n_workers)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await aclose_graph(app)
+    results = [r for _, r in sorted(indexed, key=lambda x: x[0])]
+    summary = summarize(results, time.perf_counter() - t0)
+    summary["fleet_id"] = fleet_id
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, f"fleet_{fleet_id}_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    with open(os.path.join(out_dir, f"fleet_{fleet_id}_metrics.prom"), "w", encoding="utf-8") as f:
+        f.write(metrics_to_prometheus(
+            {"labels": {"fleet_id": fleet_id, "site_id": r["site_id"]}, "metrics": r.get("metrics", {})}
+            for r in results
+        ))
+    return summary
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print(f"[fleet_id={summary['fleet_id']}] {summary['sites']} sites in {summary['total_wall_s']}s")
+    for r in summary["per_site"]:
+        print(f"  {r['site_id']:<16} {r['outcome']:<10} {r['wall_s']:>8.3f}s")
+    print("  " + ", ".join(f"{k}={v}" for k, v in summary["counts"].items()))
+
+
+def main(argv: list[str]) -> None:
+    args = parse_args(argv)
+    repo = site_repository()
+    stream_all = args.sites == "all" and not args.from_file
+    try:
+        site_ids = [] if stream_all else resolve_site_ids(args.sites, args.from_file, repo.ids())
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        sys.exit(1)
+
+    hw_db, policies = load_catalogs()
+    # Generators: profiles are read from disk as workers pull them.
+    selected = iter(repo) if stream_all else (repo.get(sid) for sid in site_ids)
+    summary = asyncio.run(run_fleet(
+        selected, hw_db, policies, args.workers, args.out_dir, args.regenerate, args.checkpoint, args.backend,
+    ))
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -2,9 +2,18 @@ import json
 import os
 import sys
 import uuid
+from typing import Any, Dict, List, Optional, TextIO, Tuple
 
+# Only light modules at import time: LangGraph/LangChain (via aiv_de.graph) and yaml (via the
+# policy store) are imported inside the functions that need them, so --list-sites and
+# --validate-only start fast. tests/test_import_time.py guards this.
 from aiv_de.config import SETTINGS
-from aiv_de.graph import compile_graph, load_policy_store
+from aiv_de.observability.metrics import metrics_to_json
+from aiv_de.observability.redaction import redact, redact_obj
+from aiv_de.observability.trace import TraceEvent, trace_to_dicts
+from aiv_de.refdata import content_ref, register_hardware, register_policies, resolve
+from aiv_de.site_repo import SiteRepository, open_site_repository
+from aiv_de.tools.hardware_catalog import load_hardware_catalog
 
 
 def parse_args(argv: list[str]) -> tuple[str, bool]:
@@ -18,55 +27,189 @@ def parse_args(argv: list[str]) -> tuple[str, bool]:
     return site_id, stream
 
 
-def main(site_id: str = "DE-MUC-01", stream: bool = False) -> None:
-    run_id = uuid.uuid4().hex[:12]
-    thread_id = str(uuid.uuid4())
+def _jsonable(obj: Any) -> Any:
+    return obj.as_dict() if isinstance(obj, TraceEvent) else str(obj)
 
-    sites = json.load(open(os.path.join(SETTINGS.data_dir, "sites.json"), "r", encoding="utf-8"))
-    hw_db = json.load(open(os.path.join(SETTINGS.data_dir, "hardware_specs.json"), "r", encoding="utf-8"))
-    policies = load_policy_store(SETTINGS.policy_dir)
 
-    # Look up the requested site, fail gracefully if not found
-    site_index = {s["site_id"]: s for s in sites}
-    if site_id not in site_index:
-        valid_ids = sorted(site_index.keys())
-        print(f"Error: site_id '{site_id}' not found.\nValid site IDs: {valid_ids}")
-        sys.exit(1)
-    site = site_index[site_id]
+def site_repository() -> SiteRepository:
+    return open_site_repository(SETTINGS.sites_path or os.path.join(SETTINGS.data_dir, "sites.json"))
 
-    app = compile_graph()
 
-    inputs = {
+def load_sites() -> List[Dict[str, Any]]:
+    return list(site_repository())
+
+
+def load_catalogs() -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Hardware catalog and policy store (both cached per file version)."""
+    from aiv_de.policy_store import get_compiled_policy_store
+
+    hw_db = load_hardware_catalog(os.path.join(SETTINGS.data_dir, "hardware_specs.json"))
+    policies = get_compiled_policy_store(SETTINGS.policy_dir).policies
+    return hw_db, policies
+
+
+def load_reference_data() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]:
+    return (load_sites(), *load_catalogs())
+
+
+def build_inputs(
+    site: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    policies: Dict[str, Any],
+    run_id: str,
+    cache_bypass: bool = SETTINGS.llm_cache_bypass,
+) -> Dict[str, Any]:
+    # Static reference data stays in the process-level store; the checkpoint holds its hash.
+    return {
         "run_id": run_id,
         "site_profile": site,
-        "hw_db": hw_db,
-        "policies": policies,
+        "hw_ref": register_hardware(hw_db),
+        "policy_ref": register_policies(policies),
         "retries": 0,
         "max_retries": SETTINGS.max_retries,
         "hitl_required": False,
+        "cache_bypass": cache_bypass,
         "trace": [],
     }
 
-    config = {"configurable": {"thread_id": thread_id}}
 
-    if stream:
-        final_state = None
-        for event in app.stream(inputs, config=config):
-            if isinstance(event, dict):
-                print(json.dumps(event, ensure_ascii=True))
+RUN_MODES = ("fresh", "resume", "revalidate")
+
+
+def site_thread_id(site: Dict[str, Any]) -> str:
+    """Stable per site profile: a changed profile starts a new thread, an unchanged one reuses it."""
+    return f"{site['site_id']}@{content_ref('site', site)}"
+
+
+def prepare_run(
+    app: Any,
+    site: Dict[str, Any],
+    hw_db: List[Dict[str, Any]],
+    policies: Dict[str, Any],
+    run_id: str,
+    mode: str = "fresh",
+    cache_bypass: bool = SETTINGS.llm_cache_bypass,
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """(graph input, config) for a run on the site's thread; input None continues from its checkpoint.
+
+    fresh      -- drop the thread's checkpoints and start over
+    resume     -- continue an interrupted run (a finished one just returns its state)
+    revalidate -- keep requirements/options, swap in the current hardware/policy refs and
+                  rerun from validate; the ADR is only rewritten if its inputs changed
+    """
+    if mode not in RUN_MODES:
+        raise ValueError(f"mode must be one of {RUN_MODES}, got {mode!r}")
+    config = {"configurable": {"thread_id": site_thread_id(site)}}
+    inputs = build_inputs(site, hw_db, policies, run_id, cache_bypass=cache_bypass)
+    if app.checkpointer is None:
+        if mode != "fresh":
+            raise ValueError(f"--{mode} needs checkpoints; AIVDE_CHECKPOINT_MODE is 'off'")
+        return inputs, config
+
+    if mode == "fresh":
+        app.checkpointer.delete_thread(config["configurable"]["thread_id"])
+        return inputs, config
+
+    values = app.get_state(config).values
+    if mode == "resume":
+        if not values:
+            return inputs, config
+        for key in ("hw_ref", "policy_ref"):
+            try:
+                resolve(values[key])
+            except KeyError:
+                raise ValueError(
+                    f"{key} of the interrupted run no longer matches the data on disk; use --revalidate"
+                ) from None
+        return None, config
+
+    if not values.get("options"):
+        raise ValueError(f"no checkpointed options for {site['site_id']} to revalidate; run it first")
+    app.update_state(config, {
+        "run_id": run_id,
+        "hw_ref": inputs["hw_ref"],
+        "policy_ref": inputs["policy_ref"],
+        "cache_bypass": cache_bypass,
+        "hitl_required": False,
+    }, as_node="select")
+    return None, config
+
+
+def stream_run(
+    app: Any,
+    inputs: Optional[Dict[str, Any]],
+    config: Dict[str, Any],
+    adr_path: str,
+    echo: TextIO = sys.stdout,
+    redacted: bool = SETTINGS.redact_artifacts,
+) -> Dict[str, Any]:
+    """Run the graph once, streaming. Node updates are printed as JSON lines; the ADR's rendered
+    sections and narrative tokens go to `echo` and `adr_path` as they arrive. The last "values"
+    chunk is the final state, so the graph never has to be invoked a second time.
+
+    With `redacted`, the file only receives whole lines that went through `redact` (no rule
+    matches across a newline), so an interrupted run leaves no raw text in out/."""
+    from aiv_de.graph import run_options
+
+    final_state: Dict[str, Any] = {}
+    written: List[str] = []
+    pending = ""  # text after the last newline, not yet in the file
+    os.makedirs(os.path.dirname(adr_path) or ".", exist_ok=True)
+    with open(adr_path, "w", encoding="utf-8") as adr_file:
+
+        def to_file(text: str) -> None:
+            nonlocal pending
+            if redacted:
+                pending += text
+                cut = pending.rfind("\n") + 1
+                text, pending = redact(pending[:cut]), pending[cut:]
+            if text:
+                adr_file.write(text)
+                adr_file.flush()
+
+        def emit(text: str) -> None:
+            echo.write(text)
+            echo.flush()
+            to_file(text)
+            written.append(text)
+
+        for mode, chunk in app.stream(inputs, config=config,
+                                      stream_mode=["updates", "custom", "messages", "values"], **run_options(app)):
+            if mode == "custom":
+                if isinstance(chunk, dict) and chunk.get("adr_text"):
+                    emit(chunk["adr_text"])
+            elif mode == "messages":
+                msg, meta = chunk
+                if meta.get("langgraph_node") == "adr" and isinstance(msg.content, str) and msg.content:
+                    emit(msg.content)
+            elif mode == "updates":
+                for node, update in chunk.items():
+                    # The ADR text (and the narrative inside it) is streamed, or printed once at the end.
+                    update = {k: v for k, v in (update or {}).items() if k not in ("adr", "adr_narrative")}
+                    echo.write(json.dumps({node: update}, ensure_ascii=True, default=_jsonable) + "\n")
             else:
-                print(event)
-            if isinstance(event, dict):
-                final_state = event
+                final_state = chunk
+        adr_text = final_state.get("adr") or ""
+        done = "".join(written)
+        if isinstance(adr_text, str) and adr_text != done:
+            # Cache hit, reused ADR or HITL: (the rest of) the text was not generated token by token.
+            if not adr_text.startswith(done):
+                adr_file.seek(0)
+                adr_file.truncate()
+                done, pending = "", ""
+            emit(adr_text[len(done):])
+        if pending:
+            adr_file.write(redact(pending))
+        echo.write("\n")
+    return final_state
 
-        if not (isinstance(final_state, dict) and ("adr" in final_state or "trace" in final_state)):
-            out = app.invoke(inputs, config=config)
-        else:
-            out = final_state
-    else:
-        out = app.invoke(inputs, config=config)
 
-    # Write artifacts
+def write_artifacts(
+    site_id: str,
+    out: Dict[str, Any],
+    out_dir: str = "out",
+    redacted: bool = SETTINGS.redact_artifacts,
+) -> Tuple[str, str]:
     adr_value = out.get("adr", "")
     if isinstance(adr_value, dict):
         adr_text = adr_value.get("adr", "")
@@ -74,16 +217,103 @@ def main(site_id: str = "DE-MUC-01", stream: bool = False) -> None:
     else:
         adr_text = adr_value
         trace_value = out.get("trace", [])
+    trace_value = trace_to_dicts(trace_value)
+    if redacted:
+        # Site docs and LLM text can carry contacts/keys; scrub before anything hits out/.
+        adr_text = redact(adr_text)
+        trace_value = redact_obj(trace_value)
 
-    os.makedirs("out", exist_ok=True)
-    with open(f"out/{site_id}_ADR-001.md", "w", encoding="utf-8") as f:
+    os.makedirs(out_dir, exist_ok=True)
+    adr_path = os.path.join(out_dir, f"{site_id}_ADR-001.md")
+    trace_path = os.path.join(out_dir, f"{site_id}_trace.json")
+    with open(adr_path, "w", encoding="utf-8") as f:
         f.write(adr_text)
-    with open(f"out/{site_id}_trace.json", "w", encoding="utf-8") as f:
+    with open(trace_path, "w", encoding="utf-8") as f:
         json.dump(trace_value, f, indent=2)
+    with open(os.path.join(out_dir, f"{site_id}_metrics.json"), "w", encoding="utf-8") as f:
+        f.write(metrics_to_json(out.get("metrics") or {}, site_id=site_id, run_id=out.get("run_id")))
+    return adr_path, trace_path
+
+
+def _find_site(repo: SiteRepository, site_id: str) -> Dict[str, Any]:
+    site = repo.get(site_id)
+    if site is None:
+        print(f"Error: site_id '{site_id}' not found.\nValid site IDs: {sorted(repo.ids())}")
+        sys.exit(1)
+    return site
+
 
-    print(f"[run_id={run_id}] Wrote out/{site_id}_ADR-001.md and out/{site_id}_trace.json")
+def validate_only(site: Dict[str, Any], hw_db: List[Dict[str, Any]], policies: Dict[str, Any]) -> Dict[str, Any]:
+    """Offline check of the default edge option against feasibility, policy, HITL rules and
+    EU AI Act tiers -- no LLM, no graph, no LangChain import."""
+    from aiv_de.agents.validator_governance import validate_options
+    from aiv_de.policy_store import compiled_policies
+    from aiv_de.tools.rule_eval import rule_context
+    from aiv_de.types import DEFAULT_OPTION
+
+    best = validate_options(site, [dict(DEFAULT_OPTION)], hw_db, policies)[0]
+    ctx = rule_context({
+        "site_profile": site,
+        "retries": 0,
+        "max_retries": SETTINGS.max_retries,
+        "feasibility": best["feasibility"],
+        "policy": best["policy"],
+        "vetoes": best["vetoes"],
+    })
+    store = compiled_policies(policies)
+    tiers = store.risk_tiers.evaluate(ctx)
+    return {
+        "site_id": site.get("site_id"),
+        "option_id": best["option"].get("option_id"),
+        "feasibility": best["feasibility"],
+        "policy": best["policy"],
+        "vetoes": best["vetoes"],
+        "hitl_triggers": store.hitl_rules.evaluate(ctx),
+        "risk_tier": tiers[0]["id"] if tiers else None,
+    }
+
+
+def main(site_id: str = "DE-MUC-01", stream: bool = False, regenerate: bool = False, mode: str = "fresh") -> None:
+    from aiv_de.graph import compile_graph, run_options
+
+    run_id = uuid.uuid4().hex[:12]
+
+    # Look up the requested site, fail gracefully if not found
+    site = _find_site(site_repository(), site_id)
+    hw_db, policies = load_catalogs()
+
+    app = compile_graph()
+
+    try:
+        inputs, config = prepare_run(app, site, hw_db, policies, run_id, mode,
+                                     cache_bypass=regenerate or SETTINGS.llm_cache_bypass)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        sys.exit(1)
+
+    if stream:
+        out = stream_run(app, inputs, config, os.path.join("out", f"{site_id}_ADR-001.md"))
+    else:
+        out = app.invoke(inputs, config=config, **run_options(app))
+
+    adr_path, trace_path = write_artifacts(site_id, out)
+    print(f"[run_id={run_id}] Wrote {adr_path} and {trace_path}")
 
 
 if __name__ == "__main__":
-    site_id, stream = parse_args(sys.argv[1:])
-    main(site_id=site_id, stream=stream)
+    argv = sys.argv[1:]
+    if "--list-sites" in argv:
+        for sid in site_repository().ids():
+            print(sid)
+        sys.exit(0)
+    if "--validate-only" in argv:
+        site_id, _ = parse_args([a for a in argv if a != "--validate-only"])
+        site = _find_site(site_repository(), site_id)
+        print(json.dumps(validate_only(site, *load_catalogs()), indent=2))
+        sys.exit(0)
+
+    flags = {"--regenerate", "--resume", "--revalidate"}
+    regenerate = "--regenerate" in argv
+    mode = "revalidate" if "--revalidate" in argv else "resume" if "--resume" in argv else "fresh"
+    site_id, stream = parse_args([a for a in argv if a not in flags])
+    main(site_id=site_id, stream=stream, regenerate=regenerate, mode=mode)
@@ -0,0 +1,152 @@
+import codecs
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Site profiles are read straight from disk: a JSON array (data/sites.json) or JSON Lines.
+# A `<file>.idx` sidecar maps site_id -> (byte offset, length) so a single profile is one
+# seek + one small json.loads; iteration parses one profile at a time.
+
+_CHUNK = 64 * 1024
+_WS = " \t\r\n"
+
+
+def _utf8_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _scan_array(f: Any) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """(offset, length, site) for each element of a top-level JSON array, read in chunks."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    # buf[mark:] is unconsumed text and buf[mark] sits at byte `mark_at` of the file.
+    buf, pos, mark, mark_at = "", 0, 0, 0
+    started = eof = False
+    while True:
+        while pos < len(buf) and (buf[pos] in _WS or (started and buf[pos] == ",")):
+            pos += 1
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError("sites file must be a JSON array or JSON Lines")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                start = mark_at + _utf8_len(buf[mark:pos])
+                length = _utf8_len(buf[pos:end])
+                yield start, length, obj
+                pos, mark, mark_at = end, end, start + length
+                continue
+        elif eof:
+            raise ValueError("sites file ended before the closing ']'")
+        # Drop consumed text before reading on, so memory stays at about one profile + one chunk.
+        buf, pos, mark = buf[mark:], pos - mark, 0
+        chunk = f.read(_CHUNK)
+        eof = not chunk
+        buf += utf8.decode(chunk, final=eof)
+
+
+def _scan_lines(f: Any) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    offset = 0
+    for line in f:
+        if line.strip():
+            yield offset, len(line), json.loads(line)
+        offset += len(line)
+
+
+class SiteRepository:
+    """Read-only site profiles backed by a JSON array or JSON Lines file.
+
+    `get` is O(1) through the offset index (built by one streaming pass, saved next to the
+    file and reused until the file changes); iterating yields profiles one at a time."""
+
+    def __init__(self, path: str, index_path: Optional[str] = None) -> None:
+        self.path = path
+        self.index_path = index_path or f"{path}.idx"
+        self._lines = path.endswith(".jsonl")
+        self._offsets: Optional[Dict[str, List[int]]] = None
+        self._sig: Optional[List[int]] = None
+        self._lock = threading.Lock()
+
+    def _signature(self) -> List[int]:
+        st = os.stat(self.path)
+        return [st.st_mtime_ns, st.st_size]
+
+    def _scan(self) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+        with open(self.path, "rb") as f:
+            yield from (_scan_lines(f) if self._lines else _scan_array(f))
+
+    def _load_index(self, sig: List[int]) -> Optional[Dict[str, List[int]]]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get("signature") != sig:
+            return None
+        return saved["offsets"]
+
+    def _build_index(self, sig: List[int]) -> Dict[str, List[int]]:
+        offsets = {site["site_id"]: [start, length] for start, length, site in self._scan()}
+        try:
+            tmp = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"signature": sig, "offsets": offsets}, f, separators=(",", ":"))
+            os.replace(tmp, self.index_path)
+        except OSError:
+            pass  # read-only data dir: keep the index in memory only
+        return offsets
+
+    def index(self) -> Dict[str, List[int]]:
+        """site_id -> [byte offset, length]; reloaded or rebuilt only when the file changes."""
+        sig = self._signature()
+        with self._lock:
+            if self._offsets is None or self._sig != sig:
+                self._offsets = self._load_index(sig) or self._build_index(sig)
+                self._sig = sig
+            return self._offsets
+
+    def ids(self) -> List[str]:
+        return list(self.index())
+
+    def __contains__(self, site_id: object) -> bool:
+        return site_id in self.index()
+
+    def __len__(self) -> int:
+        return len(self.index())
+
+    def get(self, site_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.index().get(site_id)
+        if entry is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(entry[0])
+            return json.loads(f.read(entry[1]))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Profiles in file order, parsed one at a time (no index needed)."""
+        for _, _, site in self._scan():
+            yield site
+
+
+_lock = threading.Lock()
+_repos: Dict[str, SiteRepository] = {}
+
+
+def open_site_repository(path: str) -> SiteRepository:
+    """Process-wide repository per file; its index follows the file's mtime/size."""
+    key = os.path.abspath(path)
+    with _lock:
+        repo = _repos.get(key)
+        if repo is None:
+            repo = _repos[key] = SiteRepository(path)
+        return repo
@@ -0,0 +1,123 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Sequence
+
+from aiv_de.run_one import load_catalogs, site_repository
+from aiv_de.site_repo import SiteRepository
+from aiv_de.tools.feasibility_sweep import PLACEMENT_TEMPLATES, ROW_COLUMNS, SUMMARY_COLUMNS, FeasibilitySweep
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        prog="sweep", description="Deterministic feasibility + policy sweep: sites x SKUs x placement templates.",
+    )
+    p.add_argument("--sites", default="all", help="'all' or a comma-separated list of site IDs")
+    p.add_argument("--hardware", default="all", help="'all' or a comma-separated list of hw_ids")
+    p.add_argument("--templates", default=",".join(PLACEMENT_TEMPLATES),
+                   help=f"comma-separated placement templates ({', '.join(PLACEMENT_TEMPLATES)})")
+    p.add_argument("--rows", action="store_true", help="also write one row per site x SKU x template")
+    p.add_argument("--format", choices=("csv", "parquet"), default="csv",
+                   help="output format; parquet needs pyarrow")
+    p.add_argument("--out-dir", dest="out_dir", default="out")
+    return p.parse_args(argv)
+
+
+def select(items: List[Dict[str, Any]], key: str, arg: str) -> List[Dict[str, Any]]:
+    if arg == "all":
+        return list(items)
+    index = {it[key]: it for it in items}
+    wanted = [x.strip() for x in arg.split(",") if x.strip()]
+    unknown = [x for x in wanted if x not in index]
+    if unknown:
+        raise ValueError(f"Unknown {key}(s): {', '.join(unknown)}. Valid: {', '.join(index)}")
+    return [index[x] for x in wanted]
+
+
+def select_sites(repo: SiteRepository, arg: str) -> Iterable[Dict[str, Any]]:
+    """All sites as a stream from disk, or the listed ones through the offset index."""
+    if arg == "all":
+        return iter(repo)
+    wanted = [x.strip() for x in arg.split(",") if x.strip()]
+    unknown = [x for x in wanted if x not in repo]
+    if unknown:
+        raise ValueError(f"Unknown site_id(s): {', '.join(unknown)}. Valid: {', '.join(repo.ids())}")
+    return (repo.get(x) for x in wanted)
+
+
+def write_csv(path: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """Stream rows to CSV; returns how many were written."""
+    n = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(columns)
+        for row in rows:
+            w.writerow(row)
+            n += 1
+    return n
+
+
+def write_parquet(path: str, columns: Sequence[str], rows: Iterable[Sequence[Any]], batch_rows: int = 65536) -> int:
+    """Stream rows to Parquet, one row group per batch; returns how many were written.
+
+    Column types come from the first batch (str/int/bool), so later batches cannot drift."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = iter(rows)
+    batch = list(islice(rows, batch_rows))
+    if not batch:
+        pq.write_table(pa.table({c: pa.array([], pa.string()) for c in columns}), path)
+        return 0
+    table = pa.Table.from_pydict(dict(zip(columns, map(list, zip(*batch)))))
+    n = 0
+    with pq.ParquetWriter(path, table.schema) as writer:
+        while batch:
+            writer.write_table(table)
+            n += len(batch)
+            batch = list(islice(rows, batch_rows))
+            if batch:
+                table = pa.Table.from_pydict(dict(zip(columns, map(list, zip(*batch)))), schema=table.schema)
+    return n
+
+
+def _writer(fmt: str) -> Callable[[str, Sequence[str], Iterable[Sequence[Any]]], int]:
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ValueError("--format parquet needs pyarrow (pip install pyarrow)") from None
+        return write_parquet
+    return write_csv
+
+
+def main(argv: list[str]) -> None:
+    args = parse_args(argv)
+    hw_db, policies = load_catalogs()
+    try:
+        sites = select_sites(site_repository(), args.sites)
+        hardware = select(hw_db, "hw_id", args.hardware)
+        sweep = FeasibilitySweep(sites, hardware, policies, [t.strip() for t in args.templates.split(",") if t.strip()])
+        write = _writer(args.format)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        sys.exit(1)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    t0 = time.perf_counter()
+    summary_path = os.path.join(args.out_dir, f"sweep_summary.{args.format}")
+    n = write(summary_path, SUMMARY_COLUMNS, sweep.summary())
+    print(f"[sweep] {len(sweep.sites)} sites x {len(hardware)} SKUs x {len(sweep.templates)} templates")
+    print(f"  {summary_path}: {n} rows")
+    if args.rows:
+        rows_path = os.path.join(args.out_dir, f"sweep_rows.{args.format}")
+        n = write(rows_path, ROW_COLUMNS, sweep.rows())
+        print(f"  {rows_path}: {n} rows")
+    print(f"  {time.perf_counter() - t0:.3f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
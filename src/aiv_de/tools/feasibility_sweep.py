@@ -0,0 +1,139 @@
+from __future__ import annotations
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from aiv_de.tools.hardware_catalog import as_catalog
+from aiv_de.policy_store import compiled_policies
+
+# Single-SKU options a site can be swept against; same placement shape the architect proposes.
+PLACEMENT_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "edge": {"inference": "edge", "storage": "onprem"},
+    "onprem": {"inference": "onprem", "storage": "onprem"},
+    "hybrid_cloud": {"inference": "edge", "storage": "hybrid_cloud"},
+    "cloud": {"inference": "cloud", "storage": "cloud"},
+}
+
+SUMMARY_COLUMNS = (
+    "site_id", "template", "skus", "feasible_skus", "power_exceeded_skus",
+    "margin", "bottlenecks", "policy_passed", "violated_rules",
+)
+ROW_COLUMNS = (
+    "site_id", "hw_id", "template", "is_possible", "margin", "bottlenecks",
+    "policy_passed", "violated_rules",
+)
+
+_POWER = "power_budget_exceeded_for_edge_hw"
+
+
+class SiteColumns:
+    """Columnar view of the sites: one list per field validate_feasibility/policy_check read."""
+
+    def __init__(self, sites: Iterable[Dict[str, Any]], policies: Dict[str, Any]) -> None:
+        matcher = compiled_policies(policies).injection
+        self.site_id: List[str] = []
+        self.power_budget: List[int] = []
+        self.safety_strict: List[bool] = []   # safety_line with a <=50 ms budget: no WAN dependency
+        self.underpowered: List[bool] = []    # >=12 cams, >=30 fps, high res on <=30 W
+        self.tight: List[bool] = []           # feasible, but margin "medium"
+        self.residency: List[bool] = []
+        self.injected: List[bool] = []
+        for s in sites:
+            line = s.get("line_profile", {})
+            latency = int(s.get("latency_budget_ms", 120))
+            power = int(s.get("power_budget_w", 50))
+            cams = int(line.get("camera_count", 1))
+            fps = int(line.get("fps", 15))
+            res = line.get("resolution_class", "medium")
+            strict = s.get("use_case", "quality_inspection") == "safety_line" and latency <= 50
+            poison = s.get("poison_doc", {})
+            self.site_id.append(s["site_id"])
+            self.power_budget.append(power)
+            self.safety_strict.append(strict)
+            self.underpowered.append(cams >= 12 and fps >= 30 and res == "high" and power <= 30)
+            self.tight.append((strict and power <= 30) or (cams >= 10 and res == "high"))
+            self.residency.append(bool(s.get("data_residency_required", False)))
+            self.injected.append(bool(poison.get("enabled")) and matcher.search(poison.get("example_text", "")))
+
+    def __len__(self) -> int:
+        return len(self.site_id)
+
+
+class FeasibilitySweep:
+    """Every site x every SKU x every placement template, without the graph or an LLM.
+
+    Results match validate_feasibility + policy_check on the single-SKU option. The only
+    check that depends on the SKU is the edge power budget, so each (site, template) cell is
+    evaluated once and a SKU either gets that result or the same plus the power bottleneck.
+    Which edge SKUs exceed a budget is a suffix of the power-sorted edge SKUs (one bisect)."""
+
+    def __init__(
+        self,
+        sites: Iterable[Dict[str, Any]],
+        hw_db: Iterable[Dict[str, Any]],
+        policies: Dict[str, Any],
+        templates: Optional[Iterable[str]] = None,
+    ) -> None:
+        names = list(templates or PLACEMENT_TEMPLATES)
+        unknown = [t for t in names if t not in PLACEMENT_TEMPLATES]
+        if unknown:
+            raise ValueError(f"unknown placement template(s): {', '.join(unknown)}")
+        self.templates = [(t, PLACEMENT_TEMPLATES[t]) for t in names]
+        self.sites = SiteColumns(sites, policies)
+        records = as_catalog(hw_db).records
+        self.hw_id = [r.hw_id for r in records]
+        self.is_edge = [r.hw_class == "edge" for r in records]
+        self.power_max_w = [r.power_max_w for r in records]
+        self._edge_power = sorted(p for p, e in zip(self.power_max_w, self.is_edge) if e)
+        self._masks: Dict[int, List[bool]] = {}
+
+    def power_exceeded(self, budget: int) -> int:
+        return len(self._edge_power) - bisect_right(self._edge_power, budget)
+
+    def _mask(self, budget: int) -> List[bool]:
+        mask = self._masks.get(budget)
+        if mask is None:
+            mask = self._masks[budget] = [e and p > budget for e, p in zip(self.is_edge, self.power_max_w)]
+        return mask
+
+    def _cell(self, i: int, placement: Dict[str, str]) -> Tuple[List[str], str, bool, str]:
+        """(SKU-independent bottlenecks, margin if feasible, policy passed, violated rules)."""
+        s = self.sites
+        bottlenecks: List[str] = []
+        if s.safety_strict[i] and any(v in ("cloud", "hybrid_cloud") for v in placement.values()):
+            bottlenecks.append("safety_latency_incompatible_with_cloud_dependency")
+        if s.underpowered[i]:
+            bottlenecks.append("multi_cam_high_res_high_fps_underpowered")
+        margin = "low" if bottlenecks else ("medium" if s.tight[i] else "high")
+        violated: List[str] = []
+        if s.residency[i] and any(v == "cloud" for v in placement.values()):
+            violated.append("no_raw_to_cloud")
+        if s.injected[i]:
+            violated.append("prompt_injection_detected")
+        return bottlenecks, margin, not violated, ";".join(violated)
+
+    def summary(self) -> Iterator[Tuple[Any, ...]]:
+        """One row per (site, template), see SUMMARY_COLUMNS; cost does not grow with SKUs."""
+        n = len(self.hw_id)
+        s = self.sites
+        for i in range(len(s)):
+            over = self.power_exceeded(s.power_budget[i])
+            for name, placement in self.templates:
+                bottlenecks, margin, passed, violated = self._cell(i, placement)
+                feasible = 0 if bottlenecks else n - over
+                if over:
+                    bottlenecks = [_POWER] + bottlenecks
+                yield (s.site_id[i], name, n, feasible, over,
+                       margin if feasible else "low", ";".join(bottlenecks), passed, violated)
+
+    def rows(self) -> Iterator[Tuple[Any, ...]]:
+        """One row per (site, SKU, template), see ROW_COLUMNS."""
+        s = self.sites
+        for i in range(len(s)):
+            mask = self._mask(s.power_budget[i])
+            for name, placement in self.templates:
+                bottlenecks, margin, passed, violated = self._cell(i, placement)
+                fits = (not bottlenecks, margin, ";".join(bottlenecks), passed, violated)
+                over = (False, "low", ";".join([_POWER] + bottlenecks), passed, violated)
+                sid = s.site_id[i]
+                for hw_id, exceeded in zip(self.hw_id, mask):
+                    yield (sid, hw_id, name) + (over if exceeded else fits)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+def parse_power_range(pc: Any) -> Tuple[float, float]:
+    """'15-30' -> (15, 30). Anything else, a single value like '25' included, -> (0, inf) so it
+    never fits a budget, as the original edge power check read it."""
+    parts = str(pc).split("-")
+    try:
+        if len(parts) == 2:
+            return float(parts[0]), float(parts[1])
+    except ValueError:
+        pass
+    return 0.0, math.inf
+
+
+class HardwareRecord:
+    __slots__ = ("hw_id", "hw_class", "accel", "memory_gb", "power_min_w", "power_max_w", "cost_class", "raw")
+
+    def __init__(self, raw: Dict[str, Any]) -> None:
+        self.raw = raw
+        self.hw_id: str = raw["hw_id"]
+        self.hw_class: str = raw.get("class", "")
+        self.accel: str = raw.get("accel", "")
+        self.memory_gb: float = float(raw.get("memory_gb", 0) or 0)
+        self.power_min_w, self.power_max_w = parse_power_range(raw.get("power_class_w", "0-0"))
+        self.cost_class: str = raw.get("cost_class", "")
+
+    def __repr__(self) -> str:
+        return f"HardwareRecord({self.hw_id!r})"
+
+
+class HardwareCatalog(list):
+    """hardware_specs.json as a list of the original dicts, plus parsed records and indexes.
+
+    Being a list keeps every existing `hw_db` consumer working unchanged."""
+
+    def __init__(self, hw_db: Iterable[Dict[str, Any]]) -> None:
+        super().__init__(hw_db)
+        self.records: List[HardwareRecord] = [HardwareRecord(h) for h in self if h.get("hw_id")]
+        self.by_id: Dict[str, HardwareRecord] = {r.hw_id: r for r in self.records}
+        self.by_class: Dict[str, List[int]] = {}
+        self.by_accel: Dict[str, List[int]] = {}
+        self.by_cost: Dict[str, List[int]] = {}
+        for i, r in enumerate(self.records):
+            self.by_class.setdefault(r.hw_class, []).append(i)
+            self.by_accel.setdefault(r.accel, []).append(i)
+            self.by_cost.setdefault(r.cost_class, []).append(i)
+        self._mem_sorted = sorted((r.memory_gb, i) for i, r in enumerate(self.records))
+        self._power_sorted = sorted((r.power_max_w, i) for i, r in enumerate(self.records))
+        self._budget_cache: Dict[float, FrozenSet[str]] = {}
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        # Checkpoint serializers and pickling see a plain list of dicts.
+        return (list, (list(self),))
+
+    def get(self, hw_id: str) -> Optional[Dict[str, Any]]:
+        r = self.by_id.get(hw_id)
+        return r.raw if r else None
+
+    def query(
+        self,
+        hw_class: Optional[str] = None,
+        accel: Optional[str] = None,
+        cost_class: Optional[str] = None,
+        max_power_w: Optional[float] = None,
+        min_memory_gb: Optional[float] = None,
+    ) -> List[HardwareRecord]:
+        """e.g. query(hw_class="edge", accel="gpu", max_power_w=30, min_memory_gb=16)."""
+        selected: Optional[Set[int]] = None
+        for index, key in ((self.by_class, hw_class), (self.by_accel, accel), (self.by_cost, cost_class)):
+            if key is not None:
+                ids = set(index.get(key, ()))
+                selected = ids if selected is None else selected & ids
+        if max_power_w is not None:
+            cut = bisect_right(self._power_sorted, (max_power_w, math.inf))
+            ids = {i for _, i in self._power_sorted[:cut]}
+            selected = ids if selected is None else selected & ids
+        if min_memory_gb is not None:
+            cut = bisect_left(self._mem_sorted, (min_memory_gb, -1))
+            ids = {i for _, i in self._mem_sorted[cut:]}
+            selected = ids if selected is None else selected & ids
+        if selected is None:
+            return list(self.records)
+        return [self.records[i] for i in sorted(selected)]
+
+    def within_power_budget(self, power_budget_w: float) -> FrozenSet[str]:
+        """hw_ids that pass the edge power check for this budget (non-edge hardware always passes)."""
+        budget = float(power_budget_w)
+        cached = self._budget_cache.get(budget)
+        if cached is None:
+            cut = bisect_right(self._power_sorted, (budget, math.inf))
+            fits = {self.records[i].hw_id for _, i in self._power_sorted[:cut]}
+            fits.update(r.hw_id for r in self.records if r.hw_class != "edge")
+            cached = frozenset(fits)
+            with self._lock:
+                self._budget_cache[budget] = cached
+        return cached
+
+    def power_fits_by_site(self, sites: Iterable[Dict[str, Any]]) -> Dict[str, FrozenSet[str]]:
+        """site_id -> hw_ids within the site's power budget. A view over the per-budget
+        `within_power_budget` memo (sites sharing a budget share one entry), not a stored
+        site x SKU matrix: prompt building and validation each query the memo themselves."""
+        return {
+            s["site_id"]: self.within_power_budget(s.get("power_budget_w", 50))
+            for s in sites
+        }
+
+
+def as_catalog(hw_db: Iterable[Dict[str, Any]]) -> HardwareCatalog:
+    return hw_db if isinstance(hw_db, HardwareCatalog) else HardwareCatalog(hw_db)
+
+
+_lock = threading.Lock()
+_catalogs: Dict[str, Tuple[Tuple[int, int], HardwareCatalog]] = {}
+
+
+def load_hardware_catalog(path: str) -> HardwareCatalog:
+    """Process-wide catalog per file, reloaded only when the file changes."""
+    key = os.path.abspath(path)
+    st = os.stat(path)
+    sig = (st.st_mtime_ns, st.st_size)
+    with _lock:
+        hit = _catalogs.get(key)
+        if hit is None or hit[0] != sig:
+            with open(path, "r", encoding="utf-8") as f:
+                hit = _catalogs[key] = (sig, HardwareCatalog(json.load(f)))
+        return hit[1]
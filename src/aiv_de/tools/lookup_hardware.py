@@ -1,12 +1,12 @@
 from typing import Any, Dict, List
 
+from aiv_de.tools.hardware_catalog import as_catalog
+
 
 def lookup_hardware(hw_db: List[Dict[str, Any]], hw_ids: List[str]) -> List[Dict[str, Any]]:
-    index = {h["hw_id"]: h for h in hw_db}
+    catalog = as_catalog(hw_db)
     found: List[Dict[str, Any]] = []
     for hid in hw_ids:
-        if hid in index:
-            found.append(index[hid])
-        else:
-            found.append({"hw_id": hid, "missing": True})
+        hw = catalog.get(hid)
+        found.append(hw if hw is not None else {"hw_id": hid, "missing": True})
     return found
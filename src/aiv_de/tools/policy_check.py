@@ -1,15 +1,58 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 import re
 
+
+def _trie_regex(node: Dict[str, Any]) -> str:
+    # "" marks the end of a pattern; greedy optional groups make each start offset yield its longest match
+    branches = [re.escape(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if "" in node else body
+
+
+class PatternMatcher:
+    """Case-insensitive multi-literal matcher compiled into a single trie-shaped regex.
+
+    One scan finds every pattern occurrence, including overlapping and nested ones."""
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns = tuple(dict.fromkeys(p.lower() for p in patterns if p))
+        self._lookup = set(self.patterns)
+        trie: Dict[str, Any] = {}
+        for p in self.patterns:
+            node = trie
+            for ch in p:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        body = _trie_regex(trie) if self.patterns else "(?!)"
+        self._any = re.compile(body, re.IGNORECASE)
+        self._all = re.compile(f"(?=({body}))", re.IGNORECASE)
+
+    def search(self, text: str) -> bool:
+        return self._any.search(text) is not None
+
+    def scan(self, text: str) -> List[Dict[str, Any]]:
+        hits: List[Dict[str, Any]] = []
+        for m in self._all.finditer(text):
+            start, longest = m.start(), m.group(1).lower()
+            for end in range(1, len(longest) + 1):
+                if longest[:end] in self._lookup:
+                    hits.append({"pattern": longest[:end], "start": start, "end": start + end})
+        return hits
+
+
 def detect_prompt_injection(text: str, patterns: List[str]) -> bool:
-    t = text.lower()
-    for p in patterns:
-        if re.search(re.escape(p.lower()), t):
-            return True
-    return False
+    """One-off check against an ad-hoc pattern list; policy_check uses the store's compiled matcher."""
+    return PatternMatcher(patterns).search(text)
 
-def policy_check(site_profile: Dict[str, Any], selected_option: Dict[str, Any], policy_store: Dict[str, Any]) -> Dict[str, Any]:
+def policy_check(
+    site_profile: Dict[str, Any],
+    selected_option: Dict[str, Any],
+    policy_store: Dict[str, Any],
+    injection: Optional[PatternMatcher] = None,
+) -> Dict[str, Any]:
     violated: List[str] = []
     required_controls: List[str] = []
 
@@ -31,7 +74,7 @@ def policy_check(site_profile: Dict[str, Any], selected_option: Dict[str, Any],
     inj = sec.get("prompt_injection", {})
     patterns = inj.get("patterns", [])
     poison = site_profile.get("poison_doc", {})
-    if poison.get("enabled") and detect_prompt_injection(poison.get("example_text", ""), patterns):
+    if poison.get("enabled") and (injection or PatternMatcher(patterns)).search(poison.get("example_text", "")):
         violated.append("prompt_injection_detected")
 
     passed = len(violated) == 0
@@ -0,0 +1,33 @@
+from __future__ import annotations
+from typing import Any, Dict, List
+
+from aiv_de.agents.validator_governance import validate_and_veto
+from aiv_de.tools.feasibility_sweep import PLACEMENT_TEMPLATES, SUMMARY_COLUMNS, FeasibilitySweep
+from aiv_de.tools.hardware_catalog import as_catalog
+
+
+def preflight_check(site_profile: Dict[str, Any], hw_db: List[Dict[str, Any]], policy_store: Dict[str, Any]) -> Dict[str, Any]:
+    """Can any option pass validation at all? Decided from the site and catalog alone.
+
+    Sweeps every catalog SKU x placement template through the validator checks. A site is
+    blocked when no single-SKU option passes both: a multi-SKU option fails whenever one
+    of its SKUs would, so no architect proposal could pass either. For a blocked site the
+    feasibility/policy/vetoes come from the least restrictive option (edge placement, a SKU
+    inside the power budget where there is one), i.e. the reasons nothing can succeed."""
+    catalog = as_catalog(hw_db)
+    sweep = FeasibilitySweep([site_profile], catalog, policy_store)
+    viable = 0
+    for row in sweep.summary():
+        cell = dict(zip(SUMMARY_COLUMNS, row))
+        if cell["policy_passed"]:
+            viable += cell["feasible_skus"]
+
+    fits = catalog.within_power_budget(int(site_profile.get("power_budget_w", 50)))
+    records = [r for r in catalog.records if r.hw_id in fits] or catalog.records
+    option = {
+        "option_id": "PREFLIGHT",
+        "placement": dict(PLACEMENT_TEMPLATES["edge"]),
+        "hardware": [records[0].hw_id] if records else [],
+    }
+    result = validate_and_veto(site_profile, option, catalog, policy_store)
+    return {"passed": viable > 0, "viable_options": viable, "option": option, **result}
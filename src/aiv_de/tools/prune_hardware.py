@@ -0,0 +1,44 @@
+from __future__ import annotations
+from typing import Any, Dict, List
+
+from aiv_de.tools.hardware_catalog import HardwareCatalog, HardwareRecord
+
+_COST_BONUS = {"low": 0.5, "mid": 0.25, "high": 0.0}
+
+
+def _preferred_classes(site_profile: Dict[str, Any]) -> List[str]:
+    pref = str(site_profile.get("ops_constraints", {}).get("preferred_deployment", ""))
+    return [p for p in pref.replace("_only", "").split("_or_") if p]
+
+
+def _score(site_profile: Dict[str, Any], r: HardwareRecord, preferred: List[str]) -> float:
+    line = site_profile.get("line_profile", {})
+    load = int(line.get("camera_count", 1)) * int(line.get("fps", 15))
+    heavy = load >= 120 or line.get("resolution_class") == "high"
+    score = 2.0 if r.hw_class in preferred else 0.0
+    score += 1.0 if (r.accel == "gpu") == heavy else 0.0
+    score += _COST_BONUS.get(r.cost_class, 0.0)
+    return score
+
+
+def prune_hardware(site_profile: Dict[str, Any], catalog: HardwareCatalog, top_k: int) -> List[HardwareRecord]:
+    """Deterministic candidate list for the architect: drop SKUs the validator would veto
+    on power or residency, rank the rest against the site, keep the top K."""
+    fits = catalog.within_power_budget(site_profile.get("power_budget_w", 50))
+    residency = site_profile.get("data_residency_required", False)
+    preferred = _preferred_classes(site_profile)
+
+    candidates = [
+        r for r in catalog.records
+        if r.hw_id in fits and not (residency and r.hw_class == "cloud")
+    ]
+    candidates.sort(key=lambda r: (-_score(site_profile, r, preferred), r.power_max_w, r.hw_id))
+    return candidates[:top_k]
+
+
+def compact_hardware(records: List[HardwareRecord]) -> str:
+    """One line per SKU: id|class|accel|mem|power|cost."""
+    return "\n".join(
+        f"{r.hw_id}|{r.hw_class}|{r.accel}|{r.memory_gb:g}|{r.raw.get('power_class_w', '?')}|{r.cost_class}"
+        for r in records
+    )
@@ -0,0 +1,212 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import operator
+import re
+
+Predicate = Callable[[Dict[str, Any]], bool]
+Operand = Callable[[Dict[str, Any]], Any]
+
+
+class RuleSyntaxError(ValueError):
+    pass
+
+
+_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<str>'[^']*'|\"[^\"]*\")"
+    r"|(?P<num>-?\d+(?:\.\d+)?)(?![A-Za-z_])"
+    r"|(?P<op>==|!=|>=|<=|>|<)"
+    r"|(?P<lpar>\()|(?P<rpar>\))"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_.]*)"
+    r")"
+)
+
+_COMPARATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+_CONSTANTS = {"true": True, "false": False, "null": None, "none": None}
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None or m.end() == pos:
+            raise RuleSyntaxError(f"unexpected input at {pos}: {text[pos:pos + 20]!r}")
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == "name" and value.upper() in ("AND", "OR", "NOT"):
+            kind = value.upper()
+        tokens.append((kind, value))
+        pos = m.end()
+    return tokens
+
+
+def _operand(kind: str, value: str) -> Operand:
+    if kind == "str":
+        literal = value[1:-1]
+        return lambda ctx: literal
+    if kind == "num":
+        number = float(value) if "." in value else int(value)
+        return lambda ctx: number
+    if value.lower() in _CONSTANTS:
+        constant = _CONSTANTS[value.lower()]
+        return lambda ctx: constant
+
+    # A name resolves against the context when its head is known; otherwise it is a bare
+    # symbol, so `use_case == safety_line` compares against the string "safety_line".
+    head, *rest = value.split(".")
+
+    def resolve(ctx: Dict[str, Any]) -> Any:
+        if head not in ctx:
+            return value
+        cur = ctx[head]
+        for part in rest:
+            if not isinstance(cur, dict):
+                return None
+            cur = cur.get(part)
+        return cur
+
+    return resolve
+
+
+class _Parser:
+    """expr := and_expr (OR and_expr)*; and_expr := unary (AND unary)*;
+    unary := NOT unary | '(' expr ')' | operand [cmp operand]"""
+
+    def __init__(self, tokens: List[Tuple[str, str]]) -> None:
+        self.tokens = tokens
+        self.i = 0
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.i][0] if self.i < len(self.tokens) else None
+
+    def _take(self) -> Tuple[str, str]:
+        if self.i >= len(self.tokens):
+            raise RuleSyntaxError("unexpected end of condition")
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def parse(self) -> Predicate:
+        pred = self._expr()
+        if self.i != len(self.tokens):
+            raise RuleSyntaxError(f"unexpected token {self.tokens[self.i][1]!r}")
+        return pred
+
+    def _expr(self) -> Predicate:
+        parts = [self._and()]
+        while self._peek() == "OR":
+            self._take()
+            parts.append(self._and())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda ctx: any(p(ctx) for p in parts)
+
+    def _and(self) -> Predicate:
+        parts = [self._unary()]
+        while self._peek() == "AND":
+            self._take()
+            parts.append(self._unary())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda ctx: all(p(ctx) for p in parts)
+
+    def _unary(self) -> Predicate:
+        kind = self._peek()
+        if kind == "NOT":
+            self._take()
+            inner = self._unary()
+            return lambda ctx: not inner(ctx)
+        if kind == "lpar":
+            self._take()
+            inner = self._expr()
+            if self._take()[0] != "rpar":
+                raise RuleSyntaxError("expected ')'")
+            return inner
+
+        kind, value = self._take()
+        if kind not in ("str", "num", "name"):
+            raise RuleSyntaxError(f"expected operand, got {value!r}")
+        left = _operand(kind, value)
+        if self._peek() != "op":
+            return lambda ctx: bool(left(ctx))
+
+        cmp = _COMPARATORS[self._take()[1]]
+        kind, value = self._take()
+        if kind not in ("str", "num", "name"):
+            raise RuleSyntaxError(f"expected operand, got {value!r}")
+        right = _operand(kind, value)
+
+        def compare(ctx: Dict[str, Any]) -> bool:
+            try:
+                return bool(cmp(left(ctx), right(ctx)))
+            except TypeError:
+                return False
+
+        return compare
+
+
+def compile_condition(condition: str) -> Predicate:
+    """Parse a policy condition; raises RuleSyntaxError for free-text conditions.
+
+    Not memoized: CompiledPolicyStore compiles each rule set once per policy file version."""
+    return _Parser(_tokenize(condition)).parse()
+
+
+class CompiledRules:
+    """Rules whose conditions compiled, plus the ones kept as free text (never evaluated)."""
+
+    def __init__(self, rules: List[Tuple[str, str, Predicate]], unparsed: List[Dict[str, str]]) -> None:
+        self.rules = rules
+        self.unparsed = unparsed
+
+    def evaluate(self, ctx: Dict[str, Any]) -> List[Dict[str, str]]:
+        return [{"id": rid, "action": action} for rid, action, pred in self.rules if pred(ctx)]
+
+
+def compile_hitl_rules(hitl_policy: Dict[str, Any]) -> CompiledRules:
+    rules: List[Tuple[str, str, Predicate]] = []
+    unparsed: List[Dict[str, str]] = []
+    for r in (hitl_policy or {}).get("hitl_triggers", []):
+        cond = str(r.get("condition", ""))
+        try:
+            rules.append((r.get("id", cond), r.get("action", ""), compile_condition(cond)))
+        except RuleSyntaxError:
+            unparsed.append({"id": r.get("id", cond), "condition": cond})
+    return CompiledRules(rules, unparsed)
+
+
+def compile_risk_tiers(eu_policy: Dict[str, Any]) -> CompiledRules:
+    """Each trigger that parses becomes a (tier, 'CLASSIFY_<TIER>', predicate) rule."""
+    rules: List[Tuple[str, str, Predicate]] = []
+    unparsed: List[Dict[str, str]] = []
+    for tier, spec in ((eu_policy or {}).get("risk_tiers") or {}).items():
+        for cond in (spec or {}).get("triggers", []):
+            try:
+                rules.append((tier, f"CLASSIFY_{tier.upper()}", compile_condition(str(cond))))
+            except RuleSyntaxError:
+                unparsed.append({"id": tier, "condition": str(cond)})
+    return CompiledRules(rules, unparsed)
+
+
+def rule_context(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten the site profile (and its nested sections) alongside validator/control state."""
+    site = state.get("site_profile", {}) or {}
+    ctx: Dict[str, Any] = {}
+    for value in site.values():
+        if isinstance(value, dict):
+            ctx.update(value)
+    ctx.update(site)
+    # Always present (None when unset) so they never fall back to bare symbols.
+    for key in ("retries", "max_retries", "feasibility", "policy", "vetoes"):
+        ctx[key] = state.get(key)
+    return ctx
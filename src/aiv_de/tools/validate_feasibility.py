@@ -1,14 +1,7 @@
 from __future__ import annotations
 from typing import Any, Dict, List, Tuple
 
-def _power_ok(site_power_w: int, hw: Dict[str, Any]) -> bool:
-    # coarse check: interpret "15-30" as upper bound 30
-    pc = hw.get("power_class_w", "0-0")
-    try:
-        upper = int(str(pc).split("-")[1])
-    except Exception:
-        upper = 9999
-    return upper <= site_power_w
+from aiv_de.tools.hardware_catalog import as_catalog
 
 def validate_feasibility(site_profile: Dict[str, Any], selected_option: Dict[str, Any], hw_db: List[Dict[str, Any]]) -> Dict[str, Any]:
     latency = int(site_profile.get("latency_budget_ms", 120))
@@ -18,9 +11,9 @@ def validate_feasibility(site_profile: Dict[str, Any], selected_option: Dict[str
     fps = int(site_profile.get("line_profile", {}).get("fps", 15))
     res = site_profile.get("line_profile", {}).get("resolution_class", "medium")
 
-    hw_index = {h["hw_id"]: h for h in hw_db}
+    catalog = as_catalog(hw_db)
     hw_ids = selected_option.get("hardware", [])
-    hw = [hw_index.get(x, {"hw_id": x, "missing": True}) for x in hw_ids]
+    hw = [catalog.get(x) or {"hw_id": x, "missing": True} for x in hw_ids]
 
     bottlenecks: List[str] = []
     if any(h.get("missing") for h in hw):
@@ -29,9 +22,10 @@ def validate_feasibility(site_profile: Dict[str, Any], selected_option: Dict[str
     if not hw_ids:
         bottlenecks.append("no_hardware_selected")
 
-    # Power feasibility (edge-only cases)
+    # Power feasibility (edge-only cases); "15-30" is read as upper bound 30
     if any(h.get("class") == "edge" for h in hw):
-        if not all(_power_ok(power_budget, h) for h in hw if h.get("class") == "edge"):
+        fits = catalog.within_power_budget(power_budget)
+        if not all(h["hw_id"] in fits for h in hw if h.get("class") == "edge"):
             bottlenecks.append("power_budget_exceeded_for_edge_hw")
 
     # Latency heuristics: very rough
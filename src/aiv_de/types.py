@@ -1,4 +1,7 @@
-from typing import Any, Dict, List, Literal, Optional, TypedDict
+from typing import Annotated, Any, Dict, List, Literal, NotRequired, Optional, TypedDict
+
+from aiv_de.observability.metrics import merge_metrics
+from aiv_de.observability.trace import TraceEvent, append_trace
 
 UseCase = Literal["safety_line", "quality_inspection"]
 
@@ -6,6 +9,7 @@ UseCase = Literal["safety_line", "quality_inspection"]
 class Veto(TypedDict):
     reason: str
     violated_rules: List[str]
+    option_id: NotRequired[str]  # set by the validate node; lets a retry fix just that option
 
 
 class FeasibilityResult(TypedDict):
@@ -52,8 +56,16 @@ class ADR(TypedDict):
 class AIVDEState(TypedDict, total=False):
     # inputs
     site_profile: Dict[str, Any]
-    hw_db: List[Dict[str, Any]]
-    policies: Dict[str, Any]
+    hw_ref: str                  # refdata key of the hardware catalog
+    policy_ref: str              # refdata key of the policy store
+    hw_db: List[Dict[str, Any]]  # inline alternative to hw_ref (tests, Studio)
+    policies: Dict[str, Any]     # inline alternative to policy_ref
+
+    # pre-flight gate
+    preflight: Optional[Dict[str, Any]]  # {"passed", "viable_options"}; blocked -> straight to HITL
+
+    # speculative mode: architect draft made alongside requirements
+    speculation: Optional[Dict[str, Any]]  # {"accepted", "violated_rules"}; rejected -> architect redraft
 
     # agent outputs
     requirements: Dict[str, Any]
@@ -64,14 +76,33 @@ class AIVDEState(TypedDict, total=False):
     feasibility: Optional[FeasibilityResult]
     policy: Optional[PolicyResult]
     vetoes: List[Veto]
+    hitl_triggers: List[Dict[str, str]]
+    risk_tier: Optional[str]
 
     # control
     retries: int
     max_retries: int
     hitl_required: bool
+    cache_bypass: bool
 
     # artifacts
     run_id: str
     adr: Optional[ADR]
-    trace: List[Dict[str, Any]]
-    metrics: Dict[str, Any]
+    adr_inputs: Optional[str]    # digest of the ADR's inputs; unchanged on revalidate -> narrative reused
+    adr_narrative: Optional[str]  # the LLM-written sections, kept so a reused ADR re-renders only its facts
+    trace: Annotated[List[TraceEvent], append_trace]
+    metrics: Annotated[Dict[str, Any], merge_metrics]
+
+
+# Fallback when the architect produced nothing; also what `run_one --validate-only` checks.
+DEFAULT_OPTION: ArchitectureOption = {
+    "option_id": "DEFAULT_EDGE",
+    "summary": "Default edge-local inference with telemetry-only.",
+    "placement": {"inference": "edge", "storage": "onprem"},
+    "pipeline": ["roi_detection", "tiling_or_downsample", "local_inference", "telemetry_only"],
+    "hardware": ["EDGE_GPU_25W_16GB"],
+    "pros": ["Low latency", "Residency-compliant"],
+    "cons": ["More edge ops overhead"],
+    "risks": ["Drift across sites"],
+    "mitigations": ["Canary rollout + drift monitoring + HITL gates"],
+}
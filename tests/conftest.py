@@ -0,0 +1,13 @@
+from dataclasses import replace
+
+import pytest
+
+from aiv_de import llm_cache
+
+
+@pytest.fixture(autouse=True)
+def _llm_cache_in_tmp(tmp_path, monkeypatch):
+    """Keep the on-disk response cache out of the working tree; bypass runs still write through."""
+    monkeypatch.setattr(llm_cache, "SETTINGS", replace(llm_cache.SETTINGS, llm_cache_path=str(tmp_path / "llm_cache.sqlite")))
+    monkeypatch.setattr(llm_cache, "_cache", None)
+    monkeypatch.setattr(llm_cache, "_cache_built", False)
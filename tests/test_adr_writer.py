@@ -0,0 +1,78 @@
+from aiv_de.agents.adr_writer import (
+    FACT_SECTIONS,
+    NARRATIVE_SECTIONS,
+    adr_sections,
+    narrative_sections,
+    render_adr,
+    write_adr,
+)
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.observability.trace import trace_event
+from aiv_de.types import ADR
+
+SITE = {"site_id": "DE-MUC-01", "country": "DE", "use_case": "safety_line", "latency_budget_ms": 50,
+        "data_residency_required": True}
+OPTION = {"option_id": "OPT-2", "summary": "Edge-local inference.", "placement": {"inference": "edge"},
+          "pipeline": ["roi_detection", "local_inference"], "hardware": ["EDGE_GPU_25W_16GB"]}
+VALIDATION = {
+    "feasibility": {"is_possible": True, "margin": "medium", "bottlenecks": []},
+    "policy": {"passed": True, "violated_rules": [], "required_controls": ["access_logging"], "hitl_action": None},
+    "vetoes": [],
+    "hitl_triggers": [{"id": "safety_review", "action": "require_signoff"}],
+    "risk_tier": "high",
+}
+TRACE = [
+    *trace_event("preflight", "passed", viable_options=4),
+    *trace_event("validate", "validated", duration_s=0.01, evaluated=[
+        {"option_id": "OPT-2", "score": 0.71, "violated_rules": []},
+        {"option_id": "OPT-1", "score": 0.47, "violated_rules": ["no_raw_to_cloud"]},
+    ]),
+]
+REQUIREMENTS = {"rules": ["no raw data to cloud (data residency)"], "assumptions": ["network is segmented"],
+                "missing_info": ["exact camera model"]}
+
+
+def test_fact_sections_come_from_state():
+    adr = adr_sections(SITE, OPTION, VALIDATION, TRACE, REQUIREMENTS)
+    assert set(adr) == set(ADR.__annotations__)
+    assert all(adr[k] for k in FACT_SECTIONS) and not any(adr[k] for k in NARRATIVE_SECTIONS)
+    assert adr["title"] == "Edge inference for DE-MUC-01 (OPT-2)"
+    assert "`EDGE_GPU_25W_16GB`" in adr["decision"]
+    assert adr["alternatives"] == "- OPT-1 (score 0.47): vetoed (`no_raw_to_cloud`)"
+    assert "`safety_review` -> require_signoff" in adr["governance"]
+    assert "`access_logging`" in adr["governance"]
+    assert "- Open: exact camera model" in adr["assumptions"]
+    assert "- `preflight` passed: viable_options=4" in adr["evidence"]
+    assert "duration_s" not in adr["evidence"]
+
+
+def test_narrative_sections_split_by_heading():
+    text = "## Trade-offs\nA.\n\n## Unrelated\nx\n\n## Rollout plan\nB.\n"
+    assert narrative_sections(text) == {"tradeoffs": "A.", "rollout_plan": "B."}
+
+
+def test_llm_gets_a_compact_summary_and_writes_only_the_narrative():
+    seen, streamed = [], []
+
+    class _Spy(FakeChatModel):
+        def _adr(self, user):
+            seen.append(user)
+            return super()._adr(user)
+
+    out = write_adr(_Spy(), SITE, OPTION, VALIDATION, TRACE, requirements=REQUIREMENTS, on_text=streamed.append)
+    assert "viable_options" not in seen[0] and "Site:" not in seen[0]
+    # The facts are handed out first, and the narrative follows them verbatim.
+    assert out["adr"].startswith(streamed[0]) and out["adr"][len(streamed[0]):] == out["narrative"]
+    assert out["narrative"].startswith("## Trade-offs")
+    assert all(out["sections"][k] for k in NARRATIVE_SECTIONS)
+
+
+def test_render_adr_keeps_the_narrative_and_refreshes_the_facts():
+    out = write_adr(FakeChatModel(), SITE, OPTION, VALIDATION, TRACE, requirements=REQUIREMENTS)
+    trace = [*TRACE, *trace_event("adr", "written"), *trace_event("validate", "validated", risk_tier="high")]
+    again = render_adr(out["narrative"], SITE, OPTION, VALIDATION, trace,
+                       requirements={**REQUIREMENTS, "assumptions": ["policy edited"]})
+    assert again["adr"].endswith(out["narrative"])
+    assert all(again["sections"][k] == out["sections"][k] for k in NARRATIVE_SECTIONS)
+    assert "- `adr` written" in again["sections"]["evidence"]
+    assert "- policy edited" in again["sections"]["assumptions"]
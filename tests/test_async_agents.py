@@ -0,0 +1,47 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from aiv_de.agents.adr_writer import awrite_adr
+from aiv_de.agents.architect import apropose_options, arepair_options, propose_options, repair_options
+from aiv_de.agents.requirements_analyst import arun_requirements
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.llm import allm_slot
+from aiv_de.run_one import load_reference_data
+
+
+def test_arun_requirements_uses_ainvoke():
+    out = asyncio.run(arun_requirements(FakeChatModel(), {"site_id": "DE-MUC-01"}, "run-1"))
+    assert out["requirements"]["assumptions"] == ["site network is segmented"]
+
+
+def test_awrite_adr_returns_markdown():
+    llm = FakeListChatModel(responses=["## Consequences\nNone."])
+    out = asyncio.run(awrite_adr(llm, {"site_id": "DE-MUC-01"}, {"option_id": "OPT-1"}, {}, []))
+    assert out["adr"].startswith("# ADR-001") and out["adr"].endswith("## Consequences\nNone.")
+    assert out["sections"]["consequences"] == "None."
+
+
+def test_async_architect_matches_sync():
+    # Both variants drive the same steps; only the invoke differs.
+    site, hw_db = {"site_id": "DE-MUC-01", "power_budget_w": 30}, load_reference_data()[1]
+    llm = FakeChatModel(failure_rate=0.5, veto_rate=0.5)
+    proposed = propose_options(llm, site, {}, hw_db, [], "r")
+    assert asyncio.run(apropose_options(llm, site, {}, hw_db, [], "r")) == proposed
+    vetoes = [{"reason": "x", "violated_rules": ["no_raw_to_cloud"], "option_id": "OPT-1"}]
+    repaired = repair_options(llm, site, hw_db, vetoes, proposed["options"], "r", attempt=1)
+    assert asyncio.run(arepair_options(llm, site, hw_db, vetoes, proposed["options"], "r", attempt=1)) == repaired
+    assert repaired["repair"]["mode"] == "veto"
+
+
+def test_llm_slot_survives_multiple_event_loops():
+    async def hold():
+        async with allm_slot():
+            await asyncio.sleep(0)
+        return True
+
+    async def many():
+        return await asyncio.gather(*[hold() for _ in range(32)])
+
+    assert all(asyncio.run(many()))
+    assert all(asyncio.run(many()))
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from langgraph.checkpoint.base.id import uuid6
+from langgraph.checkpoint.memory import MemorySaver
+
+from aiv_de.bench import _sample_checkpoint
+from aiv_de.graph import _checkpoint_id_at, amake_checkpointer, make_checkpointer, prune_checkpoints
+
+
+def _put(saver, thread_id, cp):
+    saver.put({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}, cp, {}, cp["channel_versions"])
+
+
+def test_sqlite_pragmas(tmp_path):
+    _, conn = make_checkpointer("sqlite", str(tmp_path / "ck.sqlite"))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    conn.close()
+
+
+def test_checkpoint_ids_sort_by_time():
+    assert _checkpoint_id_at(time.time() - 60) < str(uuid6()) < _checkpoint_id_at(time.time() + 60)
+
+
+def test_prune_drops_only_stale_threads(tmp_path):
+    saver, conn = make_checkpointer("sqlite", str(tmp_path / "ck.sqlite"))
+    old = _sample_checkpoint({"site_id": "S"}, 0)
+    old["id"] = _checkpoint_id_at(time.time() - 3600)
+    _put(saver, "old", old)
+    _put(saver, "fresh", _sample_checkpoint({"site_id": "S"}, 0))
+
+    assert prune_checkpoints(conn, retention_s=600) == 1
+    threads = {r[0] for r in conn.execute("SELECT DISTINCT thread_id FROM checkpoints")}
+    assert threads == {"fresh"}
+    conn.close()
+
+
+def test_memory_and_async_backends(tmp_path):
+    saver, conn = make_checkpointer("memory")
+    assert isinstance(saver, MemorySaver) and conn is None
+
+    async def roundtrip():
+        asaver, aconn = await amake_checkpointer("sqlite", str(tmp_path / "ack.sqlite"))
+        cp = _sample_checkpoint({"site_id": "S"}, 3)
+        config = {"configurable": {"thread_id": "t", "checkpoint_ns": ""}}
+        await asaver.aput(config, cp, {}, cp["channel_versions"])
+        got = await asaver.aget_tuple({"configurable": {"thread_id": "t"}})
+        await aconn.close()
+        return got.checkpoint["channel_values"]["retries"]
+
+    assert asyncio.run(roundtrip()) == 3
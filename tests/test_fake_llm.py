@@ -0,0 +1,41 @@
+
+from aiv_de.agents.architect import propose_options
+from aiv_de.agents.requirements_analyst import run_requirements
+from aiv_de.bench import percentile
+from aiv_de.config import SETTINGS
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.tools.hardware_catalog import load_hardware_catalog
+
+SITE = {"site_id": "DE-MUC-01", "power_budget_w": 30, "data_residency_required": True}
+
+
+def _hw():
+    return load_hardware_catalog(f"{SETTINGS.data_dir}/hardware_specs.json")
+
+
+def test_architect_gets_schema_valid_options_from_candidates():
+    out = propose_options(FakeChatModel(), SITE, {}, _hw(), [], "r")
+    assert len(out["options"]) == 3
+    assert all(o["placement"]["inference"] == "edge" for o in out["options"])
+    assert "EDGE_GPU_60W_32GB" not in {h for o in out["options"] for h in o["hardware"]}
+
+
+def test_veto_and_failure_knobs():
+    vetoed = propose_options(FakeChatModel(veto_rate=1.0), SITE, {}, _hw(), [], "r")
+    assert all(o["placement"]["inference"] == "cloud" for o in vetoed["options"])
+
+    failed = propose_options(FakeChatModel(failure_rate=1.0), SITE, {}, _hw(), [], "r")
+    assert failed["options"] == [] and failed["error"]
+
+
+def test_requirements_json_and_determinism():
+    a = run_requirements(FakeChatModel(), SITE, "r")
+    b = run_requirements(FakeChatModel(), SITE, "r")
+    assert a == b
+    assert set(a["requirements"]) == {"constraints", "rules", "missing_info", "assumptions"}
+    assert "exact camera model" in a["requirements"]["missing_info"]
+
+
+def test_percentile():
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5
+    assert percentile([5.0], 0.99) == 5.0
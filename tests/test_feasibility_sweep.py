@@ -0,0 +1,88 @@
+import csv
+import sys
+
+import pytest
+
+from aiv_de.run_one import load_reference_data
+from aiv_de.sweep import main as sweep_main
+from aiv_de.tools.feasibility_sweep import PLACEMENT_TEMPLATES, ROW_COLUMNS, FeasibilitySweep
+from aiv_de.tools.policy_check import policy_check
+from aiv_de.tools.validate_feasibility import validate_feasibility
+
+
+def _variants(sites, hw_db):
+    # Real sites plus edits that flip every check: budgets around SKU ratings, strict safety, 12 high-res cams.
+    out = list(sites)
+    for i, s in enumerate(sites):
+        out.append({**s, "site_id": f"{s['site_id']}-v", "power_budget_w": [8, 10, 25, 30, 60][i % 5],
+                    "use_case": "safety_line", "latency_budget_ms": 40 + 5 * (i % 3),
+                    "line_profile": {**s.get("line_profile", {}), "camera_count": 12, "fps": 30,
+                                     "resolution_class": "high"}})
+    return out, list(hw_db) + [{"hw_id": "EDGE_BAD", "class": "edge", "power_class_w": "n/a"}]
+
+
+def test_rows_match_per_cell_validation():
+    sites, hw_db, policies = load_reference_data()
+    sites, hw_db = _variants(sites, hw_db)
+    sweep = FeasibilitySweep(sites, hw_db, policies)
+    by_id = {s["site_id"]: s for s in sites}
+    rows = list(sweep.rows())
+    assert len(rows) == len(sites) * len(hw_db) * len(PLACEMENT_TEMPLATES)
+    for row in rows:
+        r = dict(zip(ROW_COLUMNS, row))
+        option = {"hardware": [r["hw_id"]], "placement": PLACEMENT_TEMPLATES[r["template"]]}
+        feas = validate_feasibility(by_id[r["site_id"]], option, hw_db)
+        pol = policy_check(by_id[r["site_id"]], option, policies)
+        assert r["is_possible"] == feas["is_possible"]
+        assert r["margin"] == feas["margin"]
+        assert r["bottlenecks"] == ";".join(feas["bottlenecks"])
+        assert r["policy_passed"] == pol["passed"]
+        assert r["violated_rules"] == ";".join(pol["violated_rules"])
+
+
+def test_summary_counts_agree_with_rows():
+    sites, hw_db, policies = load_reference_data()
+    sweep = FeasibilitySweep(sites, hw_db, policies)
+    feasible = {}
+    for site_id, _, template, ok, *_ in sweep.rows():
+        feasible[(site_id, template)] = feasible.get((site_id, template), 0) + ok
+    for site_id, template, skus, n_ok, *_ in sweep.summary():
+        assert skus == len(hw_db)
+        assert n_ok == feasible[(site_id, template)]
+
+
+def test_unknown_template_rejected():
+    with pytest.raises(ValueError):
+        FeasibilitySweep([], [], {}, ["orbit"])
+
+
+def test_cli_writes_csv(tmp_path, capsys):
+    sweep_main(["--sites", "DE-MUC-01,POISON-12", "--templates", "edge,cloud", "--rows", "--out-dir", str(tmp_path)])
+    with open(tmp_path / "sweep_summary.csv", encoding="utf-8") as f:
+        summary = list(csv.DictReader(f))
+    assert [(r["site_id"], r["template"]) for r in summary] == [
+        ("DE-MUC-01", "edge"), ("DE-MUC-01", "cloud"), ("POISON-12", "edge"), ("POISON-12", "cloud"),
+    ]
+    assert "prompt_injection_detected" in summary[2]["violated_rules"]
+    assert (tmp_path / "sweep_rows.csv").exists()
+
+
+def test_cli_writes_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    sweep_main(["--sites", "DE-MUC-01,POISON-12", "--templates", "edge,cloud", "--rows", "--format", "parquet",
+                "--out-dir", str(tmp_path)])
+    sweep_main(["--sites", "DE-MUC-01,POISON-12", "--templates", "edge,cloud", "--rows", "--out-dir", str(tmp_path)])
+    table = pq.read_table(tmp_path / "sweep_rows.parquet")
+    with open(tmp_path / "sweep_rows.csv", encoding="utf-8") as f:
+        expected = list(csv.DictReader(f))
+    assert table.column_names == list(ROW_COLUMNS)
+    assert [{k: str(v) for k, v in r.items()} for r in table.to_pylist()] == expected
+
+
+def test_parquet_without_pyarrow_is_a_cli_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "pyarrow.parquet", None)
+    with pytest.raises(SystemExit):
+        sweep_main(["--sites", "DE-MUC-01", "--format", "parquet", "--out-dir", str(tmp_path)])
+    assert "pyarrow" in capsys.readouterr().out
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from aiv_de import run_fleet as run_fleet_mod
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.llm import reset_llm, set_llm
+from aiv_de.run_fleet import classify_outcome, parse_args, resolve_site_ids, run_fleet, summarize
+from aiv_de.run_one import load_reference_data, site_thread_id
+
+KNOWN = ["DE-MUC-01", "POISON-12", "IMPOSSIBLE-11"]
+
+
+def test_sites_all_expands_to_catalog():
+    args = parse_args([])
+    assert resolve_site_ids(args.sites, args.from_file, KNOWN) == KNOWN
+
+
+def test_sites_comma_list():
+    args = parse_args(["--sites", "POISON-12, DE-MUC-01"])
+    assert resolve_site_ids(args.sites, args.from_file, KNOWN) == ["POISON-12", "DE-MUC-01"]
+
+
+def test_sites_from_file(tmp_path):
+    ids = tmp_path / "ids.txt"
+    ids.write_text("# planning cycle\nIMPOSSIBLE-11\n\nDE-MUC-01\n", encoding="utf-8")
+    args = parse_args(["--from-file", str(ids)])
+    assert resolve_site_ids(args.sites, args.from_file, KNOWN) == ["IMPOSSIBLE-11", "DE-MUC-01"]
+
+
+def test_unknown_site_raises():
+    with pytest.raises(ValueError):
+        resolve_site_ids("NOPE-99", None, KNOWN)
+
+
+def test_classify_and_summarize():
+    results = [
+        {"site_id": "A", "outcome": classify_outcome({"retries": 0, "trace": [{"node": "adr"}]}), "wall_s": 1.0},
+        {"site_id": "B", "outcome": classify_outcome({"retries": 1, "trace": [{"node": "adr"}]}), "wall_s": 2.0},
+        {"site_id": "C", "outcome": classify_outcome({"retries": 2, "trace": [{"node": "hitl"}]}), "wall_s": 3.0},
+    ]
+    summary = summarize(results, 3.5)
+    assert summary["counts"] == {"passed": 1, "vetoed": 1, "escalated": 1, "error": 0}
+
+
+def test_run_fleet_pulls_sites_lazily(tmp_path, monkeypatch):
+    sites, hw_db, policies = load_reference_data()
+    pulled, done, lead = [0], [0], []
+
+    def stream():
+        for i in range(12):
+            pulled[0] += 1
+            lead.append(pulled[0] - done[0])
+            yield {**sites[i % len(sites)], "site_id": f"S{i:02d}"}
+
+    async def fake_run_site(app, site, *args):
+        await asyncio.sleep(0)
+        done[0] += 1
+        return {"site_id": site["site_id"], "outcome": "passed", "wall_s": 0.0}
+
+    monkeypatch.setattr(run_fleet_mod, "_run_site", fake_run_site)
+    summary = asyncio.run(run_fleet(stream(), hw_db, policies, workers=2, out_dir=str(tmp_path),
+                                    checkpoint_mode="off", backend="memory"))
+    assert [r["site_id"] for r in summary["per_site"]] == [f"S{i:02d}" for i in range(12)]
+    # Two in the workers, two in the queue, one in the producer's hand.
+    assert max(lead) <= 5
+
+
+def test_artifact_write_failure_is_that_sites_error(tmp_path, monkeypatch):
+    sites, hw_db, policies = load_reference_data()
+
+    def write_artifacts(site_id, out, out_dir):
+        if site_id == sites[0]["site_id"]:
+            raise OSError("disk full")
+
+    monkeypatch.setattr(run_fleet_mod, "write_artifacts", write_artifacts)
+    set_llm(FakeChatModel())
+    try:
+        summary = asyncio.run(run_fleet(sites[:2], hw_db, policies, workers=2, out_dir=str(tmp_path),
+                                        checkpoint_mode="off", backend="memory"))
+    finally:
+        reset_llm()
+    first, second = summary["per_site"]
+    assert first["outcome"] == "error" and first["error"] == "OSError: disk full"
+    assert second["outcome"] != "error"
+
+
+def test_fleet_runs_on_the_site_thread(tmp_path, monkeypatch):
+    sites, hw_db, policies = load_reference_data()
+    apps = []
+    real = run_fleet_mod.acompile_graph
+
+    async def keep(*args):
+        apps.append(await real(*args))
+        return apps[-1]
+
+    async def keep_open(app):
+        pass
+
+    monkeypatch.setattr(run_fleet_mod, "acompile_graph", keep)
+    monkeypatch.setattr(run_fleet_mod, "aclose_graph", keep_open)
+    set_llm(FakeChatModel())
+    try:
+        # The second run of the site starts its thread over instead of appending to it.
+        asyncio.run(run_fleet([sites[0], sites[0]], hw_db, policies, workers=1, out_dir=str(tmp_path),
+                              checkpoint_mode="every", backend="memory"))
+    finally:
+        reset_llm()
+    state = apps[0].get_state({"configurable": {"thread_id": site_thread_id(sites[0])}})
+    assert [t.node for t in state.values["trace"]].count("preflight") == 1
@@ -0,0 +1,49 @@
+import math
+
+from aiv_de.config import SETTINGS
+from aiv_de.tools.hardware_catalog import HardwareCatalog, load_hardware_catalog, parse_power_range
+from aiv_de.tools.lookup_hardware import lookup_hardware
+
+
+def _catalog():
+    return load_hardware_catalog(f"{SETTINGS.data_dir}/hardware_specs.json")
+
+
+def test_parse_power_range():
+    assert parse_power_range("15-30") == (15.0, 30.0)
+    assert parse_power_range("25") == (0.0, math.inf)
+    assert parse_power_range("n/a")[1] == math.inf
+
+
+def test_single_value_power_class_never_fits():
+    cat = HardwareCatalog([{"hw_id": "E25", "class": "edge", "power_class_w": "25"}])
+    assert cat.within_power_budget(1000) == frozenset()
+
+
+def test_catalog_is_cached_and_still_a_list():
+    cat = _catalog()
+    assert cat is _catalog()
+    assert isinstance(cat, list) and cat[0]["hw_id"] == "EDGE_CPU_TINY_8W"
+
+
+def test_range_query():
+    ids = [r.hw_id for r in _catalog().query(hw_class="edge", accel="gpu", max_power_w=30, min_memory_gb=16)]
+    assert ids == ["EDGE_GPU_25W_16GB"]
+    assert {r.hw_id for r in _catalog().query(cost_class="high")} == {"ONPREM_GPU_1U_SINGLE", "ONPREM_GPU_2U_REDUNDANT"}
+
+
+def test_power_fits_by_site_matches_edge_power_rule():
+    cat = HardwareCatalog([
+        {"hw_id": "E10", "class": "edge", "power_class_w": "5-10"},
+        {"hw_id": "E30", "class": "edge", "power_class_w": "15-30"},
+        {"hw_id": "S1", "class": "onprem", "power_class_w": "200-400"},
+    ])
+    m = cat.power_fits_by_site([{"site_id": "A", "power_budget_w": 30}, {"site_id": "B", "power_budget_w": 8}])
+    assert m["A"] == {"E10", "E30", "S1"}
+    assert m["B"] == {"S1"}
+
+
+def test_lookup_marks_missing():
+    out = lookup_hardware(_catalog(), ["EDGE_CPU_25W", "NOPE"])
+    assert out[0]["memory_gb"] == 16
+    assert out[1] == {"hw_id": "NOPE", "missing": True}
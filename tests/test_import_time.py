@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+HEAVY = ("langchain", "langgraph", "langsmith", "openai", "httpx")
+# Generous: a cold import is ~0.1 s here; pulling LangChain back in costs well over 1 s.
+BUDGET_US = 600_000
+
+
+def _importtime(code: str) -> dict:
+    src = os.path.join(os.path.dirname(__file__), "..", "src")
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([src, os.environ.get("PYTHONPATH", "")])}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, env=env, check=True)
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cum, name = (p.strip() for p in line[len("import time:"):].split("|"))
+            if cum.isdigit():
+                cumulative[name] = int(cum)
+    return cumulative
+
+
+def test_run_one_import_is_light():
+    mods = _importtime("import aiv_de.run_one")
+    assert not [m for m in mods if m.split(".")[0] in HEAVY]
+    assert mods["aiv_de.run_one"] < BUDGET_US
+
+
+def test_validate_only_path_never_imports_langchain():
+    mods = _importtime(
+        "import aiv_de.run_one as r\n"
+        "sites, hw, pol = r.load_reference_data()\n"
+        "r.validate_only(sites[0], hw, pol)"
+    )
+    assert not [m for m in mods if m.split(".")[0] in HEAVY]
@@ -0,0 +1,76 @@
+import time
+
+from aiv_de.agents.requirements_analyst import run_requirements
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.llm_cache import CacheView, MemoryLRUCache, SqliteCache, TieredCache, cache_key
+
+
+def test_key_depends_on_model_system_and_user():
+    base = cache_key("gpt-4o-mini", "sys", ["hello"])
+    assert base == cache_key("gpt-4o-mini", "sys", ["hello"])
+    assert base != cache_key("gpt-4o", "sys", ["hello"])
+    assert base != cache_key("gpt-4o-mini", "sys2", ["hello"])
+    assert base != cache_key("gpt-4o-mini", "sys", ["hello!"])
+
+
+def test_memory_tier_evicts_least_recently_used():
+    c = MemoryLRUCache(max_entries=2, ttl_s=0)
+    c.set("a", "1")
+    c.set("b", "2")
+    assert c.get("a") == "1"
+    c.set("c", "3")
+    assert c.get("b") is None
+    assert c.get("a") == "1" and c.get("c") == "3"
+
+
+def test_ttl_expires_entries(tmp_path):
+    mem = MemoryLRUCache(max_entries=8, ttl_s=0.01)
+    disk = SqliteCache(str(tmp_path / "c.sqlite"), max_bytes=1 << 20, ttl_s=0.01)
+    for tier in (mem, disk):
+        tier.set("k", "v")
+    time.sleep(0.02)
+    assert mem.get("k") is None
+    assert disk.get("k") is None
+
+
+def test_sqlite_tier_evicts_by_size(tmp_path):
+    disk = SqliteCache(str(tmp_path / "c.sqlite"), max_bytes=10, ttl_s=0)
+    disk.set("a", "x" * 6)
+    disk.set("b", "y" * 6)
+    assert disk.get("a") is None
+    assert disk.get("b") == "y" * 6
+
+
+def test_tiered_promotes_persistent_hits(tmp_path):
+    mem = MemoryLRUCache(max_entries=8, ttl_s=0)
+    disk = SqliteCache(str(tmp_path / "c.sqlite"), max_bytes=1 << 20, ttl_s=0)
+    disk.set("k", "v")
+    assert TieredCache(mem, disk).get("k") == "v"
+    assert mem.get("k") == "v"
+
+
+class _Notes(FakeChatModel):
+    note: str = ""
+
+    def _requirements(self, user):
+        return {"missing_info": [], "assumptions": [self.note]}
+
+
+def test_requirements_hit_skips_llm_and_bypass_regenerates():
+    backend = MemoryLRUCache(max_entries=8, ttl_s=0)
+    site = {"site_id": "DE-MUC-01"}
+
+    def assumptions(note, cache):
+        return run_requirements(_Notes(note=note), site, "r", cache=cache)["requirements"]["assumptions"]
+
+    first = CacheView(backend)
+    assert assumptions("one", first) == ["one"]
+    assert first.counters() == {"hits": 0, "misses": 1, "bypass": False}
+
+    second = CacheView(backend)
+    assert assumptions("two", second) == ["one"]
+    assert second.hits == 1
+
+    forced = CacheView(backend, bypass=True)
+    assert assumptions("three", forced) == ["three"]
+    assert "three" in CacheView(backend).get(next(iter(backend._data)))
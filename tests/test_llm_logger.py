@@ -0,0 +1,39 @@
+import json
+
+from aiv_de.observability.llm_logger import SafeLLMLogger, _writer_for, close_all
+
+
+def _events(tmp_path):
+    return [json.loads(line) for f in sorted(tmp_path.glob("llm-*.jsonl")) for line in f.read_text("utf-8").splitlines()]
+
+
+def test_events_land_in_shared_segment_redacted(tmp_path):
+    a = SafeLLMLogger(str(tmp_path), enabled=True, max_chars=40)
+    b = SafeLLMLogger(str(tmp_path), enabled=True, max_chars=40)
+    a.log(run_id="r1", agent="x", phase="p", prompt="key sk-" + "A" * 30 + " tail " * 100, response="ok")
+    b.log(run_id="r2", agent="y", phase="p", prompt="mail ops@example.com", response="ok")
+    a.flush()
+
+    events = _events(tmp_path)
+    assert [e["run_id"] for e in events] == ["r1", "r2"]
+    assert len(list(tmp_path.glob("llm-*.jsonl"))) == 1
+    assert events[0]["prompt_preview"].startswith("key [REDACTED_API_KEY]")
+    assert len(events[0]["prompt_preview"]) == 40
+    assert "sk-" not in events[0]["prompt_preview"]
+    assert events[1]["prompt_preview"] == "mail [REDACTED_EMAIL]"
+    close_all()
+
+
+def test_size_rotation(tmp_path):
+    log = SafeLLMLogger(str(tmp_path), enabled=True, segment_bytes=1)
+    for i in range(3):
+        log.log(run_id=f"r{i}", agent="x", phase="p", prompt="p", response="r")
+        log.flush()
+    assert len(_writer_for(str(tmp_path), 2000, 1, 3600).segments) == 3
+    assert [e["run_id"] for e in _events(tmp_path)] == ["r0", "r1", "r2"]
+    close_all()
+
+
+def test_disabled_logger_writes_nothing(tmp_path):
+    SafeLLMLogger(str(tmp_path / "off")).log(run_id="r", agent="x", phase="p", prompt="p", response="r")
+    assert not (tmp_path / "off").exists()
@@ -0,0 +1,35 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from aiv_de.graph import n_revise, n_select
+from aiv_de.llm import USAGE_HANDLER
+from aiv_de.observability.metrics import measure, merge_metrics, metrics_to_prometheus, run_totals
+
+
+def test_untimed_nodes_now_report_wall_time():
+    out = n_select({"options": [], "hw_db": []})
+    node = out["metrics"]["nodes"]["select"]
+    assert node["calls"] == 1 and node["wall_s"] >= 0 and node["llm_calls"] == 0
+
+
+def test_reducer_accumulates_nodes_and_retries():
+    m = merge_metrics(None, n_revise({"retries": 0, "vetoes": []})["metrics"])
+    m = merge_metrics(m, n_revise({"retries": 1, "vetoes": []})["metrics"])
+    assert m["retries"] == 2
+    assert m["nodes"]["revise"]["calls"] == 2
+    assert run_totals(m)["calls"] == 2
+
+
+def test_llm_time_is_attributed_to_the_current_node():
+    llm = FakeListChatModel(responses=["ok"], callbacks=[USAGE_HANDLER])
+    with measure("requirements") as m:
+        llm.invoke("hi")
+    assert m.llm_calls == 1
+    assert m.wall_s >= m.llm_s and m.local_s >= 0
+
+
+def test_prometheus_export():
+    metrics = {"nodes": {"architect": {"calls": 2, "prompt_tokens": 700}}, "retries": 1}
+    text = metrics_to_prometheus([{"labels": {"site_id": "DE-MUC-01"}, "metrics": metrics}])
+    assert 'aivde_node_prompt_tokens_total{site_id="DE-MUC-01",node="architect"} 700' in text
+    assert 'aivde_run_retries_total{site_id="DE-MUC-01"} 1' in text
+    assert "# TYPE aivde_node_wall_seconds_total counter" in text
@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from aiv_de.config import SETTINGS
+from aiv_de.graph import load_policy_store, n_validate
+
+
+def _option(option_id, placement, hardware):
+    return {
+        "option_id": option_id,
+        "summary": option_id,
+        "placement": placement,
+        "pipeline": ["local_inference"],
+        "hardware": hardware,
+        "pros": ["x"],
+        "cons": ["x"],
+        "risks": ["x"],
+        "mitigations": ["x"],
+    }
+
+
+def _state(site_id, options):
+    data = Path(SETTINGS.data_dir)
+    sites = json.load(open(data / "sites.json", "r", encoding="utf-8"))
+    hw_db = json.load(open(data / "hardware_specs.json", "r", encoding="utf-8"))
+    return {
+        "site_profile": next(s for s in sites if s["site_id"] == site_id),
+        "hw_db": hw_db,
+        "policies": load_policy_store(SETTINGS.policy_dir),
+        "options": options,
+        "selected_option": options[0],
+        "retries": 0,
+        "max_retries": 2,
+    }
+
+
+def test_passing_later_option_is_selected_without_retry():
+    state = _state("DE-MUC-01", [
+        _option("OPT-1", {"inference": "cloud"}, ["EDGE_GPU_25W_16GB"]),
+        _option("OPT-2", {"inference": "edge"}, ["EDGE_GPU_60W_32GB"]),
+        _option("OPT-3", {"inference": "edge", "storage": "onprem"}, ["EDGE_GPU_25W_16GB"]),
+    ])
+    out = n_validate(state)
+    assert out["vetoes"] == []
+    assert out["selected_option"]["option_id"] == "OPT-3"
+    assert out["feasibility"]["is_possible"] is True
+
+
+def test_all_vetoed_reports_every_option():
+    state = _state("DE-MUC-01", [
+        _option("OPT-1", {"inference": "cloud"}, ["EDGE_GPU_25W_16GB"]),
+        _option("OPT-2", {"inference": "edge"}, ["EDGE_GPU_60W_32GB"]),
+    ])
+    out = n_validate(state)
+    reasons = [v["reason"] for v in out["vetoes"]]
+    assert any("OPT-1" in r for r in reasons)
+    assert any("OPT-2" in r for r in reasons)
+    assert out["hitl_required"] is False
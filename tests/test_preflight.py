@@ -0,0 +1,62 @@
+import pytest
+
+from aiv_de import graph
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.graph import build_graph, route_after_preflight
+from aiv_de.llm import reset_llm, set_llm
+from aiv_de.run_one import build_inputs, load_reference_data
+from aiv_de.tools.preflight import preflight_check
+
+
+@pytest.fixture(scope="module")
+def ref():
+    sites, hw_db, policies = load_reference_data()
+    return {s["site_id"]: s for s in sites}, hw_db, policies
+
+
+def test_only_hopeless_sites_are_blocked(ref):
+    sites, hw_db, policies = ref
+    blocked = {sid for sid, s in sites.items() if not preflight_check(s, hw_db, policies)["passed"]}
+    assert blocked == {"IMPOSSIBLE-11", "POISON-12"}
+
+
+def test_blocked_site_reports_option_independent_reasons(ref):
+    sites, hw_db, policies = ref
+    pf = preflight_check(sites["IMPOSSIBLE-11"], hw_db, policies)
+    assert pf["feasibility"]["bottlenecks"] == ["multi_cam_high_res_high_fps_underpowered"]
+    pf = preflight_check(sites["POISON-12"], hw_db, policies)
+    assert pf["policy"]["violated_rules"] == ["prompt_injection_detected"]
+
+
+def test_no_sku_within_budget_blocks(ref):
+    sites, _, policies = ref
+    hw_db = [{"hw_id": "EDGE_BIG", "class": "edge", "power_class_w": "100-200"}]
+    pf = preflight_check({**sites["FR-LIL-05"], "power_budget_w": 20}, hw_db, policies)
+    assert not pf["passed"]
+    assert pf["feasibility"]["bottlenecks"] == ["power_budget_exceeded_for_edge_hw"]
+
+
+def test_route_after_preflight():
+    assert route_after_preflight({}) == "requirements"
+    assert route_after_preflight({"preflight": {"passed": True}}) == "requirements"
+    assert route_after_preflight({"preflight": {"passed": False}}) == "hitl"
+
+
+@pytest.mark.parametrize("site_id", ["IMPOSSIBLE-11", "POISON-12"])
+def test_hopeless_site_escalates_without_llm(ref, monkeypatch, site_id):
+    sites, hw_db, policies = ref
+
+    def no_llm(*a, **k):
+        raise AssertionError("LLM called for a site pre-flight should block")
+
+    for name in ("run_requirements", "propose_options", "write_adr"):
+        monkeypatch.setattr(graph, name, no_llm)
+    set_llm(FakeChatModel())
+    try:
+        out = build_graph().compile().invoke(build_inputs(sites[site_id], hw_db, policies, "t", cache_bypass=True))
+    finally:
+        reset_llm()
+    assert [(t.node, t.event) for t in out["trace"]] == [("preflight", "blocked"), ("hitl", "escalated")]
+    assert out["hitl_required"] and out["vetoes"]
+    assert "pre-flight" in out["adr"]
+    assert set(out["metrics"]["nodes"]) == {"preflight", "hitl"}
@@ -0,0 +1,29 @@
+from aiv_de.config import SETTINGS
+from aiv_de.tools.hardware_catalog import HardwareCatalog, load_hardware_catalog
+from aiv_de.tools.prune_hardware import compact_hardware, prune_hardware
+
+
+def test_drops_skus_over_power_budget():
+    cat = load_hardware_catalog(f"{SETTINGS.data_dir}/hardware_specs.json")
+    site = {"power_budget_w": 30, "ops_constraints": {"preferred_deployment": "edge"},
+            "line_profile": {"camera_count": 6, "fps": 30, "resolution_class": "high"}}
+    ids = [r.hw_id for r in prune_hardware(site, cat, top_k=10)]
+    assert "EDGE_GPU_60W_32GB" not in ids
+    assert ids[0] == "EDGE_GPU_25W_16GB"
+
+
+def test_residency_drops_cloud_and_top_k_caps():
+    cat = HardwareCatalog([
+        {"hw_id": "CLOUD_GPU", "class": "cloud", "accel": "gpu", "power_class_w": "0-0"},
+        {"hw_id": "S1", "class": "onprem", "accel": "gpu", "power_class_w": "200-400"},
+        {"hw_id": "S2", "class": "onprem", "accel": "cpu", "power_class_w": "200-400"},
+    ])
+    site = {"power_budget_w": 50, "data_residency_required": True}
+    picked = prune_hardware(site, cat, top_k=1)
+    assert len(picked) == 1 and picked[0].hw_id != "CLOUD_GPU"
+
+
+def test_compact_format():
+    cat = HardwareCatalog([{"hw_id": "E1", "class": "edge", "accel": "gpu", "memory_gb": 16,
+                            "power_class_w": "15-30", "cost_class": "mid"}])
+    assert compact_hardware(cat.records) == "E1|edge|gpu|16|15-30|mid"
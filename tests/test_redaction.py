@@ -0,0 +1,54 @@
+import json
+
+from aiv_de.observability.redaction import RedactionRule, Redactor, redact, redact_obj
+from aiv_de.observability.trace import trace_event
+from aiv_de.run_one import write_artifacts
+
+
+def test_rules_in_one_pass():
+    text = "key sk-" + "A" * 24 + ", mail ops@example.com, call +49 89 1234 5678, OPENAI_API_KEY=abc C:\\Users\\me\\x.txt"
+    assert redact(text) == (
+        "key [REDACTED_API_KEY], mail [REDACTED_EMAIL], call [REDACTED_PHONE], "
+        "OPENAI_API_KEY=[REDACTED] [REDACTED_PATH]"
+    )
+
+
+def test_phone_rule_leaves_numeric_data_alone():
+    for keep in ("15-30", "2026-10-18", "1190.83226", "version 1.2.3", "power_budget_w: 30",
+                 "100000-200000", "18.10.2026", "10.200.300"):
+        assert redact(keep) == keep
+    for phone in ("(555) 123-4567", "555.123.4567", "+1 555 123 4567"):
+        assert redact(phone) == "[REDACTED_PHONE]"
+
+
+def test_phone_rule_masks_single_and_unseparated_numbers():
+    assert redact("0170 1234567") == "[REDACTED_PHONE]"
+    assert redact("Tel: 0891234567") == "Tel: [REDACTED_PHONE]"
+    assert redact("call 0170-1234567 now") == "call [REDACTED_PHONE] now"
+    assert redact("+4989123456") == "[REDACTED_PHONE]"
+
+
+def test_phone_rule_masks_long_digit_runs():
+    for run in ("1234567890123456", "4111 1111 1111 1111", "4111-1111-1111-1111-1111-1111-11", "9" * 40):
+        assert redact(f"id {run}.") == "id [REDACTED_PHONE]."
+
+
+def test_callable_replacement_can_keep_match():
+    r = Redactor([RedactionRule("num", r"\d+", lambda m: None if m == "7" else "#")])
+    assert r.redact("1 7 42") == "# 7 #"
+
+
+def test_adversarial_payloads_are_handled():
+    # Timing lives in `bench --redaction-kb`; only the bare digit run is a secret.
+    for unit in ("a", "1 2.3-4 ", "a.b@"):
+        text = unit * (200_000 // len(unit))
+        assert redact(text) == text
+    assert redact("1" * 200_000) == "[REDACTED_PHONE]"
+
+
+def test_artifacts_are_redacted(tmp_path):
+    out = {"adr": "Contact ops@example.com", "trace": trace_event("hitl", "escalated", note="sk-" + "B" * 24)}
+    adr_path, trace_path = write_artifacts("S", out, str(tmp_path), redacted=True)
+    assert open(adr_path, encoding="utf-8").read() == "Contact [REDACTED_EMAIL]"
+    assert json.load(open(trace_path, encoding="utf-8"))[0]["note"] == "[REDACTED_API_KEY]"
+    assert redact_obj({"a": ["x@y.io", 3]}) == {"a": ["[REDACTED_EMAIL]", 3]}
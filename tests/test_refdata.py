@@ -0,0 +1,50 @@
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+
+from aiv_de import refdata
+from aiv_de.config import SETTINGS
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.graph import build_graph, compile_graph, run_options
+from aiv_de.llm import reset_llm, set_llm
+from aiv_de.run_one import build_inputs
+from aiv_de.tools.hardware_catalog import HardwareCatalog, load_hardware_catalog
+
+HW = [{"hw_id": "EDGE_GPU_25W_16GB", "class": "edge", "power_class_w": "15-30"}]
+
+
+def test_register_is_content_addressed():
+    a = refdata.register_hardware(HW)
+    b = refdata.register_hardware([dict(h) for h in HW])
+    assert a == b and a.startswith("hw:")
+    assert isinstance(refdata.resolve(a), HardwareCatalog)
+    assert refdata.register_policies({"x": 1}) != refdata.register_policies({"x": 2})
+
+
+def test_state_resolves_refs_or_inline_values():
+    inputs = build_inputs({"site_id": "S"}, HW, {"p": {}}, "run")
+    assert "hw_db" not in inputs and "policies" not in inputs
+    assert refdata.hardware_of(inputs).get("EDGE_GPU_25W_16GB") == HW[0]
+    assert refdata.policies_of(inputs) == {"p": {}}
+    assert refdata.policies_of({"policies": {"inline": True}}) == {"inline": True}
+
+
+def test_checkpoints_carry_refs_not_reference_data():
+    hw = load_hardware_catalog(f"{SETTINGS.data_dir}/hardware_specs.json")
+    app = build_graph().compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "refdata-test"}}
+    set_llm(FakeChatModel())
+    try:
+        inputs = build_inputs({"site_id": "S", "power_budget_w": 30}, hw, {}, "run", cache_bypass=True)
+        app.invoke(inputs, config)
+    finally:
+        reset_llm()
+    values = app.get_state(config).values
+    assert values["adr"] and values["hw_ref"] == inputs["hw_ref"]
+    assert "hw_db" not in values and "policies" not in values
+
+
+def test_checkpoint_modes():
+    off = compile_graph("off")
+    assert off.checkpointer is None and run_options(off) == {}
+    with pytest.raises(ValueError):
+        compile_graph("sometimes")
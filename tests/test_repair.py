@@ -0,0 +1,119 @@
+from aiv_de import llm as llm_mod
+from aiv_de.agents.architect import propose_options, repair_options
+from aiv_de.bench import _retry_prompt_tokens
+from aiv_de.config import SETTINGS
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.graph import build_graph, n_select
+from aiv_de.llm import reset_llm, set_llm
+from aiv_de.observability.tokens import count_tokens
+from aiv_de.run_one import build_inputs, load_reference_data
+from aiv_de.tools.hardware_catalog import load_hardware_catalog
+from aiv_de.types import DEFAULT_OPTION
+
+SITE = {"site_id": "DE-MUC-01", "power_budget_w": 30, "data_residency_required": True}
+
+
+class _HalfBroken(FakeChatModel):
+    """First answer has one schema-invalid option; the repair call gets it fixed."""
+
+    prompts: list = []
+
+    def _options(self, user, rng):
+        self.prompts.append(user)
+        good = super()._options(user, rng)["options"]
+        if "Schema example" in user:
+            return {"options": [{**good[0], "placement": "edge"}, good[1]]}
+        return {"options": good[:1]}
+
+
+def _hw():
+    return load_hardware_catalog(f"{SETTINGS.data_dir}/hardware_specs.json")
+
+
+def test_schema_repair_resends_only_the_broken_option_and_merges_it_in_place():
+    model = _HalfBroken(prompts=[])
+    out = propose_options(model, SITE, {}, _hw(), [], "r")
+    assert [o["option_id"] for o in out["options"]] == ["OPT-1", "OPT-2"]
+    assert out["options"][0]["placement"] == {"inference": "edge", "storage": "onprem"}
+
+    repair_prompt = model.prompts[1]
+    assert "OPT-1" in repair_prompt and "OPT-2" not in repair_prompt
+    assert "DE-MUC-01" not in repair_prompt and "Schema example" not in repair_prompt
+    assert out["repair"]["mode"] == "schema"
+    assert out["repair"]["repaired"] == 1 and out["repair"]["kept"] == 1
+    assert count_tokens(repair_prompt) < count_tokens(model.prompts[0])
+
+
+def test_veto_repair_keeps_options_the_model_left_out():
+    class _FixesFirstOnly(FakeChatModel):
+        def _options(self, user, rng):
+            return {"options": super()._options(user, rng)["options"][:1]}
+
+    options = [{"option_id": f"OPT-{i}", "summary": "Cloud inference.", "placement": {"inference": "cloud"},
+                "pipeline": ["inference"], "hardware": ["EDGE_GPU_25W_16GB"]} for i in (1, 2)]
+    vetoes = [{"reason": "cloud", "violated_rules": ["no_raw_to_cloud"], "option_id": o["option_id"]}
+              for o in options]
+    out = repair_options(_FixesFirstOnly(), SITE, _hw(), vetoes, options, "r")
+    assert [o["option_id"] for o in out["options"]] == ["OPT-1", "OPT-2"]
+    assert out["options"][0]["placement"]["inference"] == "edge" and out["options"][1]["placement"] == {"inference": "cloud"}
+
+
+def test_default_option_fallback_is_traced():
+    _, hw_db, _ = load_reference_data()
+    out = n_select({"site_profile": SITE, "options": [], "hw_db": hw_db})
+    assert out["selected_option"]["option_id"] == DEFAULT_OPTION["option_id"]
+    assert out["trace"][0]["fallback"] == "default_option"
+
+
+def test_tool_binding_is_built_once_per_client(monkeypatch):
+    calls = []
+    real = FakeChatModel.bind_tools
+
+    def counting(self, *a, **k):
+        calls.append(1)
+        return real(self, *a, **k)
+
+    monkeypatch.setattr(FakeChatModel, "bind_tools", counting)
+    model = FakeChatModel()
+    for _ in range(3):
+        propose_options(model, SITE, {}, _hw(), [], "r")
+    assert len(calls) == 1
+    reset_llm()
+    assert not llm_mod._structured
+
+
+def test_graph_retry_repairs_vetoed_options_only():
+    sites, hw_db, policies = load_reference_data()
+    set_llm(FakeChatModel(veto_rate=1.0))
+    try:
+        out = build_graph().compile().invoke(build_inputs(sites[0], hw_db, policies, "t", cache_bypass=True))
+    finally:
+        reset_llm()
+    architect = [t for t in out["trace"] if t.node == "architect"]
+    assert architect[0].event == "proposed_structured"
+    assert all(t.event == "repaired" for t in architect[1:]) and len(architect) > 1
+    assert all(t["repair"]["mode"] == "veto" for t in architect[1:])
+    assert all(repair < full for repair, full in _retry_prompt_tokens(out, hw_db))
+    assert all(v.get("option_id") for v in out["vetoes"])
+
+
+def test_repeated_veto_repairs_each_reach_the_model():
+    # Every answer is vetoed, so the first repair comes back unchanged; the second one must
+    # still be a fresh call, not the cached answer to an identical prompt.
+    prompts = []
+
+    class _Spy(FakeChatModel):
+        def _options(self, user, rng):
+            prompts.append(user)
+            return super()._options(user, rng)
+
+    sites, hw_db, policies = load_reference_data()
+    set_llm(_Spy(veto_rate=1.0))
+    try:
+        out = build_graph().compile().invoke(build_inputs(sites[0], hw_db, policies, "t"))
+    finally:
+        reset_llm()
+    repaired = [t for t in out["trace"] if t.node == "architect" and t.event == "repaired"]
+    assert len(repaired) == SETTINGS.max_retries and all(t["cache"]["hits"] == 0 for t in repaired)
+    repair_prompts = [p for p in prompts if p.startswith("Vetoed options")]
+    assert len(repair_prompts) == len(repaired) == len(set(repair_prompts))
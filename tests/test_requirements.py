@@ -0,0 +1,83 @@
+import pytest
+from pydantic import BaseModel
+
+from aiv_de.agents import architect
+from aiv_de.agents.requirements_analyst import extract_requirements, run_requirements, site_remainder
+from aiv_de.bench import requirements_bench
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.run_one import load_reference_data, load_sites
+
+
+@pytest.fixture(scope="module")
+def sites():
+    return {s["site_id"]: s for s in load_sites()}
+
+
+def test_extracts_constraints_and_rules(sites):
+    c, rules, missing = extract_requirements(sites["IMPOSSIBLE-11"])
+    assert c.camera_count == 16 and c.resolution_class == "high"
+    assert any("high-res cameras" in r for r in rules)
+    assert any("drift" in r for r in rules)
+    assert missing == []
+
+
+def test_sparse_profile_uses_defaults_and_reports_gaps():
+    c, rules, missing = extract_requirements({"site_id": "X", "use_case": "safety_line", "latency_budget_ms": 30})
+    assert c.safety_critical and c.power_budget_w == 50 and c.fps == 15
+    assert rules == ["inference on edge/on-prem, no WAN dependency (safety line)"]
+    assert "line_profile.camera_count" in missing and "use_case" not in missing
+
+
+def test_remainder_keeps_only_unconsumed_fields(sites):
+    rest = site_remainder(sites["FR-LIL-05"])
+    assert "use_case" not in rest and "site_id" in rest
+    assert "camera_count" not in rest.get("line_profile", {})
+
+
+def test_bench_measures_the_narrow_prompt(sites):
+    report = requirements_bench([sites["FR-LIL-05"]], load_reference_data()[1])
+    assert report["requirements_prompt"]["after"] < report["requirements_prompt"]["before"]
+    assert report["stage_ms_per_site"]["before"] > 0 and report["stage_ms_per_site"]["after"] > 0
+
+
+def test_notes_failure_keeps_extracted_constraints(sites):
+    class _Bad(BaseModel):
+        x: int
+
+    class _Failing(FakeChatModel):
+        def with_structured_output(self, schema, **kwargs):
+            class _S:
+                def invoke(self, messages):
+                    _Bad.model_validate({})
+
+            return _S()
+
+    out = run_requirements(_Failing(), sites["FR-LIL-05"], "t")
+    assert "error" in out
+    assert out["requirements"]["assumptions"] == []
+    assert out["requirements"]["constraints"]["camera_count"] == sites["FR-LIL-05"]["line_profile"]["camera_count"]
+
+
+def test_notes_call_sees_only_what_the_extractor_left(sites):
+    seen = []
+
+    class _Spy(FakeChatModel):
+        def _requirements(self, user):
+            seen.append(user)
+            return super()._requirements(user)
+
+    run_requirements(_Spy(), {"site_id": "X", "use_case": "safety_line", "shift_patterns": ["day"]}, "t")
+    assert "line_profile.camera_count" in seen[0] and "shift_patterns=day" in seen[0]
+    assert "use_case" not in seen[0] and "safety_line" not in seen[0]
+
+
+def test_architect_reads_requirements_not_the_raw_profile(sites):
+    site = sites["POISON-12"]
+    req = run_requirements(FakeChatModel(), site, "t")["requirements"]
+    msg = architect.propose_prompt(site, req, [], [])[1][1]
+    assert "Site:" not in msg and "example_text" not in msg and site["site_id"] not in msg
+    assert "data_residency_required=true" in msg and "Rules: no raw data to cloud" in msg
+    assert "Assumptions: site network is segmented" in msg
+    # A draft without requirements gets the same extracted facts, minus the analyst's notes.
+    draft = architect.propose_prompt(site, {}, [], [])[1][1]
+    assert draft.split("\n")[:2] == msg.split("\n")[:2] and "Assumptions" not in draft
@@ -0,0 +1,67 @@
+import pytest
+
+from aiv_de import graph
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.graph import build_graph, make_checkpointer
+from aiv_de.llm import reset_llm, set_llm
+from aiv_de.run_one import load_reference_data, prepare_run, site_thread_id
+
+
+@pytest.fixture
+def env():
+    set_llm(FakeChatModel())
+    sites, hw_db, policies = load_reference_data()
+    app = build_graph().compile(checkpointer=make_checkpointer("memory")[0])
+    yield app, sites[0], hw_db, policies
+    reset_llm()
+
+
+def _events(out):
+    return [(t.node, t.event) for t in out["trace"]]
+
+
+def test_thread_id_follows_site_profile():
+    site = {"site_id": "DE-MUC-01", "power_budget_w": 30}
+    assert site_thread_id(site) == site_thread_id(dict(site))
+    assert site_thread_id(site) != site_thread_id({**site, "power_budget_w": 40})
+
+
+def test_resume_continues_interrupted_run(env, monkeypatch):
+    app, site, hw_db, policies = env
+    real = graph.propose_options
+    monkeypatch.setattr(graph, "propose_options", lambda *a, **k: (_ for _ in ()).throw(RuntimeError("boom")))
+    inputs, config = prepare_run(app, site, hw_db, policies, "r1", "fresh", cache_bypass=True)
+    with pytest.raises(RuntimeError):
+        app.invoke(inputs, config)
+
+    monkeypatch.setattr(graph, "propose_options", real)
+    inputs, config = prepare_run(app, site, hw_db, policies, "r2", "resume", cache_bypass=True)
+    assert inputs is None
+    out = app.invoke(inputs, config)
+    assert _events(out)[:2] == [("preflight", "passed"), ("requirements", "done")]
+    assert [e for e in _events(out) if e[0] == "requirements"] == [("requirements", "done")]
+    assert out["adr"]
+
+
+def test_revalidate_skips_llm_when_decision_unchanged(env, monkeypatch):
+    app, site, hw_db, policies = env
+    inputs, config = prepare_run(app, site, hw_db, policies, "r1", "fresh", cache_bypass=True)
+    first = app.invoke(inputs, config)
+
+    def no_llm(*a, **k):
+        raise AssertionError("LLM called during revalidate")
+
+    for name in ("run_requirements", "propose_options", "write_adr"):
+        monkeypatch.setattr(graph, name, no_llm)
+    inputs, config = prepare_run(app, site, hw_db, {**policies, "note": "edited"}, "r2", "revalidate")
+    out = app.invoke(inputs, config)
+    assert _events(out)[-2:] == [("validate", "validated"), ("adr", "reused")]
+    assert out["adr_narrative"] == first["adr_narrative"] and out["policy_ref"] != first["policy_ref"]
+    # Only the narrative is reused; the evidence is rendered from the trace as it is now.
+    assert out["adr"].endswith(first["adr_narrative"]) and "- `adr` written" in out["adr"]
+
+
+def test_revalidate_needs_a_previous_run(env):
+    app, site, hw_db, policies = env
+    with pytest.raises(ValueError):
+        prepare_run(app, site, hw_db, policies, "r1", "revalidate")
@@ -0,0 +1,79 @@
+import pytest
+
+from aiv_de.config import SETTINGS
+from aiv_de.graph import n_validate
+from aiv_de.policy_store import compiled_policies, get_compiled_policy_store, load_policy_store
+from aiv_de.run_one import load_reference_data, load_sites, validate_only
+from aiv_de.tools import rule_eval
+from aiv_de.tools.hardware_catalog import load_hardware_catalog
+from aiv_de.tools.rule_eval import (
+    RuleSyntaxError,
+    compile_condition,
+    compile_hitl_rules,
+    compile_risk_tiers,
+    rule_context,
+)
+from aiv_de.types import DEFAULT_OPTION
+
+
+def _ctx(**state):
+    site = {
+        "use_case": "safety_line",
+        "line_profile": {"distribution_shift_risk": "high"},
+    }
+    return rule_context({"site_profile": site, **state})
+
+
+def test_conditions_from_policy_files_compile_and_evaluate():
+    ctx = _ctx(retries=2, max_retries=2,
+               feasibility={"is_possible": False, "margin": "low"}, policy={"passed": True})
+    assert compile_condition("retries >= max_retries")(ctx)
+    assert compile_condition("feasibility.is_possible == false")(ctx)
+    assert compile_condition("use_case == safety_line AND feasibility.margin == 'low'")(ctx)
+    assert compile_condition("distribution_shift_risk == 'high'")(ctx)
+    assert not compile_condition("policy.passed == false")(ctx)
+    assert compile_condition("NOT (use_case == quality_inspection OR retries < 1)")(ctx)
+
+
+def test_missing_state_evaluates_false():
+    assert not compile_condition("feasibility.margin == 'low'")(_ctx(feasibility=None))
+    assert not compile_condition("retries >= max_retries")(_ctx())
+
+
+def test_free_text_is_rejected():
+    with pytest.raises(RuleSyntaxError):
+        compile_condition("internal analytics not affecting safety/rights")
+
+
+def test_hitl_policy_triggers_and_risk_tier():
+    policies = load_policy_store(SETTINGS.policy_dir)
+    rules = compile_hitl_rules(policies["hitl_policy"])
+    assert not rules.unparsed
+
+    ctx = _ctx(retries=0, max_retries=2,
+               feasibility={"is_possible": True, "margin": "medium"}, policy={"passed": False})
+    fired = {t["id"]: t["action"] for t in rules.evaluate(ctx)}
+    assert fired == {"drift_high": "REQUIRE_HUMAN_APPROVAL", "policy_violation": "BLOCK_AND_ESCALATE"}
+
+    tiers = compile_risk_tiers(policies["eu_ai_act_policy"])
+    assert [t["id"] for t in tiers.evaluate(ctx)] == ["high"]
+    assert tiers.unparsed
+
+
+def test_nodes_evaluate_the_store_rules_compiled_once(monkeypatch):
+    store = get_compiled_policy_store(SETTINGS.policy_dir)
+    assert compiled_policies(store.policies).hitl_rules is store.hitl_rules
+    monkeypatch.setattr(rule_eval, "_tokenize", None)  # any re-parse would fail
+    out = validate_only(load_sites()[0], load_hardware_catalog(f"{SETTINGS.data_dir}/hardware_specs.json"),
+                        store.policies)
+    assert out["risk_tier"] is not None
+
+
+@pytest.mark.parametrize("site_id, exhausted", [("DE-MUC-01", False), ("RO-CUJ-09", True)])
+def test_retry_budget_counts_only_for_vetoed_outcomes(site_id, exhausted):
+    sites, hw_db, policies = load_reference_data()
+    site = next(s for s in sites if s["site_id"] == site_id)
+    out = n_validate({"site_profile": site, "options": [dict(DEFAULT_OPTION)], "hw_db": hw_db,
+                      "policies": policies, "retries": 2, "max_retries": 2})
+    assert ("validator_exhausted" in {t["id"] for t in out["hitl_triggers"]}) is exhausted
+    assert out["hitl_required"] is exhausted
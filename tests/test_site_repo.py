@@ -0,0 +1,54 @@
+import json
+import os
+
+from aiv_de import site_repo
+from aiv_de.config import SETTINGS
+from aiv_de.site_repo import SiteRepository
+
+
+def _sites(n):
+    # Non-ASCII names so byte offsets and character offsets differ.
+    return [{"site_id": f"S-{i:03d}", "name": f"Zürich Werk {i} – Łódź", "power_budget_w": 10 + i} for i in range(n)]
+
+
+def test_array_file_matches_json_load(tmp_path, monkeypatch):
+    monkeypatch.setattr(site_repo, "_CHUNK", 7)  # profiles straddle every read
+    path = tmp_path / "sites.json"
+    path.write_text(json.dumps(_sites(25), indent=2, ensure_ascii=False), encoding="utf-8")
+    repo = SiteRepository(str(path))
+    assert list(repo) == _sites(25)
+    assert repo.get("S-013") == _sites(25)[13]
+    assert repo.get("missing") is None
+    assert len(repo) == 25 and "S-024" in repo
+
+
+def test_jsonl_file(tmp_path):
+    path = tmp_path / "sites.jsonl"
+    path.write_text("".join(json.dumps(s, ensure_ascii=False) + "\n" for s in _sites(5)) + "\n", encoding="utf-8")
+    repo = SiteRepository(str(path))
+    assert [s["site_id"] for s in repo] == repo.ids()
+    assert repo.get("S-004")["power_budget_w"] == 14
+
+
+def test_index_is_persisted_and_follows_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "sites.json"
+    path.write_text(json.dumps(_sites(3)), encoding="utf-8")
+    SiteRepository(str(path)).ids()
+    assert os.path.exists(f"{path}.idx")
+
+    # A fresh repository reuses the saved index instead of scanning.
+    monkeypatch.setattr(SiteRepository, "_scan", lambda self: iter(()))
+    assert SiteRepository(str(path)).get("S-002")["site_id"] == "S-002"
+    monkeypatch.undo()
+
+    path.write_text(json.dumps(_sites(4)), encoding="utf-8")
+    os.utime(path, ns=(1, 1))
+    assert SiteRepository(str(path)).get("S-003")["power_budget_w"] == 13
+
+
+def test_repo_over_shipped_sites():
+    with open(os.path.join(SETTINGS.data_dir, "sites.json"), "r", encoding="utf-8") as f:
+        expected = json.load(f)
+    repo = site_repo.open_site_repository(os.path.join(SETTINGS.data_dir, "sites.json"))
+    assert list(repo) == expected
+    assert all(repo.get(s["site_id"]) == s for s in expected)
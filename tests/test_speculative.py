@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from aiv_de import graph
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.graph import build_graph, route_after_reconcile
+from aiv_de.llm import reset_llm, set_llm
+from aiv_de.run_one import build_inputs, load_reference_data
+
+
+@pytest.fixture(scope="module")
+def ref():
+    sites, hw_db, policies = load_reference_data()
+    return {s["site_id"]: s for s in sites}, hw_db, policies
+
+
+def _run(ref, site_id, llm, speculative=True):
+    sites, hw_db, policies = ref
+    set_llm(llm)
+    try:
+        app = build_graph(speculative=speculative).compile()
+        return app.invoke(build_inputs(sites[site_id], hw_db, policies, "t", cache_bypass=True))
+    finally:
+        reset_llm()
+
+
+def _nodes(out):
+    return [t.node for t in out["trace"]]
+
+
+def test_route_after_reconcile():
+    assert route_after_reconcile({"speculation": {"accepted": True}}) == "select"
+    assert route_after_reconcile({"speculation": {"accepted": False}}) == "architect"
+    assert route_after_reconcile({}) == "architect"
+
+
+def test_passing_draft_is_kept(ref):
+    out = _run(ref, "FR-LIL-05", FakeChatModel())
+    nodes = _nodes(out)
+    assert set(nodes[1:3]) == {"requirements", "draft"}
+    assert "architect" not in nodes
+    assert out["speculation"]["accepted"] and out["requirements"]["constraints"]
+    assert out["adr"] and not out["vetoes"]
+
+
+def test_vetoed_draft_is_repaired_not_reproposed(ref, monkeypatch):
+    proposed, repaired = [], []
+    real_propose, real_repair = graph.propose_options, graph.repair_options
+
+    def spy_propose(llm, site, requirements, *a, **k):
+        proposed.append(bool(requirements))
+        return real_propose(llm, site, requirements, *a, **k)
+
+    def spy_repair(llm, site, requirements, hw_db, vetoes, *a, **k):
+        repaired.append(vetoes)
+        return real_repair(llm, site, requirements, hw_db, vetoes, *a, **k)
+
+    monkeypatch.setattr(graph, "propose_options", spy_propose)
+    monkeypatch.setattr(graph, "repair_options", spy_repair)
+    out = _run(ref, "FR-LIL-05", FakeChatModel(veto_rate=1.0))
+    assert [e.event for e in out["trace"] if e.node == "reconcile"] == ["redraft"]
+    assert proposed == [False]  # only the draft; the architect repairs it from the reconcile vetoes
+    assert repaired and all(v.get("option_id") for v in repaired[0])
+    assert [e.event for e in out["trace"] if e.node == "architect"][0] == "repaired"
+
+
+def test_blocked_site_skips_both_branches(ref):
+    out = _run(ref, "IMPOSSIBLE-11", FakeChatModel())
+    assert _nodes(out) == ["preflight", "hitl"]
+
+
+def test_branches_overlap(ref):
+    sites, hw_db, policies = ref
+    inputs = build_inputs(sites["FR-LIL-05"], hw_db, policies, "t", cache_bypass=True)
+
+    async def timed(speculative):
+        app = build_graph(speculative=speculative).compile()
+        t0 = time.perf_counter()
+        await app.ainvoke(inputs)
+        return time.perf_counter() - t0
+
+    set_llm(FakeChatModel(latency_s=0.1))
+    try:
+        linear, spec = asyncio.run(timed(False)), asyncio.run(timed(True))
+    finally:
+        reset_llm()
+    # Three sequential LLM calls vs two: one round trip saved.
+    assert spec < linear - 0.05
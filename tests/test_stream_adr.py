@@ -0,0 +1,57 @@
+import io
+
+import pytest
+
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.graph import build_graph, make_checkpointer
+from aiv_de.llm import reset_llm, set_llm
+from aiv_de.run_one import load_reference_data, prepare_run, stream_run
+
+
+def test_adr_tokens_stream_to_console_and_file(tmp_path):
+    set_llm(FakeChatModel())
+    try:
+        sites, hw_db, policies = load_reference_data()
+        app = build_graph().compile(checkpointer=make_checkpointer("memory")[0])
+        inputs, config = prepare_run(app, sites[0], hw_db, policies, "r1", "fresh", cache_bypass=True)
+        echo = io.StringIO()
+        adr_path = tmp_path / "ADR.md"
+        out = stream_run(app, inputs, config, str(adr_path), echo=echo)
+    finally:
+        reset_llm()
+
+    text = echo.getvalue()
+    assert out["adr"].startswith("# ADR-001")
+    assert adr_path.read_text(encoding="utf-8") == out["adr"]
+    # Tokens are echoed before the adr node's update line, and the graph ran exactly once.
+    assert text.index("## Context") < text.index('{"adr":')
+    assert [t.node for t in out["trace"]].count("requirements") == 1
+    # The narrative reaches the console once, inside the ADR, not again in the update line.
+    assert all(text.count(line) == 1 for line in out["adr_narrative"].splitlines() if line)
+
+
+def test_interrupted_stream_leaves_only_redacted_text(tmp_path):
+    class _Leaky(FakeChatModel):
+        def _adr(self, user):
+            return "## Trade-offs\nAsk ops@example.com or call 0170 1234567.\n\n## Consequences\nNone.\n"
+
+    class _Interrupt(io.StringIO):
+        def write(self, text):
+            if "Consequences" in text:
+                raise KeyboardInterrupt
+            return super().write(text)
+
+    set_llm(_Leaky())
+    try:
+        sites, hw_db, policies = load_reference_data()
+        app = build_graph().compile(checkpointer=make_checkpointer("memory")[0])
+        inputs, config = prepare_run(app, sites[0], hw_db, policies, "r1", "fresh", cache_bypass=True)
+        adr_path = tmp_path / "ADR.md"
+        with pytest.raises(KeyboardInterrupt):
+            stream_run(app, inputs, config, str(adr_path), echo=_Interrupt(), redacted=True)
+    finally:
+        reset_llm()
+
+    text = adr_path.read_text(encoding="utf-8")
+    assert "Ask [REDACTED_EMAIL] or call [REDACTED_PHONE]." in text
+    assert "ops@example.com" not in text and "1234567" not in text
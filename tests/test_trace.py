@@ -0,0 +1,49 @@
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from aiv_de.fake_llm import FakeChatModel
+from aiv_de.graph import build_graph, make_checkpointer, n_revise, n_select
+from aiv_de.llm import reset_llm, set_llm
+from aiv_de.observability.trace import TraceEvent, append_trace, trace_event, trace_to_dicts
+from aiv_de.run_one import build_inputs, load_reference_data
+
+
+def test_nodes_emit_only_their_new_event():
+    history = trace_event("architect", "proposed_structured") * 50
+    out = n_revise({"retries": 1, "vetoes": [{"reason": "r", "violated_rules": []}], "trace": history})
+    assert len(out["trace"]) == 1 and out["trace"][0].node == "revise"
+    assert len(history) == 50
+    out = n_select({"options": [], "hw_db": [], "trace": history})
+    assert [t.event for t in out["trace"]] == ["selected"]
+
+
+def test_append_reducer_keeps_order_and_monotonic_time():
+    trace = append_trace(None, trace_event("a", "x"))
+    trace = append_trace(trace, trace_event("b", "y", k=1))
+    assert [t.node for t in trace] == ["a", "b"]
+    assert trace[0].t <= trace[1].t
+    assert trace[1].get("k") == 1 and trace[1]["event"] == "y"
+    assert trace_to_dicts(trace)[1] == {"node": "b", "event": "y", "t": trace[1].t, "k": 1}
+
+
+def test_event_roundtrips_through_checkpoint_serializer():
+    serde = JsonPlusSerializer(allowed_msgpack_modules=[TraceEvent])
+    events = trace_event("validate", "validated", vetoes=[], risk_tier=None)
+    assert serde.loads_typed(serde.dumps_typed(events)) == events
+
+
+def test_updates_stay_one_event_while_checkpoints_accumulate():
+    sites, hw_db, policies = load_reference_data()
+    saver = make_checkpointer("memory")[0]
+    set_llm(FakeChatModel(veto_rate=1.0))
+    try:
+        app = build_graph().compile(checkpointer=saver)
+        config = {"configurable": {"thread_id": "t"}}
+        updates = [u for chunk in app.stream(build_inputs(sites[0], hw_db, policies, "t", cache_bypass=True),
+                                             config, stream_mode="updates")
+                   for u in chunk.values() if u and "trace" in u]
+    finally:
+        reset_llm()
+    assert len(updates) > 8 and all(len(u["trace"]) == 1 for u in updates)
+    # What is persisted is the accumulated channel: the last checkpoint holds every event.
+    sizes = [len(s.values.get("trace", [])) for s in app.get_state_history(config)]
+    assert max(sizes) == len(updates) and len(set(sizes)) > 1